@@ -3,12 +3,16 @@ API service for content generation and analytics.
 """
 import json
 import os
-import asyncio
-from typing import Optional
-import replicate
+from typing import Optional, AsyncIterator, Dict, Iterator
 from dotenv import load_dotenv
 from models import GeneratedContent, AnalyticsData, ContentSettings
-from utils import safe_json_parse
+from utils import safe_json_parse, IncrementalJSONParser
+from inference_executor import remote_executor, PRIORITY_INTERACTIVE
+from generation_cache import GenerationCache, generation_cache, settings_fingerprint
+from replicate_client import ReplicateClient, DEFAULT_BASE_URL
+from content_analytics import analytics_engine
+
+REPLICATE_MODEL = "meta/llama-2-70b-chat:02e509c789964a7ea8736978a43525956ef40397be9033abf9fd2badfe68c9e3"
 
 # Load environment variables
 load_dotenv()
@@ -17,55 +21,118 @@ load_dotenv()
 class APIService:
     """Handles API calls for content generation and analytics."""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[GenerationCache] = None):
+        self.generation_cache = cache if cache is not None else generation_cache
         self.api_key = os.getenv('Replicate')
-        if self.api_key:
-            os.environ["REPLICATE_API_TOKEN"] = self.api_key
-        else:
+        if not self.api_key:
             raise ValueError("Replicate API key not found in environment variables")
+        
+        # REPLICATE_BASE_URL lets tests point the client at a local stub server
+        self.client = ReplicateClient(
+            self.api_key,
+            base_url=os.getenv("REPLICATE_BASE_URL", DEFAULT_BASE_URL)
+        )
     
-    async def generate_content(self, settings: ContentSettings) -> Optional[GeneratedContent]:
-        """Generate content using Replicate API."""
+    async def generate_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                               request_key: Optional[str] = None,
+                               force_fresh: bool = False) -> Optional[GeneratedContent]:
+        """Generate content using Replicate API.
+        
+        Parsed responses are memoized by settings fingerprint so identical
+        requests are not paid for twice; ``force_fresh`` bypasses the cache.
+        """
         prompt = self._create_content_prompt(settings)
+        cache_key = settings_fingerprint(settings, "replicate")
         
         try:
-            # Run in thread to avoid blocking UI
-            loop = asyncio.get_event_loop()
-            response_data = await loop.run_in_executor(
-                None, 
-                self._run_replicate_model, 
-                prompt
-            )
-            
-            if not response_data:
-                return None
+            content_dict = None
+            if self.generation_cache and not force_fresh:
+                content_dict = self.generation_cache.get(cache_key)
             
-            content_dict = safe_json_parse(response_data)
-            if not content_dict:
-                return None
-            
-            # Create GeneratedContent object
-            content = GeneratedContent(
-                hook=content_dict.get("hook", ""),
-                caption=content_dict.get("caption", ""),
-                cta=content_dict.get("cta", ""),
-                hashtags=content_dict.get("hashtags", []),
-                best_time=content_dict.get("bestTime", ""),
-                strategy_notes=content_dict.get("strategyNotes", ""),
-                variations=content_dict.get("variations", []),
-                platform=settings.platform,
-                niche=settings.niche,
-                tone=settings.tone,
-                content_type=settings.content_type
-            )
+            if content_dict is None:
+                # Run on the bounded request pool to avoid blocking UI
+                response_data = await remote_executor.run(
+                    self._run_replicate_model,
+                    prompt,
+                    priority=priority,
+                    key=request_key
+                )
+                
+                if not response_data:
+                    return None
+                
+                content_dict = safe_json_parse(response_data)
+                if not content_dict:
+                    return None
+                
+                if self.generation_cache:
+                    self.generation_cache.put(cache_key, content_dict)
             
-            return content
+            return self._build_content(content_dict, settings)
             
         except Exception as e:
             print(f"Error generating content: {e}")
             return None
     
-    async def analyze_content(self, content_history: list) -> Optional[AnalyticsData]:
+    async def stream_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                             request_key: Optional[str] = None,
+                             force_fresh: bool = False) -> AsyncIterator[Dict]:
+        """Stream content fields as the model writes them.
+        
+        Yields ``{"fields": ..., "done": False}`` whenever hook, caption,
+        hashtags or another field grows, then a final
+        ``{"fields": ..., "done": True, "content": GeneratedContent or None}``.
+        """
+        prompt = self._create_content_prompt(settings)
+        cache_key = settings_fingerprint(settings, "replicate")
+        
+        try:
+            content_dict = None
+            if self.generation_cache and not force_fresh:
+                content_dict = self.generation_cache.get(cache_key)
+            
+            if content_dict is None:
+                parser = IncrementalJSONParser()
+                chunks = []
+                async for token in remote_executor.stream(
+                    self._stream_replicate_model, prompt, priority=priority, key=request_key
+                ):
+                    chunks.append(token)
+                    if parser.feed(token):
+                        yield {"fields": parser.snapshot(), "done": False}
+                
+                content_dict = parser.snapshot() if parser.complete else safe_json_parse(''.join(chunks))
+                if not content_dict:
+                    yield {"fields": parser.snapshot(), "done": True, "content": None}
+                    return
+                
+                if self.generation_cache:
+                    self.generation_cache.put(cache_key, content_dict)
+            
+            yield {"fields": content_dict, "done": True, "content": self._build_content(content_dict, settings)}
+            
+        except Exception as e:
+            print(f"Error streaming content: {e}")
+            yield {"fields": {}, "done": True, "content": None}
+    
+    def _build_content(self, content_dict: Dict, settings: ContentSettings) -> GeneratedContent:
+        """Create a GeneratedContent object from the parsed model response."""
+        return GeneratedContent(
+            hook=content_dict.get("hook", ""),
+            caption=content_dict.get("caption", ""),
+            cta=content_dict.get("cta", ""),
+            hashtags=content_dict.get("hashtags", []),
+            best_time=content_dict.get("bestTime", ""),
+            strategy_notes=content_dict.get("strategyNotes", ""),
+            variations=content_dict.get("variations", []),
+            platform=settings.platform,
+            niche=settings.niche,
+            tone=settings.tone,
+            content_type=settings.content_type
+        )
+    
+    async def analyze_content(self, content_history: list, priority: int = PRIORITY_INTERACTIVE,
+                              request_key: Optional[str] = None) -> Optional[AnalyticsData]:
         """Analyze content history for insights."""
         if not content_history:
             return None
@@ -73,12 +140,12 @@ class APIService:
         prompt = self._create_analytics_prompt(content_history)
         
         try:
-            # Run in thread to avoid blocking UI
-            loop = asyncio.get_event_loop()
-            response_data = await loop.run_in_executor(
-                None, 
-                self._run_replicate_model, 
-                prompt
+            # Run on the bounded request pool to avoid blocking UI
+            response_data = await remote_executor.run(
+                self._run_replicate_model,
+                prompt,
+                priority=priority,
+                key=request_key
             )
             
             if not response_data:
@@ -107,26 +174,26 @@ class APIService:
     def _run_replicate_model(self, prompt: str) -> str:
         """Run Replicate model synchronously."""
         try:
-            output = replicate.run(
-                "meta/llama-2-70b-chat:02e509c789964a7ea8736978a43525956ef40397be9033abf9fd2badfe68c9e3",
-                input={
-                    "prompt": prompt,
-                    "max_new_tokens": 2000,
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "repetition_penalty": 1.15
-                }
-            )
-            
-            # Join the output if it's a list
-            if isinstance(output, list):
-                return ''.join(output)
-            return str(output)
-            
+            # Identical in-flight prompts share one upstream prediction
+            return self.client.run(REPLICATE_MODEL, self._model_input(prompt))
         except Exception as e:
             print(f"Replicate API error: {e}")
             return ""
     
+    def _stream_replicate_model(self, prompt: str) -> Iterator[str]:
+        """Yield output tokens from Replicate as they are generated."""
+        yield from self.client.stream(REPLICATE_MODEL, self._model_input(prompt))
+    
+    def _model_input(self, prompt: str) -> Dict:
+        """Model parameters for a prompt."""
+        return {
+            "prompt": prompt,
+            "max_new_tokens": 2000,
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "repetition_penalty": 1.15
+        }
+    
     def _create_content_prompt(self, settings: ContentSettings) -> str:
         """Create prompt for content generation."""
         return f"""You are a social media content expert. Generate a high-performing post for the following settings:
@@ -162,11 +229,22 @@ DO NOT OUTPUT ANYTHING OTHER THAN VALID JSON."""
             for content in content_history[:10]
         ], indent=2)
         
+        # Aggregates cover every post; the sample above is only the latest 10
+        analytics_engine.sync(content_history)
+        stats = analytics_engine.snapshot()
+        stats_json = json.dumps(
+            {key: value for key, value in stats.items() if key not in ("hour_histogram", "weekday_histogram")},
+            indent=2
+        )
+        
         return f"""You are a social media analytics expert. Analyze the following content history and provide actionable insights.
 
-Content History ({len(content_history)} posts):
+Most Recent Posts ({min(len(content_history), 10)} of {len(content_history)}):
 {history_json}
 
+Statistics Across All {len(content_history)} Posts:
+{stats_json}
+
 Provide a comprehensive analysis with:
 1. Content performance patterns
 2. Best performing content types
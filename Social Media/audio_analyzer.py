@@ -5,105 +5,611 @@ Copyright (c) 2025 Redemption Road. All rights reserved.
 Audio file analysis for full-length music video generation.
 """
 import os
-from typing import Optional, Dict, List
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Tuple, Iterator, Callable
 import librosa
 import numpy as np
-from pydub import AudioSegment
-from mutagen import File as MutagenFile
 from models import SUPPORTED_AUDIO_FORMATS
+from audio_cache import AnalysisCache
+from audio_probe import probe_audio
+from audio_pcm_store import PCMStore
+
+# Bump whenever extractor output changes so cached analyses are invalidated
+ANALYZER_VERSION = "3"
+
+# Cut density presets for the beat-synchronous planner (bars per scene)
+CUT_DENSITIES = {
+    "low": 8,
+    "medium": 4,
+    "high": 2
+}
+
+# Planner cost of cutting on each kind of beat, and weight of scene length deviation
+CUT_COSTS = {
+    "segment": 0.0,
+    "phrase": 0.2,
+    "downbeat": 0.5,
+    "beat": 1.0
+}
+LENGTH_WEIGHT = 4.0
+
+
+class AudioFeatures:
+    """Shared feature graph for one decoded signal.
+    
+    Each intermediate (STFT, onset envelope, chroma, RMS, beat grid) is
+    computed on first access and reused by every extractor, and the time
+    spent in each stage is recorded in ``stage_timings``.
+    """
+    
+    def __init__(self, y: np.ndarray, sr: int, hop_length: int = 512, n_fft: int = 2048):
+        self.y = y
+        self.sr = sr
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+        self.chroma_hop_length = hop_length
+        self.segment_frame_limit: Optional[int] = None
+        self.stage_timings: Dict[str, float] = {}
+        self._cache: Dict[str, object] = {}
+        self._nested: List[float] = []
+    
+    @contextmanager
+    def timed(self, stage: str):
+        """Record wall time spent in a stage, excluding nested stages."""
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - self._nested.pop()
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0.0) + own
+            if self._nested:
+                self._nested[-1] += elapsed
+    
+    def _compute(self, name: str, fn):
+        """Compute a feature once and memoize it."""
+        if name not in self._cache:
+            with self.timed(name):
+                self._cache[name] = fn()
+        return self._cache[name]
+    
+    @property
+    def duration(self) -> float:
+        """Signal duration in seconds."""
+        return len(self.y) / float(self.sr)
+    
+    @property
+    def stft(self) -> np.ndarray:
+        """Magnitude spectrogram."""
+        return self._compute(
+            "stft",
+            lambda: np.abs(librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length))
+        )
+    
+    @property
+    def onset_envelope(self) -> np.ndarray:
+        """Onset strength envelope derived from the shared STFT."""
+        def compute():
+            mel = librosa.feature.melspectrogram(S=self.stft ** 2, sr=self.sr)
+            # No top_db clipping: it depends on the loudest frame, which streaming can't know
+            return librosa.onset.onset_strength(S=librosa.power_to_db(mel, top_db=None), sr=self.sr)
+        return self._compute("onset_envelope", compute)
+    
+    @property
+    def chroma(self) -> np.ndarray:
+        """Constant-Q chromagram."""
+        return self._compute(
+            "chroma",
+            lambda: librosa.feature.chroma_cqt(y=self.y, sr=self.sr, hop_length=self.hop_length)
+        )
+    
+    @property
+    def rms(self) -> np.ndarray:
+        """Frame-wise RMS energy derived from the shared STFT."""
+        return self._compute(
+            "rms",
+            lambda: librosa.feature.rms(S=self.stft, frame_length=self.n_fft, hop_length=self.hop_length)[0]
+        )
+    
+    @property
+    def beat_grid(self) -> Tuple[float, np.ndarray]:
+        """Tempo (BPM) and beat frame indices from a single beat tracking pass."""
+        def compute():
+            tempo, beats = librosa.beat.beat_track(
+                onset_envelope=self.onset_envelope,
+                sr=self.sr,
+                hop_length=self.hop_length
+            )
+            return float(np.atleast_1d(tempo)[0]), beats
+        return self._compute("beat_grid", compute)
+    
+    @property
+    def beat_times(self) -> np.ndarray:
+        """Beat positions in seconds."""
+        return librosa.frames_to_time(self.beat_grid[1], sr=self.sr, hop_length=self.hop_length)
+
+
+def _pool_frames(matrix: np.ndarray, factor: int) -> np.ndarray:
+    """Average groups of ``factor`` consecutive frames (columns)."""
+    if factor <= 1:
+        return matrix
+    n_frames = matrix.shape[1]
+    padded = int(np.ceil(n_frames / factor)) * factor
+    if padded != n_frames:
+        matrix = np.pad(matrix, ((0, 0), (0, padded - n_frames)), mode="edge")
+    return matrix.reshape(matrix.shape[0], -1, factor).mean(axis=2)
+
+
+class StreamingFeatures(AudioFeatures):
+    """Feature graph accumulated block by block from a decoded stream.
+    
+    Only per-frame summaries (RMS, onset strength, pooled chroma) and
+    per-block tempo estimates are kept, so memory no longer grows with
+    the decoded signal and the self-similarity matrix used for structure
+    detection is capped at ``segment_frame_limit`` frames.
+    """
+    
+    def __init__(self, sr: int, hop_length: int, n_fft: int, block_frames: int = 2048,
+                 pool_frames: int = 1, segment_frame_limit: int = 1024):
+        super().__init__(np.zeros(0, dtype=np.float32), sr, hop_length=hop_length, n_fft=n_fft)
+        self.block_frames = block_frames
+        self.pool_frames = max(1, pool_frames)
+        self.chroma_hop_length = hop_length * self.pool_frames
+        self.segment_frame_limit = segment_frame_limit
+        self.n_samples = 0
+        self._block_size = n_fft + (block_frames - 1) * hop_length
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._blocks_processed = 0
+        self._rms_blocks: List[np.ndarray] = []
+        self._onset_blocks: List[np.ndarray] = []
+        self._chroma_pools: List[np.ndarray] = []
+        self._chroma_remainder: Optional[np.ndarray] = None
+        self._last_mel: Optional[np.ndarray] = None
+        self._block_tempos: List[float] = []
+    
+    def add_samples(self, samples: np.ndarray):
+        """Buffer decoded samples and process every complete block."""
+        self.n_samples += len(samples)
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False)])
+        
+        while len(self._buffer) >= self._block_size:
+            self._process_block(self._buffer[:self._block_size])
+            # Keep the STFT overlap so frames continue seamlessly into the next block
+            self._buffer = self._buffer[self.block_frames * self.hop_length:]
+    
+    def finish(self):
+        """Flush the partial final block and remaining pooled chroma."""
+        has_new_samples = len(self._buffer) > self.n_fft - self.hop_length
+        if has_new_samples or (self.n_samples and not self._blocks_processed):
+            n_frames = max(1, int(np.ceil((len(self._buffer) - self.n_fft) / self.hop_length)) + 1)
+            tail = np.zeros(self.n_fft + (n_frames - 1) * self.hop_length, dtype=np.float32)
+            tail[:len(self._buffer)] = self._buffer
+            self._process_block(tail)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        
+        if self._chroma_remainder is not None and self._chroma_remainder.shape[1]:
+            self._chroma_pools.append(self._chroma_remainder.mean(axis=1, keepdims=True))
+        self._chroma_remainder = None
+    
+    def _process_block(self, block: np.ndarray):
+        """Extract per-frame features from one block of whole frames."""
+        self._blocks_processed += 1
+        
+        with self.timed("stft"):
+            S = np.abs(librosa.stft(block, n_fft=self.n_fft, hop_length=self.hop_length, center=False))
+        
+        with self.timed("rms"):
+            rms = librosa.feature.rms(S=S, frame_length=self.n_fft, hop_length=self.hop_length)[0]
+            self._rms_blocks.append(rms.astype(np.float32))
+        
+        with self.timed("onset_envelope"):
+            # Same spectral flux as librosa.onset.onset_strength, carried across blocks
+            mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S ** 2, sr=self.sr), top_db=None)
+            previous = mel_db[:, :1] if self._last_mel is None else self._last_mel
+            onset = np.maximum(0.0, np.diff(np.hstack([previous, mel_db]), axis=1)).mean(axis=0)
+            self._last_mel = mel_db[:, -1:]
+            self._onset_blocks.append(onset.astype(np.float32))
+        
+        with self.timed("tempo"):
+            # Local tempo per full block keeps the tempogram bounded by block size
+            if len(onset) >= self.block_frames:
+                tempo = librosa.feature.tempo(onset_envelope=onset, sr=self.sr, hop_length=self.hop_length)
+                self._block_tempos.append(float(tempo[0]))
+        
+        with self.timed("chroma"):
+            # Same constant-Q chroma as the full path; centred CQT frames are
+            # shifted by half a window relative to the uncentred STFT frames
+            offset = self.n_fft // (2 * self.hop_length)
+            chroma = librosa.feature.chroma_cqt(y=block, sr=self.sr, hop_length=self.hop_length)
+            chroma = chroma[:, offset:offset + S.shape[1]]
+            if self._chroma_remainder is not None:
+                chroma = np.hstack([self._chroma_remainder, chroma])
+            whole = (chroma.shape[1] // self.pool_frames) * self.pool_frames
+            if whole:
+                self._chroma_pools.append(_pool_frames(chroma[:, :whole], self.pool_frames))
+            self._chroma_remainder = chroma[:, whole:]
+    
+    @property
+    def duration(self) -> float:
+        """Decoded duration in seconds."""
+        return self.n_samples / float(self.sr)
+    
+    @property
+    def stft(self) -> np.ndarray:
+        """The full spectrogram is never retained in streaming mode."""
+        raise RuntimeError("STFT is not retained by streaming analysis")
+    
+    @property
+    def onset_envelope(self) -> np.ndarray:
+        """Onset strength envelope for the whole stream."""
+        return self._compute("onset_envelope", lambda: np.concatenate(self._onset_blocks or [np.zeros(0)]))
+    
+    @property
+    def chroma(self) -> np.ndarray:
+        """Pooled chromagram (one column per ``pool_frames`` frames)."""
+        return self._compute("chroma", lambda: np.hstack(self._chroma_pools or [np.zeros((12, 0))]))
+    
+    @property
+    def rms(self) -> np.ndarray:
+        """Frame-wise RMS energy for the whole stream."""
+        return self._compute("rms", lambda: np.concatenate(self._rms_blocks or [np.zeros(0)]))
+    
+    @property
+    def beat_grid(self) -> Tuple[float, np.ndarray]:
+        """Beat tracking with the tempo fixed to the median block tempo."""
+        def compute():
+            if self._block_tempos:
+                tempo = float(np.median(self._block_tempos))
+            else:
+                # Short stream: the whole envelope is a single block
+                tempo = float(librosa.feature.tempo(
+                    onset_envelope=self.onset_envelope, sr=self.sr, hop_length=self.hop_length
+                )[0])
+            _, beats = librosa.beat.beat_track(
+                onset_envelope=self.onset_envelope,
+                sr=self.sr,
+                hop_length=self.hop_length,
+                bpm=tempo
+            )
+            return tempo, beats
+        return self._compute("beat_grid", compute)
 
 
 class AudioAnalyzer:
     """Analyzes audio files for music video generation."""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[AnalysisCache] = None, pcm_store: Optional[PCMStore] = None,
+                 use_cache: bool = True):
         self.sample_rate = 22050
+        self.hop_length = 512
+        self.n_fft = 2048
+        # use_cache=False disables the analysis cache; otherwise the default one is created
+        if not use_cache:
+            self.cache: Optional[AnalysisCache] = None
+        else:
+            self.cache = cache if cache is not None else AnalysisCache()
+        # Opt-in: decoded tracks are large and only worth keeping for repeated decodes
+        self.pcm_store = pcm_store
+        
+        # Streaming mode settings for long inputs
+        self.streaming_threshold = 600  # seconds; longer files are analyzed block-wise
+        self.block_frames = 2048  # STFT frames per decoded block (~47s at 22050 Hz)
+        self.max_segment_frames = 1024  # Cap on self-similarity matrix size
+        
+        # Preview tier settings: mono, downsampled, first N seconds only
+        self.preview_seconds = 30.0
+        self.preview_sample_rate = 11025
+        self._background: Optional[ThreadPoolExecutor] = None
+    
+    def analyze_progressive(self, file_path: str, content=None,
+                            callback: Optional[Callable[[Optional[Dict]], None]] = None,
+                            use_cache: bool = True) -> Tuple[Optional[Dict], Future]:
+        """Return a quick preview analysis now and the full analysis as a future.
+        
+        The full pass runs on a background thread. When it finishes, the
+        result replaces the preview on ``content`` (a ``GeneratedContent``)
+        and is passed to ``callback``. Both run on the worker thread, so Tk
+        callers should re-post UI updates with ``widget.after``.
+        """
+        preview = self.analyze_preview(file_path)
+        if content is not None and preview:
+            self._apply_analysis(content, preview)
+        
+        if self._background is None:
+            self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-analysis")
+        future = self._background.submit(self.analyze_audio_file, file_path, use_cache)
+        
+        def on_done(done: Future):
+            try:
+                analysis = done.result()
+            except Exception as e:
+                print(f"Error in background audio analysis: {e}")
+                analysis = None
+            if content is not None and analysis:
+                self._apply_analysis(content, analysis)
+            if callback:
+                callback(analysis)
+        
+        future.add_done_callback(on_done)
+        return preview, future
     
-    def analyze_audio_file(self, file_path: str) -> Optional[Dict]:
-        """Analyze audio file and extract useful information."""
+    def analyze_preview(self, file_path: str) -> Optional[Dict]:
+        """Fast low-resolution analysis of the opening seconds of a file.
+        
+        Tempo, key and beats come from a mono, downsampled decode of the first
+        ``preview_seconds``; duration and tags come from the file headers.
+        Structural segments are left empty until the full pass.
+        """
         if not self._is_supported_format(file_path):
             return None
         
         try:
-            # Basic file info
-            file_info = self._get_file_info(file_path)
+            total_start = time.perf_counter()
+            file_info = self._get_file_info(file_path, decode_fallback=False)
             
-            # Load audio for analysis
-            y, sr = librosa.load(file_path, sr=self.sample_rate)
+            load_start = time.perf_counter()
+            stored = self.pcm_store.open(file_path, self.sample_rate) if self.pcm_store else None
+            if stored is not None:
+                # Already decoded at full rate: slice the mapped samples instead
+                sr = self.sample_rate
+                y = stored[:int(self.preview_seconds * sr)]
+            else:
+                y, sr = librosa.load(
+                    file_path, sr=self.preview_sample_rate, mono=True,
+                    duration=self.preview_seconds, res_type="soxr_lq"
+                )
+            load_time = time.perf_counter() - load_start
             
-            # Extract features
-            analysis = {
-                "file_path": file_path,
-                "duration": file_info["duration"],
-                "title": file_info.get("title", "Unknown"),
-                "artist": file_info.get("artist", "Unknown"),
-                "genre": file_info.get("genre", "Unknown"),
-                "tempo": self._get_tempo(y, sr),
-                "key": self._get_key(y, sr),
-                "energy_sections": self._analyze_energy_sections(y, sr),
-                "beat_times": self._get_beat_times(y, sr),
-                "structural_segments": self._get_structural_segments(y, sr),
-                "recommended_scenes": self._calculate_scene_count(file_info["duration"])
+            # Halve hop and FFT size with the sample rate to keep the same time resolution
+            scale = sr / float(self.sample_rate)
+            features = AudioFeatures(
+                y, sr,
+                hop_length=max(64, int(self.hop_length * scale)),
+                n_fft=max(256, int(self.n_fft * scale))
+            )
+            features.stage_timings["decode"] = load_time
+            
+            extracted = {
+                "tempo": self._get_tempo(features),
+                "key": self._get_key(features),
+                "energy_sections": self._analyze_energy_sections(features),
+                "beat_times": self._get_beat_times(features),
+                "structural_segments": []
             }
+            duration = file_info.get("duration") or features.duration
+            
+            analysis = self._build_analysis(file_path, file_info, duration, extracted)
+            analysis["preview"] = True
+            analysis["preview_seconds"] = features.duration
+            features.stage_timings["total"] = time.perf_counter() - total_start
+            analysis["stage_timings"] = dict(features.stage_timings)
             
             return analysis
             
         except Exception as e:
-            print(f"Error analyzing audio file: {e}")
+            print(f"Error previewing audio file: {e}")
             return None
     
-    def _is_supported_format(self, file_path: str) -> bool:
-        """Check if audio format is supported."""
-        _, ext = os.path.splitext(file_path.lower())
-        return ext in SUPPORTED_AUDIO_FORMATS
+    def _apply_analysis(self, content, analysis: Dict):
+        """Store an analysis result on a GeneratedContent object."""
+        content.audio_analysis = analysis
+        content.audio_duration = analysis.get("duration", content.audio_duration)
     
-    def _get_file_info(self, file_path: str) -> Dict:
-        """Get basic file information using mutagen."""
+    def analyze_audio_file(self, file_path: str, use_cache: bool = True,
+                           streaming: Optional[bool] = None) -> Optional[Dict]:
+        """Analyze audio file and extract useful information.
+        
+        ``streaming`` forces block-wise analysis on or off; by default it is
+        used for files longer than ``streaming_threshold`` seconds.
+        """
+        if not self._is_supported_format(file_path):
+            return None
+        
         try:
-            audio_file = MutagenFile(file_path)
-            if audio_file is None:
-                # Fallback to pydub
-                audio = AudioSegment.from_file(file_path)
-                return {"duration": len(audio) / 1000.0}
+            total_start = time.perf_counter()
+            
+            # Basic file info (header only - the decode below covers the fallback)
+            file_start = time.perf_counter()
+            file_info = self._get_file_info(file_path, decode_fallback=False)
+            file_info_time = time.perf_counter() - file_start
+            
+            if streaming is None:
+                streaming = file_info.get("duration", 0) > self.streaming_threshold
             
-            info = {
-                "duration": audio_file.info.length if hasattr(audio_file.info, 'length') else 0,
-                "title": str(audio_file.get('TIT2', ['Unknown'])[0]) if audio_file.get('TIT2') else "Unknown",
-                "artist": str(audio_file.get('TPE1', ['Unknown'])[0]) if audio_file.get('TPE1') else "Unknown",
-                "genre": str(audio_file.get('TCON', ['Unknown'])[0]) if audio_file.get('TCON') else "Unknown"
+            cache_key = None
+            if use_cache and self.cache:
+                lookup_start = time.perf_counter()
+                cache_key = self.cache.make_key(file_path, ANALYZER_VERSION, self._cache_params(streaming))
+                cached = self.cache.get(cache_key) if cache_key else None
+                if cached and file_info.get("duration"):
+                    analysis = self._build_analysis(file_path, file_info, file_info["duration"], cached)
+                    analysis["preview"] = False
+                    analysis["cache_hit"] = True
+                    analysis["streaming"] = streaming
+                    analysis["stage_timings"] = {
+                        "file_info": file_info_time,
+                        "cache_lookup": time.perf_counter() - lookup_start,
+                        "total": time.perf_counter() - total_start
+                    }
+                    return analysis
+            
+            if streaming:
+                features = self._stream_features(file_path, file_info.get("duration", 0))
+                if features is None:
+                    return None
+            else:
+                # Load audio for analysis
+                load_start = time.perf_counter()
+                y, sr = self._load_samples(file_path)
+                load_time = time.perf_counter() - load_start
+                
+                features = AudioFeatures(y, sr, hop_length=self.hop_length, n_fft=self.n_fft)
+                features.stage_timings["decode"] = load_time
+            features.stage_timings["file_info"] = file_info_time
+            
+            duration = file_info.get("duration") or features.duration
+            
+            # Extract features
+            extracted = {
+                "tempo": self._get_tempo(features),
+                "key": self._get_key(features),
+                "energy_sections": self._analyze_energy_sections(features),
+                "beat_times": self._get_beat_times(features),
+                "structural_segments": self._get_structural_segments(features)
             }
             
-            return info
+            if cache_key:
+                self.cache.put(cache_key, extracted)
+            
+            analysis = self._build_analysis(file_path, file_info, duration, extracted)
+            analysis["preview"] = False
+            analysis["cache_hit"] = False
+            analysis["streaming"] = streaming
+            features.stage_timings["total"] = time.perf_counter() - total_start
+            analysis["stage_timings"] = dict(features.stage_timings)
+            
+            return analysis
             
         except Exception as e:
-            print(f"Error getting file info: {e}")
-            # Fallback to pydub
-            try:
-                audio = AudioSegment.from_file(file_path)
-                return {"duration": len(audio) / 1000.0}
-            except:
-                return {"duration": 0}
+            print(f"Error analyzing audio file: {e}")
+            return None
+    
+    def _build_analysis(self, file_path: str, file_info: Dict, duration: float, extracted: Dict) -> Dict:
+        """Combine file metadata with extracted features."""
+        return {
+            "file_path": file_path,
+            "duration": duration,
+            "title": file_info.get("title", "Unknown"),
+            "artist": file_info.get("artist", "Unknown"),
+            "genre": file_info.get("genre", "Unknown"),
+            "tempo": extracted["tempo"],
+            "key": extracted["key"],
+            "energy_sections": extracted["energy_sections"],
+            "beat_times": extracted["beat_times"],
+            "structural_segments": extracted["structural_segments"],
+            "recommended_scenes": self._calculate_scene_count(duration)
+        }
+    
+    def _load_samples(self, file_path: str) -> Tuple[np.ndarray, int]:
+        """Decode a file, through the memory-mapped PCM store when enabled."""
+        if self.pcm_store:
+            samples = self.pcm_store.load(file_path, self.sample_rate)
+            if samples is not None:
+                return samples, self.sample_rate
+        return librosa.load(file_path, sr=self.sample_rate)
+    
+    def _cache_params(self, streaming: bool = False) -> Dict:
+        """Analysis parameters that affect cached results."""
+        params = {"sample_rate": self.sample_rate, "hop_length": self.hop_length}
+        if streaming:
+            params.update({
+                "streaming": True,
+                "block_frames": self.block_frames,
+                "max_segment_frames": self.max_segment_frames
+            })
+        return params
+    
+    def _stream_features(self, file_path: str, duration_hint: float) -> Optional[StreamingFeatures]:
+        """Decode a file block by block into a StreamingFeatures graph."""
+        features = None
+        decode_time = 0.0
+        chunk_start = time.perf_counter()
+        
+        for samples, sr in self._stream_samples(file_path):
+            decode_time += time.perf_counter() - chunk_start
+            if features is None:
+                features = self._create_streaming_features(sr, duration_hint)
+            features.add_samples(samples)
+            chunk_start = time.perf_counter()
+        
+        if features is None:
+            print(f"Error analyzing audio file: no audio decoded from {file_path}")
+            return None
+        
+        features.finish()
+        features.stage_timings["decode"] = decode_time
+        return features
     
-    def _get_tempo(self, y: np.ndarray, sr: int) -> float:
+    def _create_streaming_features(self, sr: int, duration_hint: float) -> StreamingFeatures:
+        """Scale frame parameters to the native rate so frames span the same time."""
+        scale = sr / float(self.sample_rate)
+        hop_length = max(1, int(round(self.hop_length * scale)))
+        n_fft = int(2 ** round(np.log2(self.n_fft * scale)))
+        
+        if duration_hint > 0:
+            expected_frames = duration_hint * sr / hop_length
+            pool_frames = int(np.ceil(expected_frames / self.max_segment_frames))
+        else:
+            pool_frames = int(np.ceil(sr / hop_length))  # ~1 second of chroma per column
+        
+        return StreamingFeatures(
+            sr,
+            hop_length=hop_length,
+            n_fft=n_fft,
+            block_frames=self.block_frames,
+            pool_frames=pool_frames,
+            segment_frame_limit=self.max_segment_frames
+        )
+    
+    def _stream_samples(self, file_path: str, chunk_size: int = 65536) -> Iterator[Tuple[np.ndarray, int]]:
+        """Decode a file incrementally, yielding mono float32 chunks at the native rate."""
+        try:
+            import soundfile as sf
+            sf_info = sf.info(file_path)
+        except Exception:
+            sf_info = None
+        
+        if sf_info is not None:
+            for block in sf.blocks(file_path, blocksize=chunk_size, dtype="float32", always_2d=True):
+                yield block.mean(axis=1), sf_info.samplerate
+            return
+        
+        # Formats libsndfile cannot read (e.g. AAC/M4A) go through audioread
+        import audioread
+        with audioread.audio_open(file_path) as source:
+            frame_bytes = 2 * source.channels
+            remainder = b""
+            for buffer in source:
+                data = remainder + buffer
+                usable = len(data) - len(data) % frame_bytes
+                remainder = data[usable:]
+                if usable:
+                    samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+                    yield samples.reshape(-1, source.channels).mean(axis=1), source.samplerate
+    
+    def _is_supported_format(self, file_path: str) -> bool:
+        """Check if audio format is supported."""
+        _, ext = os.path.splitext(file_path.lower())
+        return ext in SUPPORTED_AUDIO_FORMATS
+    
+    def _get_file_info(self, file_path: str, decode_fallback: bool = True) -> Dict:
+        """Get basic file information from container headers."""
+        return probe_audio(file_path, allow_decode=decode_fallback)
+    
+    def _get_tempo(self, features: AudioFeatures) -> float:
         """Extract tempo (BPM) from audio."""
         try:
-            tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-            return float(tempo)
+            tempo, _ = features.beat_grid
+            return tempo
         except:
             return 120.0  # Default BPM
     
-    def _get_key(self, y: np.ndarray, sr: int) -> str:
+    def _get_key(self, features: AudioFeatures) -> str:
         """Estimate musical key."""
         try:
             # Simple chromagram-based key estimation
-            chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-            key_profiles = self._get_key_profiles()
-            
-            # Calculate correlation with key profiles
-            correlations = []
-            for key_name, profile in key_profiles.items():
-                correlation = np.corrcoef(chroma.mean(axis=1), profile)[0, 1]
-                correlations.append((correlation, key_name))
+            with features.timed("key"):
+                chroma_mean = features.chroma.mean(axis=1)
+                key_profiles = self._get_key_profiles()
+                
+                # Calculate correlation with key profiles
+                correlations = []
+                for key_name, profile in key_profiles.items():
+                    correlation = np.corrcoef(chroma_mean, profile)[0, 1]
+                    correlations.append((correlation, key_name))
             
             # Return key with highest correlation
             correlations.sort(reverse=True)
@@ -130,65 +636,66 @@ class AudioAnalyzer:
         
         return keys
     
-    def _analyze_energy_sections(self, y: np.ndarray, sr: int) -> List[Dict]:
+    def _analyze_energy_sections(self, features: AudioFeatures) -> List[Dict]:
         """Analyze energy levels throughout the song."""
+        sr = features.sr
+        hop_length = features.hop_length
+        n_sections = 8
         try:
             # Calculate RMS energy
-            rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=512)[0]
-            
-            # Smooth the energy curve
-            rms_smooth = librosa.util.fix_length(rms, size=len(rms), mode='edge')
+            rms = features.rms
             
             # Divide into sections and calculate average energy
-            section_length = len(rms_smooth) // 8  # 8 sections
-            sections = []
+            section_length = len(rms) // n_sections
+            if section_length == 0:
+                return []
             
-            for i in range(8):
-                start_idx = i * section_length
-                end_idx = (i + 1) * section_length if i < 7 else len(rms_smooth)
-                
-                section_energy = np.mean(rms_smooth[start_idx:end_idx])
-                start_time = (start_idx * 512) / sr
-                end_time = (end_idx * 512) / sr
-                
-                # Classify energy level
-                if section_energy > np.percentile(rms_smooth, 75):
-                    energy_level = "high"
-                elif section_energy > np.percentile(rms_smooth, 25):
-                    energy_level = "medium"
-                else:
-                    energy_level = "low"
-                
-                sections.append({
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "energy_level": energy_level,
-                    "energy_value": float(section_energy)
-                })
+            starts = np.arange(n_sections) * section_length
+            ends = np.append(starts[1:], len(rms))
+            energies = np.add.reduceat(rms, starts) / (ends - starts)
+            
+            # Classify energy level against thresholds computed once
+            low, high = np.percentile(rms, [25, 75])
+            levels = np.where(energies > high, "high", np.where(energies > low, "medium", "low"))
             
-            return sections
+            return [
+                {
+                    "start_time": float(start * hop_length / sr),
+                    "end_time": float(end * hop_length / sr),
+                    "energy_level": str(level),
+                    "energy_value": float(energy)
+                }
+                for start, end, level, energy in zip(starts, ends, levels, energies)
+            ]
             
         except Exception as e:
             print(f"Error analyzing energy sections: {e}")
             return []
     
-    def _get_beat_times(self, y: np.ndarray, sr: int) -> List[float]:
+    def _get_beat_times(self, features: AudioFeatures) -> List[float]:
         """Get beat times for synchronization."""
         try:
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr, units='time')
-            return beats.tolist()
+            return features.beat_times.tolist()
         except:
             return []
     
-    def _get_structural_segments(self, y: np.ndarray, sr: int) -> List[Dict]:
+    def _get_structural_segments(self, features: AudioFeatures) -> List[Dict]:
         """Identify structural segments (verse, chorus, etc.)."""
         try:
             # Simple segmentation based on novelty
-            chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-            novelty = librosa.segment.recurrence_matrix(chroma, mode='affinity')
-            boundaries = librosa.segment.agglomerative(novelty, k=6)  # 6 segments max
+            chroma = features.chroma
+            chroma_hop = features.chroma_hop_length
+            limit = features.segment_frame_limit
+            with features.timed("segmentation"):
+                # Downsample so the N x N affinity matrix stays bounded
+                if limit and chroma.shape[1] > limit:
+                    factor = int(np.ceil(chroma.shape[1] / limit))
+                    chroma = _pool_frames(chroma, factor)
+                    chroma_hop *= factor
+                novelty = librosa.segment.recurrence_matrix(chroma, mode='affinity')
+                boundaries = librosa.segment.agglomerative(novelty, k=6)  # 6 segments max
             
-            segment_times = librosa.frames_to_time(boundaries, sr=sr)
+            segment_times = librosa.frames_to_time(boundaries, sr=features.sr, hop_length=chroma_hop)
             
             segments = []
             segment_labels = ['intro', 'verse1', 'chorus1', 'verse2', 'chorus2', 'outro']
@@ -219,70 +726,253 @@ class AudioAnalyzer:
         
         return min(base_scenes, 50)  # Cap at 50 scenes for very long videos
     
-    def generate_scene_timeline(self, analysis: Dict, total_scenes: int) -> List[Dict]:
+    def generate_scene_timeline(self, analysis: Dict, total_scenes: int,
+                                snap_to_beats: bool = True) -> List[Dict]:
         """Generate detailed scene timeline based on audio analysis."""
-        duration = analysis["duration"]
-        energy_sections = analysis.get("energy_sections", [])
-        structural_segments = analysis.get("structural_segments", [])
-        beat_times = analysis.get("beat_times", [])
+        table = self.build_scene_table(analysis, total_scenes, snap_to_beats)
+        return self._scene_records(table)
+    
+    def _scene_records(self, table: Dict[str, np.ndarray]) -> List[Dict]:
+        """Turn a columnar scene table into the per-scene dicts callers use."""
+        return [
+            {
+                "scene_number": int(number),
+                "start_time": float(start),
+                "end_time": float(end),
+                "duration": float(end - start),
+                "energy_level": str(energy),
+                "segment_type": str(segment),
+                "scene_type": str(scene_type),
+                "description": self._generate_scene_description(str(scene_type), str(energy), int(number))
+            }
+            for number, start, end, energy, segment, scene_type in zip(
+                table["scene_number"], table["start_time"], table["end_time"],
+                table["energy_level"], table["segment_type"], table["scene_type"]
+            )
+        ]
+    
+    def build_scene_table(self, analysis: Dict, total_scenes: int,
+                          snap_to_beats: bool = True) -> Dict[str, np.ndarray]:
+        """Build a columnar scene timeline with one NumPy array per field."""
+        return self.build_scene_tables(analysis, [total_scenes], snap_to_beats)[total_scenes]
+    
+    def build_scene_tables(self, analysis: Dict, scene_counts: List[int],
+                           snap_to_beats: bool = True) -> Dict[int, Dict[str, np.ndarray]]:
+        """Build timelines for several scene counts from one set of boundary indexes."""
+        index = self._timeline_index(analysis)
+        return {count: self._scene_table(index, count, snap_to_beats) for count in scene_counts}
+    
+    def _timeline_index(self, analysis: Dict) -> Dict[str, np.ndarray]:
+        """Sorted boundary arrays for interval lookups with np.searchsorted."""
+        def intervals(items: List[Dict], label_key: str):
+            starts = np.array([item["start_time"] for item in items], dtype=float)
+            order = np.argsort(starts, kind="stable")
+            ends = np.array([item["end_time"] for item in items], dtype=float)
+            labels = np.array([item[label_key] for item in items], dtype=object)
+            return starts[order], ends[order], labels[order]
         
-        scenes = []
-        scene_duration = duration / total_scenes
+        section_starts, section_ends, section_levels = intervals(
+            analysis.get("energy_sections", []), "energy_level"
+        )
+        segment_starts, segment_ends, segment_labels = intervals(
+            analysis.get("structural_segments", []), "label"
+        )
         
-        for i in range(total_scenes):
-            start_time = i * scene_duration
-            end_time = min((i + 1) * scene_duration, duration)
-            
-            # Determine scene characteristics based on audio
-            scene_energy = self._get_scene_energy(start_time, end_time, energy_sections)
-            scene_segment = self._get_scene_segment(start_time, structural_segments)
-            
-            # Generate scene description based on characteristics
-            scene_type = self._determine_scene_type(scene_energy, scene_segment, i, total_scenes)
-            
-            scenes.append({
-                "scene_number": i + 1,
-                "start_time": start_time,
-                "end_time": end_time,
-                "duration": end_time - start_time,
-                "energy_level": scene_energy,
-                "segment_type": scene_segment,
-                "scene_type": scene_type,
-                "description": self._generate_scene_description(scene_type, scene_energy, i + 1)
-            })
+        return {
+            "duration": float(analysis["duration"]),
+            "beats": np.sort(np.asarray(analysis.get("beat_times", []), dtype=float)),
+            "section_starts": section_starts,
+            "section_ends": section_ends,
+            "section_levels": section_levels,
+            "segment_starts": segment_starts,
+            "segment_ends": segment_ends,
+            "segment_labels": segment_labels
+        }
+    
+    def _scene_table(self, index: Dict[str, np.ndarray], total_scenes: int,
+                     snap_to_beats: bool) -> Dict[str, np.ndarray]:
+        """Compute every scene column at once for one scene count."""
+        total_scenes = max(1, int(total_scenes))
+        duration = index["duration"]
+        
+        bounds = np.linspace(0.0, duration, total_scenes + 1)
+        if snap_to_beats and len(index["beats"]) and total_scenes > 1:
+            # Moving each cut by less than half a scene keeps boundaries ordered
+            max_shift = duration / total_scenes / 2
+            bounds[1:-1] = self._snap_to_beats(bounds[1:-1], index["beats"], max_shift)
+        
+        return self._scene_table_from_bounds(index, bounds)
+    
+    def _scene_table_from_bounds(self, index: Dict[str, np.ndarray], bounds: np.ndarray) -> Dict[str, np.ndarray]:
+        """Compute every scene column at once for the given cut boundaries."""
+        total_scenes = len(bounds) - 1
+        starts, ends = bounds[:-1], bounds[1:]
+        numbers = np.arange(1, total_scenes + 1)
+        energy = self._lookup_intervals(
+            starts, index["section_starts"], index["section_ends"], index["section_levels"], "medium"
+        )
+        segment = self._lookup_intervals(
+            starts, index["segment_starts"], index["segment_ends"], index["segment_labels"], "main"
+        )
+        
+        return {
+            "scene_number": numbers,
+            "start_time": starts,
+            "end_time": ends,
+            "duration": ends - starts,
+            "energy_level": energy.astype(str),
+            "segment_type": segment.astype(str),
+            "scene_type": self._classify_scenes(numbers, total_scenes, energy, segment)
+        }
+    
+    def generate_beat_synced_timeline(self, analysis: Dict, cut_density: str = "medium",
+                                      min_scene_length: float = 4.0,
+                                      max_scene_length: float = 16.0,
+                                      beats_per_bar: int = 4) -> List[Dict]:
+        """Generate a scene timeline with cuts planned on downbeats and phrases."""
+        index = self._timeline_index(analysis)
+        bounds = self.plan_scene_cuts(
+            analysis, cut_density, min_scene_length, max_scene_length, beats_per_bar
+        )
+        table = self._scene_table_from_bounds(index, bounds)
+        return self._scene_records(table)
+    
+    def plan_scene_cuts(self, analysis: Dict, cut_density: str = "medium",
+                        min_scene_length: float = 4.0, max_scene_length: float = 16.0,
+                        beats_per_bar: int = 4) -> np.ndarray:
+        """Plan scene boundaries on the beat grid with dynamic programming.
         
-        return scenes
-    
-    def _get_scene_energy(self, start_time: float, end_time: float, energy_sections: List[Dict]) -> str:
-        """Get energy level for scene timeframe."""
-        for section in energy_sections:
-            if section["start_time"] <= start_time < section["end_time"]:
-                return section["energy_level"]
-        return "medium"
-    
-    def _get_scene_segment(self, start_time: float, structural_segments: List[Dict]) -> str:
-        """Get structural segment type for scene."""
-        for segment in structural_segments:
-            if segment["start_time"] <= start_time < segment["end_time"]:
-                return segment["label"]
-        return "main"
-    
-    def _determine_scene_type(self, energy: str, segment: str, scene_num: int, total_scenes: int) -> str:
-        """Determine scene type based on audio characteristics."""
-        if scene_num == 1:
-            return "opening"
-        elif scene_num == total_scenes:
-            return "closing"
-        elif energy == "high":
-            return "performance_high_energy"
-        elif energy == "low":
-            return "atmospheric"
-        elif "chorus" in segment:
-            return "performance_focus"
-        elif "verse" in segment:
-            return "narrative"
+        Candidate cuts are the beats. Each scene is penalized by its squared
+        deviation from the target length (``cut_density`` bars) plus a cut
+        cost that is lowest on structural segment boundaries, then phrase
+        starts (4 bars), then downbeats. Only predecessors between
+        ``min_scene_length`` and ``max_scene_length`` earlier are considered,
+        so the pass is linear in the number of beats.
+        """
+        duration = float(analysis["duration"])
+        beats = np.sort(np.asarray(analysis.get("beat_times", []), dtype=float))
+        tempo = float(analysis.get("tempo") or 120.0)
+        bars_per_scene = CUT_DENSITIES.get(cut_density, CUT_DENSITIES["medium"])
+        target = float(np.clip(bars_per_scene * beats_per_bar * 60.0 / tempo, min_scene_length, max_scene_length))
+        
+        if duration <= min_scene_length:
+            return np.array([0.0, duration])
+        
+        beats = beats[(beats > 0) & (beats < duration)]
+        if len(beats) == 0:
+            # No beat grid: fall back to evenly spaced cuts at the target length
+            return np.linspace(0.0, duration, max(1, int(round(duration / target))) + 1)
+        
+        candidates = np.concatenate([[0.0], beats, [duration]])
+        cut_costs = self._cut_costs(candidates, analysis.get("structural_segments", []), beats_per_bar)
+        
+        n = len(candidates)
+        cost = np.full(n, np.inf)
+        previous = np.full(n, -1, dtype=int)
+        cost[0] = 0.0
+        
+        # Predecessor window [lo, hi] for each candidate via two sorted lookups
+        lows = np.searchsorted(candidates, candidates - max_scene_length, side="left")
+        highs = np.searchsorted(candidates, candidates - min_scene_length, side="right") - 1
+        
+        for j in range(1, n):
+            hi = highs[j]
+            if hi < 0:
+                continue
+            lo = min(lows[j], hi)  # Gap longer than max (e.g. silence): allow the closest cut
+            window = slice(lo, hi + 1)
+            lengths = candidates[j] - candidates[window]
+            totals = cost[window] + LENGTH_WEIGHT * ((lengths - target) / target) ** 2 + cut_costs[j]
+            best = int(np.argmin(totals))
+            if np.isfinite(totals[best]):
+                cost[j] = totals[best]
+                previous[j] = lo + best
+        
+        if previous[-1] < 0:
+            return np.array([0.0, duration])
+        
+        cuts = [n - 1]
+        while cuts[-1] > 0:
+            cuts.append(previous[cuts[-1]])
+        return candidates[cuts[::-1]]
+    
+    def _cut_costs(self, candidates: np.ndarray, structural_segments: List[Dict],
+                   beats_per_bar: int) -> np.ndarray:
+        """Cost of cutting at each candidate; musically strong positions are cheaper."""
+        beats = candidates[1:-1]
+        beat_numbers = np.arange(len(beats))
+        
+        # Segment boundaries snap to their nearest beat
+        segment_bounds = np.array([seg["start_time"] for seg in structural_segments], dtype=float)
+        segment_bounds = segment_bounds[(segment_bounds > 0) & (segment_bounds < candidates[-1])]
+        if len(segment_bounds):
+            right = np.clip(np.searchsorted(beats, segment_bounds), 0, len(beats) - 1)
+            left = np.clip(right - 1, 0, len(beats) - 1)
+            use_left = np.abs(beats[left] - segment_bounds) <= np.abs(beats[right] - segment_bounds)
+            segment_beats = np.where(use_left, left, right)
         else:
-            return "transition"
+            segment_beats = np.zeros(0, dtype=int)
+        
+        # Bar phase: the one that puts the most segment boundaries on downbeats
+        phase = 0
+        if len(segment_beats):
+            phase = int(np.argmax(np.bincount(segment_beats % beats_per_bar, minlength=beats_per_bar)))
+        
+        bar_position = (beat_numbers - phase) % beats_per_bar
+        phrase_position = (beat_numbers - phase) % (beats_per_bar * 4)
+        
+        costs = np.zeros(len(candidates))
+        beat_costs = np.select(
+            [phrase_position == 0, bar_position == 0],
+            [CUT_COSTS["phrase"], CUT_COSTS["downbeat"]],
+            default=CUT_COSTS["beat"]
+        )
+        beat_costs[segment_beats] = CUT_COSTS["segment"]
+        costs[1:-1] = beat_costs
+        return costs
+    
+    def _snap_to_beats(self, times: np.ndarray, beats: np.ndarray, max_shift: float) -> np.ndarray:
+        """Move each time to its nearest beat when that beat is within max_shift."""
+        right = np.clip(np.searchsorted(beats, times), 0, len(beats) - 1)
+        left = np.clip(right - 1, 0, len(beats) - 1)
+        use_left = np.abs(beats[left] - times) <= np.abs(beats[right] - times)
+        nearest = np.where(use_left, beats[left], beats[right])
+        return np.where(np.abs(nearest - times) < max_shift, nearest, times)
+    
+    def _lookup_intervals(self, times: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                          labels: np.ndarray, default: str) -> np.ndarray:
+        """Label of the interval containing each time, or ``default``."""
+        result = np.full(len(times), default, dtype=object)
+        if len(starts) == 0:
+            return result
+        
+        idx = np.searchsorted(starts, times, side="right") - 1
+        valid = idx >= 0
+        valid[valid] = times[valid] < ends[idx[valid]]
+        result[valid] = labels[idx[valid]]
+        return result
+    
+    def _classify_scenes(self, numbers: np.ndarray, total_scenes: int,
+                         energy: np.ndarray, segment: np.ndarray) -> np.ndarray:
+        """Determine scene types based on audio characteristics."""
+        segment = segment.astype(str)
+        conditions = [
+            numbers == 1,
+            numbers == total_scenes,
+            energy == "high",
+            energy == "low",
+            np.char.find(segment, "chorus") >= 0,
+            np.char.find(segment, "verse") >= 0
+        ]
+        choices = [
+            "opening",
+            "closing",
+            "performance_high_energy",
+            "atmospheric",
+            "performance_focus",
+            "narrative"
+        ]
+        return np.select(conditions, choices, default="transition")
     
     def _generate_scene_description(self, scene_type: str, energy: str, scene_num: int) -> str:
         """Generate description for scene based on type and energy."""
@@ -0,0 +1,234 @@
+"""
+Redemption Marketing - Batch Audio Analysis
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Parallel, resumable audio analysis for whole music folders.
+
+Usage:
+    python audio_batch.py "../Consolidated/Instruments" --out instruments_analysis.jsonl
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+from models import SUPPORTED_AUDIO_FORMATS
+
+
+# Per-process analyzer, created once by the pool initializer
+_worker_analyzer = None
+
+# Error recorded for a file whose decode killed its worker process
+CRASH_ERROR = "Worker process crashed"
+
+
+def _init_worker():
+    """Create the analyzer once per worker process."""
+    global _worker_analyzer
+    from audio_analyzer import AudioAnalyzer
+    # No PCM store: each file is decoded once per batch, so a copy on disk would only cost IO
+    _worker_analyzer = AudioAnalyzer()
+
+
+def _analyze_worker(file_path: str, use_cache: bool) -> Dict:
+    """Analyze one file, capturing any error in the result record."""
+    start = time.perf_counter()
+    try:
+        analysis = _worker_analyzer.analyze_audio_file(file_path, use_cache=use_cache)
+        if analysis is None:
+            return {"status": "error", "error": "Analysis failed", "elapsed": time.perf_counter() - start}
+        return {"status": "ok", "analysis": analysis, "elapsed": time.perf_counter() - start}
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}", "elapsed": time.perf_counter() - start}
+
+
+def find_audio_files(root: str) -> List[str]:
+    """Recursively list supported audio files under a directory."""
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() in SUPPORTED_AUDIO_FORMATS:
+                files.append(os.path.join(dirpath, filename))
+    return sorted(files)
+
+
+def _file_signature(file_path: str) -> Optional[List[int]]:
+    """Size and mtime used to detect files changed since a previous run."""
+    try:
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        return None
+
+
+class BatchAnalyzer:
+    """Fans audio analysis out across a process pool and streams results to JSONL.
+
+    Each finished file is appended to ``output_path`` as one JSON record, so
+    an interrupted run can be resumed: files already recorded with an
+    unchanged size/mtime are skipped. Failures are recorded per file and
+    never stop the batch.
+    """
+
+    def __init__(self, output_path: str, workers: Optional[int] = None,
+                 use_cache: bool = True, retry_errors: bool = False):
+        if workers is None:
+            from cpu_optimizer import cpu_optimizer
+            workers = cpu_optimizer.optimal_threads
+        self.output_path = output_path
+        self.workers = max(1, workers)
+        self.use_cache = use_cache
+        self.retry_errors = retry_errors
+
+    def run(self, root: str, progress_callback: Optional[Callable[[Dict, int, int], None]] = None) -> Dict:
+        """Analyze every audio file under ``root`` and return a run summary."""
+        files = find_audio_files(root)
+        completed = self._load_completed()
+        pending = [
+            path for path in files
+            if completed.get(os.path.abspath(path)) != _file_signature(path)
+        ]
+
+        summary = {
+            "total": len(files),
+            "skipped": len(files) - len(pending),
+            "ok": 0,
+            "errors": 0,
+            "elapsed": 0.0
+        }
+        start = time.perf_counter()
+
+        output_dir = os.path.dirname(os.path.abspath(self.output_path))
+        os.makedirs(output_dir, exist_ok=True)
+
+        with open(self.output_path, "a", encoding="utf-8") as out:
+            for record in self._iter_results(pending):
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+
+                summary["ok" if record["status"] == "ok" else "errors"] += 1
+                if progress_callback:
+                    done = summary["ok"] + summary["errors"]
+                    progress_callback(record, done, len(pending))
+
+        summary["elapsed"] = time.perf_counter() - start
+        return summary
+
+    def _iter_results(self, files: List[str]):
+        """Yield result records as files finish, keeping a bounded number in flight.
+
+        A crashing decoder takes down the whole pool, so every file in
+        flight at the time is re-run alone; only a file that crashes on
+        its own is recorded as the crash.
+        """
+        queue = list(reversed(files))
+        suspects: List[str] = []
+        max_in_flight = self.workers * 2
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        in_flight = {}
+        isolated = False
+
+        try:
+            while queue or suspects or in_flight:
+                if suspects:
+                    # Run suspects one at a time once the pool has drained
+                    if not in_flight:
+                        path = suspects.pop()
+                        in_flight[executor.submit(_analyze_worker, path, self.use_cache)] = path
+                        isolated = True
+                else:
+                    isolated = False
+                    while queue and len(in_flight) < max_in_flight:
+                        path = queue.pop()
+                        in_flight[executor.submit(_analyze_worker, path, self.use_cache)] = path
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                pool_broken = False
+
+                for future in done:
+                    path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        pool_broken = True
+                        if not isolated:
+                            suspects.append(path)
+                            continue
+                        result = {"status": "error", "error": CRASH_ERROR, "elapsed": 0.0}
+                    except Exception as e:
+                        result = {"status": "error", "error": f"{type(e).__name__}: {e}", "elapsed": 0.0}
+                    yield self._make_record(path, result)
+
+                if pool_broken:
+                    # Everything still in flight died with the pool; continue with a fresh one
+                    suspects.extend(in_flight.values())
+                    in_flight.clear()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _make_record(self, file_path: str, result: Dict) -> Dict:
+        """Build the JSONL record for one file."""
+        return {
+            "file_path": os.path.abspath(file_path),
+            "signature": _file_signature(file_path),
+            "status": result["status"],
+            "error": result.get("error"),
+            "elapsed": round(result.get("elapsed", 0.0), 3),
+            "analysis": result.get("analysis")
+        }
+
+    def _load_completed(self) -> Dict[str, List[int]]:
+        """Read previous results so finished files are skipped on resume."""
+        completed = {}
+        if not os.path.exists(self.output_path):
+            return completed
+
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partial line from an interrupted run
+                # Crash records are always retried; the crash may have been transient
+                if record.get("status") == "ok" or (not self.retry_errors and record.get("error") != CRASH_ERROR):
+                    completed[record["file_path"]] = record.get("signature")
+                else:
+                    completed.pop(record["file_path"], None)
+
+        return completed
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Analyze every audio file in a folder.")
+    parser.add_argument("root", help="Directory to scan recursively")
+    parser.add_argument("--out", default="audio_analysis.jsonl", help="JSONL output file (appended, resumable)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: optimal_threads)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the analysis cache")
+    parser.add_argument("--retry-errors", action="store_true", help="Re-analyze files that failed previously")
+    args = parser.parse_args()
+
+    batch = BatchAnalyzer(
+        args.out,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        retry_errors=args.retry_errors
+    )
+
+    def report(record, done, total):
+        status = "ok" if record["status"] == "ok" else f"ERROR: {record['error']}"
+        print(f"[{done}/{total}] {os.path.basename(record['file_path'])} - {status}")
+
+    summary = batch.run(args.root, progress_callback=report)
+    print(
+        f"Analyzed {summary['ok']} files, {summary['errors']} errors, "
+        f"{summary['skipped']} skipped in {summary['elapsed']:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Redemption Marketing - Audio Analysis Benchmark
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Reproducible timing and memory benchmark for AudioAnalyzer.
+
+Usage:
+    python audio_benchmark.py --out bench.json
+    python audio_benchmark.py --out bench_new.json --baseline bench.json --threshold 0.15
+"""
+import os
+import sys
+import json
+import wave
+import time
+import argparse
+import platform
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+
+
+SAMPLE_RATE = 22050
+CORPUS_KINDS = ["click", "chords", "noise"]
+CORPUS_LENGTHS = {
+    "short": 30,
+    "medium": 240,
+    "long": 3600
+}
+
+# Regressions smaller than this many seconds are treated as timer noise
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def _synthesize_block(kind: str, start: int, count: int, sr: int) -> np.ndarray:
+    """Synthesize one block of a corpus signal; blocks are independent of chunking."""
+    t = (start + np.arange(count)) / float(sr)
+
+    if kind == "click":
+        # 120 BPM clicks with an accented downbeat every 4 beats
+        beat = 0.5
+        phase = np.mod(t, beat)
+        accent = np.where(np.mod(np.floor(t / beat), 4) == 0, 1.0, 0.5)
+        return 0.8 * accent * np.exp(-phase * 80.0) * np.sin(2 * np.pi * 1000.0 * phase)
+
+    if kind == "chords":
+        # I-V-vi-IV in C, two seconds per chord, with a pulsing envelope
+        progression = np.array([
+            [261.63, 329.63, 392.00],
+            [196.00, 246.94, 293.66],
+            [220.00, 261.63, 329.63],
+            [174.61, 220.00, 261.63]
+        ])
+        chord_index = np.floor(t / 2.0).astype(int) % len(progression)
+        freqs = progression[chord_index]
+        envelope = 0.6 + 0.4 * np.exp(-np.mod(t, 0.5) * 6.0)
+        return 0.2 * envelope * np.sin(2 * np.pi * freqs * t[:, None]).sum(axis=1)
+
+    # White noise, seeded per block start so the corpus is reproducible
+    rng = np.random.default_rng(start)
+    return 0.3 * rng.standard_normal(count)
+
+
+def build_corpus(corpus_dir: str, lengths: List[str], sr: int = SAMPLE_RATE) -> List[Dict]:
+    """Write the synthetic corpus as 16-bit WAV files, reusing files that exist."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    cases = []
+
+    for length_name in lengths:
+        seconds = CORPUS_LENGTHS[length_name]
+        for kind in CORPUS_KINDS:
+            name = f"{kind}_{length_name}"
+            path = os.path.join(corpus_dir, f"{name}_{seconds}s_{sr}hz.wav")
+            if not os.path.exists(path):
+                _write_wav(path, kind, seconds, sr)
+            cases.append({"name": name, "path": path, "duration": seconds})
+
+    return cases
+
+
+def _write_wav(path: str, kind: str, seconds: int, sr: int):
+    """Synthesize a signal in one-minute blocks so long files stay bounded in memory."""
+    total = seconds * sr
+    block = 60 * sr
+    tmp_path = f"{path}.tmp"
+
+    with wave.open(tmp_path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sr)
+        for start in range(0, total, block):
+            samples = _synthesize_block(kind, start, min(block, total - start), sr)
+            out.writeframes((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+
+    os.replace(tmp_path, path)
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in megabytes."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is kilobytes on Linux and bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def _run_case(path: str, repeat: int) -> Dict:
+    """Analyze one corpus file in a fresh process and report stage timings."""
+    from audio_analyzer import AudioAnalyzer
+    analyzer = AudioAnalyzer(use_cache=False)
+
+    # Warm up JIT-compiled librosa kernels so the first run is not penalized
+    warmup_path = f"{path}.warmup.wav"
+    _write_wav(warmup_path, "click", 5, SAMPLE_RATE)
+    try:
+        analyzer.analyze_audio_file(warmup_path, use_cache=False)
+    finally:
+        os.remove(warmup_path)
+
+    stages: Dict[str, float] = {}
+    for _ in range(repeat):
+        analysis = analyzer.analyze_audio_file(path, use_cache=False)
+        if analysis is None:
+            return {"error": "Analysis failed"}
+        for stage, seconds in analysis["stage_timings"].items():
+            stages[stage] = min(seconds, stages.get(stage, seconds))
+
+    return {
+        "streaming": analysis.get("streaming", False),
+        "tempo": analysis.get("tempo"),
+        "stages": stages,
+        "peak_rss_mb": round(_peak_rss_mb(), 1)
+    }
+
+
+def run_benchmark(corpus_dir: str, lengths: List[str], repeat: int = 3) -> Dict:
+    """Run every corpus case, each in its own process so peak RSS is per case."""
+    cases = build_corpus(corpus_dir, lengths)
+    results = {}
+
+    for case in cases:
+        print(f"Benchmarking {case['name']} ({case['duration']}s)...")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(_run_case, case["path"], repeat).result()
+        result["duration"] = case["duration"]
+        results[case["name"]] = result
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "cases": results
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """List stage timings and peak RSS that regressed by more than ``threshold``.
+
+    A case that now fails, or that the baseline has but this run lacks,
+    also counts as a regression.
+    """
+    regressions = []
+    baseline_cases = baseline.get("cases", {})
+
+    for name in baseline_cases:
+        if name not in current["cases"]:
+            regressions.append(f"{name}: missing (present in baseline)")
+
+    for name, case in current["cases"].items():
+        base = baseline_cases.get(name)
+        if "error" in case:
+            regressions.append(f"{name}: failed ({case['error']})")
+            continue
+        if not base or "stages" not in base:
+            continue
+
+        for stage, seconds in case["stages"].items():
+            before = base["stages"].get(stage)
+            if before is None or seconds - before < MIN_REGRESSION_SECONDS:
+                continue
+            if seconds > before * (1 + threshold):
+                regressions.append(
+                    f"{name}/{stage}: {before:.3f}s -> {seconds:.3f}s (+{(seconds / before - 1) * 100:.0f}%)"
+                )
+
+        before_rss = base.get("peak_rss_mb")
+        if before_rss and case["peak_rss_mb"] > before_rss * (1 + threshold):
+            regressions.append(
+                f"{name}/peak_rss: {before_rss:.0f}MB -> {case['peak_rss_mb']:.0f}MB"
+            )
+
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    """Current git commit, if run inside a checkout."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark AudioAnalyzer on a synthetic corpus.")
+    parser.add_argument("--out", default="audio_benchmark.json", help="JSON results file")
+    parser.add_argument("--corpus", default="./benchmark_corpus", help="Directory for the synthetic corpus")
+    parser.add_argument("--lengths", default="short,medium,long",
+                        help="Comma-separated corpus lengths: short (30s), medium (4min), long (60min)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed slowdown before failing, as a fraction (default 0.15)")
+    args = parser.parse_args()
+
+    lengths = [length.strip() for length in args.lengths.split(",") if length.strip()]
+    unknown = [length for length in lengths if length not in CORPUS_LENGTHS]
+    if unknown:
+        parser.error(f"Unknown lengths: {', '.join(unknown)}")
+
+    results = run_benchmark(args.corpus, lengths, max(1, args.repeat))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    failed = False
+    for name, case in results["cases"].items():
+        if "error" in case:
+            print(f"{name}: ERROR {case['error']}")
+            failed = True
+            continue
+        print(f"{name}: {case['stages']['total']:.3f}s total, {case['peak_rss_mb']:.0f}MB peak RSS")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"PERFORMANCE REGRESSION (threshold {args.threshold * 100:.0f}%):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Redemption Marketing - Audio Analysis Cache
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Persistent, content-addressed cache for audio analysis results.
+"""
+import os
+import io
+import json
+import time
+import hashlib
+import threading
+from typing import Optional, Dict, List
+import numpy as np
+
+
+ENERGY_LEVELS = ["low", "medium", "high"]
+
+
+class AnalysisCache:
+    """On-disk cache of audio analysis results keyed by file content.
+
+    Entries are keyed by the SHA-256 of the audio file plus the analyzer
+    version and analysis parameters, so editing a file or changing the
+    analyzer automatically misses. Results are stored as compressed NumPy
+    archives and evicted least-recently-used once the cache exceeds
+    ``max_size_mb``.
+
+    Several processes may share the directory (see audio_batch). Eviction
+    scans the entry files, so it does not depend on any one process's
+    index; the index only records access times and file hashes, and each
+    save merges with the copy on disk.
+    """
+
+    INDEX_FILE = "index.json"
+    # Bumped when the stored arrays change; entries from older formats miss
+    FORMAT_VERSION = "2"
+    MAX_HASHES = 5000
+
+    def __init__(self, cache_dir: str = "./analysis_cache", max_size_mb: float = 256):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._index: Optional[Dict] = None
+
+    def make_key(self, file_path: str, version: str, params: Dict) -> Optional[str]:
+        """Build the cache key for a file, analyzer version and parameters."""
+        content_hash = self._content_hash(file_path)
+        if not content_hash:
+            return None
+
+        param_text = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(
+            f"{content_hash}|{version}|{self.FORMAT_VERSION}|{param_text}".encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return cached features for a key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                features = self._decode(data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading analysis cache entry: {e}")
+            self._remove(key)
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            entry = index["entries"].get(key)
+            if entry is not None:
+                entry["last_access"] = time.time()
+                self._save_index()
+
+        return features
+
+    def put(self, key: str, analysis: Dict):
+        """Store the expensive analysis features for a key."""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **self._encode(analysis))
+        payload = buffer.getvalue()
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._entry_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing analysis cache entry: {e}")
+            return
+
+        with self._lock:
+            index = self._load_index()
+            index["entries"][key] = {"size": len(payload), "last_access": time.time()}
+            self._evict()
+            self._save_index()
+
+    def clear(self):
+        """Remove every cache entry."""
+        with self._lock:
+            index = self._load_index()
+            for key in list(index["entries"]):
+                self._delete_entry_file(key)
+            index["entries"].clear()
+            index["hashes"].clear()
+            self._save_index()
+
+    def get_size_bytes(self) -> int:
+        """Get the total size of cached entries."""
+        with self._lock:
+            return sum(entry["size"] for entry in self._load_index()["entries"].values())
+
+    def _content_hash(self, file_path: str) -> Optional[str]:
+        """Hash file contents, reusing the last hash while size and mtime are unchanged."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        path_key = os.path.abspath(file_path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        with self._lock:
+            known = self._load_index()["hashes"].get(path_key)
+        if known and known["signature"] == signature:
+            return known["sha256"]
+
+        digest = hashlib.sha256()
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        except OSError as e:
+            print(f"Error hashing audio file: {e}")
+            return None
+
+        content_hash = digest.hexdigest()
+        with self._lock:
+            self._load_index()["hashes"][path_key] = {
+                "signature": signature, "sha256": content_hash, "checked": time.time()
+            }
+            self._save_index()
+
+        return content_hash
+
+    def _encode(self, analysis: Dict) -> Dict[str, np.ndarray]:
+        """Pack analysis features into compact arrays."""
+        sections = analysis.get("energy_sections", [])
+        segments = analysis.get("structural_segments", [])
+
+        return {
+            # Tempo stays float64 so a hit matches a fresh analysis exactly
+            "tempo": np.array(analysis.get("tempo", 120.0), dtype=np.float64),
+            "key": np.array(analysis.get("key", "C Major")),
+            "beat_times": np.asarray(analysis.get("beat_times", []), dtype=np.float32),
+            "energy_bounds": np.array(
+                [[s["start_time"], s["end_time"]] for s in sections], dtype=np.float32
+            ).reshape(-1, 2),
+            "energy_levels": np.array(
+                [ENERGY_LEVELS.index(s["energy_level"]) for s in sections], dtype=np.uint8
+            ),
+            "energy_values": np.array([s["energy_value"] for s in sections], dtype=np.float32),
+            "segment_bounds": np.array(
+                [[s["start_time"], s["end_time"]] for s in segments], dtype=np.float32
+            ).reshape(-1, 2),
+            "segment_labels": np.array([s["label"] for s in segments], dtype=str)
+        }
+
+    def _decode(self, data) -> Dict:
+        """Unpack arrays written by _encode."""
+        energy_sections = [
+            {
+                "start_time": float(start),
+                "end_time": float(end),
+                "energy_level": ENERGY_LEVELS[int(level)],
+                "energy_value": float(value)
+            }
+            for (start, end), level, value in zip(
+                data["energy_bounds"], data["energy_levels"], data["energy_values"]
+            )
+        ]
+
+        structural_segments: List[Dict] = [
+            {
+                "label": str(label),
+                "start_time": float(start),
+                "end_time": float(end),
+                "duration": float(end - start)
+            }
+            for (start, end), label in zip(data["segment_bounds"], data["segment_labels"])
+        ]
+
+        return {
+            "tempo": float(data["tempo"]),
+            "key": str(data["key"]),
+            "beat_times": data["beat_times"].astype(float).tolist(),
+            "energy_sections": energy_sections,
+            "structural_segments": structural_segments
+        }
+
+    def _entry_path(self, key: str) -> str:
+        """Get the file path of a cache entry."""
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _remove(self, key: str):
+        """Drop a single entry from disk and the index."""
+        with self._lock:
+            self._delete_entry_file(key)
+            self._load_index()["entries"].pop(key, None)
+            self._save_index()
+
+    def _delete_entry_file(self, key: str):
+        """Delete an entry file, ignoring files that are already gone."""
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Evict least-recently-used entries until under the size limit.
+
+        Scans the entry files, so entries written by other processes count
+        toward the limit even if this process's index never saw them.
+        """
+        entries = self._index["entries"]
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for item in scan:
+                    if item.name.endswith(".npz") and item.is_file():
+                        stat = item.stat()
+                        key = item.name[:-4]
+                        last_access = entries.get(key, {}).get("last_access", stat.st_mtime)
+                        files.append((last_access, key, stat.st_size))
+        except OSError as e:
+            print(f"Error scanning analysis cache: {e}")
+            return
+
+        # Forget records of entries whose files are gone
+        present = {key for _, key, _ in files}
+        for key in [key for key in entries if key not in present]:
+            del entries[key]
+
+        total = sum(size for _, _, size in files)
+        for _, key, size in sorted(files):
+            if total <= self.max_size_bytes:
+                break
+            total -= size
+            self._delete_entry_file(key)
+            entries.pop(key, None)
+
+        self._prune_hashes()
+
+    def _prune_hashes(self):
+        """Drop hashes of deleted files and cap the rest, newest kept."""
+        hashes = self._index["hashes"]
+        for path_key in [path_key for path_key in hashes if not os.path.exists(path_key)]:
+            del hashes[path_key]
+        if len(hashes) > self.MAX_HASHES:
+            newest = sorted(hashes, key=lambda k: hashes[k].get("checked", 0), reverse=True)
+            for path_key in newest[self.MAX_HASHES:]:
+                del hashes[path_key]
+
+    def _load_index(self) -> Dict:
+        """Load the index from disk on first use."""
+        if self._index is None:
+            try:
+                with open(os.path.join(self.cache_dir, self.INDEX_FILE), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+            self._index.setdefault("entries", {})
+            self._index.setdefault("hashes", {})
+        return self._index
+
+    def _save_index(self):
+        """Merge with the index on disk and persist it atomically."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, self.INDEX_FILE)
+            self._merge_disk_index(path)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving analysis cache index: {e}")
+
+    def _merge_disk_index(self, path: str):
+        """Fold in records other processes saved, keeping the newer of each."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                disk = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        entries = self._index["entries"]
+        for key, record in disk.get("entries", {}).items():
+            if key in entries:
+                entries[key]["last_access"] = max(entries[key]["last_access"], record.get("last_access", 0))
+            elif os.path.exists(self._entry_path(key)):
+                # Skip records of entries this process has since evicted
+                entries[key] = record
+
+        hashes = self._index["hashes"]
+        for path_key, record in disk.get("hashes", {}).items():
+            if path_key not in hashes or record.get("checked", 0) > hashes[path_key].get("checked", 0):
+                hashes[path_key] = record
@@ -0,0 +1,191 @@
+"""
+Redemption Marketing - Decoded Audio Store
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Memory-mapped store of decoded PCM so each track is only decoded once.
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Optional, Dict
+import numpy as np
+import librosa
+
+
+class PCMStore:
+    """Decoded audio kept on disk as ``.npy`` files and opened with ``np.memmap``.
+
+    The first request for a file at a given sample rate decodes it and
+    writes float32 samples plus a small JSON header. Every later request
+    maps the file read-only, so analysis, waveform previews and rendering
+    share one decode without copying. Entries are keyed by path, size and
+    mtime, and the oldest are removed once the store exceeds ``max_size_mb``.
+    """
+
+    def __init__(self, store_dir: str = "./pcm_cache", max_size_mb: float = 2048):
+        self.store_dir = store_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def load(self, file_path: str, sample_rate: int, mono: bool = True) -> Optional[np.ndarray]:
+        """Return memory-mapped samples for a file, decoding it on first use."""
+        samples = self.open(file_path, sample_rate, mono)
+        if samples is not None:
+            return samples
+
+        try:
+            y, _ = librosa.load(file_path, sr=sample_rate, mono=mono)
+        except Exception as e:
+            print(f"Error decoding audio file: {e}")
+            return None
+
+        key = self._key(file_path, sample_rate, mono)
+        if key is None or not self._write(key, file_path, sample_rate, y):
+            return y
+        return self.open(file_path, sample_rate, mono)
+
+    def open(self, file_path: str, sample_rate: int, mono: bool = True) -> Optional[np.ndarray]:
+        """Map an existing entry read-only, or return None if it is not stored."""
+        key = self._key(file_path, sample_rate, mono)
+        if key is None:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            samples = np.load(path, mmap_mode="r")
+            os.utime(path)  # Mark as recently used for eviction
+            return samples
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error opening decoded audio: {e}")
+            self._delete_entry(key)
+            return None
+
+    def header(self, file_path: str, sample_rate: int, mono: bool = True) -> Optional[Dict]:
+        """Return the stored header (sample rate, channels, frames, source)."""
+        key = self._key(file_path, sample_rate, mono)
+        if key is None:
+            return None
+        try:
+            with open(self._header_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def waveform_peaks(self, file_path: str, sample_rate: int, bins: int = 1000) -> Optional[np.ndarray]:
+        """Min/max envelope of a track for waveform previews, shape (bins, 2)."""
+        samples = self.load(file_path, sample_rate, mono=True)
+        if samples is None or len(samples) == 0:
+            return None
+
+        bins = max(1, min(bins, len(samples)))
+        edges = np.linspace(0, len(samples), bins + 1).astype(int)[:-1]
+        return np.stack([
+            np.minimum.reduceat(samples, edges),
+            np.maximum.reduceat(samples, edges)
+        ], axis=1)
+
+    def clear(self):
+        """Remove every stored decode."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                self._remove_file(path)
+                self._remove_file(path[:-len(".npy")] + ".json")
+
+    def get_size_bytes(self) -> int:
+        """Get the total size of stored samples."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _key(self, file_path: str, sample_rate: int, mono: bool) -> Optional[str]:
+        """Build the entry key from path, file signature and decode settings."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        text = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{sample_rate}|{int(mono)}"
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _write(self, key: str, file_path: str, sample_rate: int, samples: np.ndarray) -> bool:
+        """Write samples and header atomically, then enforce the size limit."""
+        path = self._entry_path(key)
+        tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        header = {
+            "source": os.path.abspath(file_path),
+            "sample_rate": sample_rate,
+            "channels": 1 if samples.ndim == 1 else samples.shape[0],
+            "frames": samples.shape[-1],
+            "dtype": "float32"
+        }
+
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(path + tmp_suffix, "wb") as f:
+                np.save(f, samples.astype(np.float32, copy=False))
+            with open(self._header_path(key) + tmp_suffix, "w", encoding="utf-8") as f:
+                json.dump(header, f)
+            os.replace(self._header_path(key) + tmp_suffix, self._header_path(key))
+            os.replace(path + tmp_suffix, path)
+        except OSError as e:
+            print(f"Error writing decoded audio: {e}")
+            self._remove_file(path + tmp_suffix)
+            self._remove_file(self._header_path(key) + tmp_suffix)
+            return False
+
+        with self._lock:
+            self._evict(keep=path)
+        return True
+
+    def _evict(self, keep: str):
+        """Remove least-recently-used entries until under the size limit."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+
+        for path, size, _ in entries:
+            if total <= self.max_size_bytes:
+                break
+            if path == keep:
+                continue
+            total -= size
+            self._remove_file(path)
+            self._remove_file(path[:-len(".npy")] + ".json")
+
+    def _entries(self):
+        """List stored sample files as (path, size, mtime)."""
+        try:
+            names = os.listdir(self.store_dir)
+        except OSError:
+            return []
+
+        entries = []
+        for name in names:
+            if not name.endswith(".npy"):
+                continue
+            path = os.path.join(self.store_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _delete_entry(self, key: str):
+        """Drop one entry's samples and header."""
+        self._remove_file(self._entry_path(key))
+        self._remove_file(self._header_path(key))
+
+    def _remove_file(self, path: str):
+        """Delete a file, ignoring files that are already gone."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entry_path(self, key: str) -> str:
+        """Get the sample file path of an entry."""
+        return os.path.join(self.store_dir, f"{key}.npy")
+
+    def _header_path(self, key: str) -> str:
+        """Get the header file path of an entry."""
+        return os.path.join(self.store_dir, f"{key}.json")
@@ -0,0 +1,168 @@
+"""
+Redemption Marketing - Audio Metadata Probe
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Fast audio metadata probing from container headers without decoding samples.
+"""
+import os
+import threading
+from typing import Callable, Dict, Tuple
+from mutagen import File as MutagenFile
+from mutagen.mp3 import BitrateMode, MPEGInfo
+try:
+    import soundfile
+    SOUNDFILE_AVAILABLE = True
+except (ImportError, OSError):
+    SOUNDFILE_AVAILABLE = False
+
+
+def probe_audio(file_path: str, allow_decode: bool = True) -> Dict:
+    """Read duration, sample rate, channels and tags from file headers.
+
+    mutagen supplies tags and a duration for every supported container;
+    soundfile supplies an exact frame count for WAV/FLAC/OGG. A full decode
+    only happens when no header gives a plausible duration and
+    ``allow_decode`` is set. The ``source`` key reports which one was used.
+    """
+    info = {
+        "duration": 0.0,
+        "sample_rate": 0,
+        "channels": 0,
+        "bitrate": 0,
+        "title": "Unknown",
+        "artist": "Unknown",
+        "genre": "Unknown",
+        "source": "none"
+    }
+
+    mutagen_duration, estimated = _probe_mutagen(file_path, info)
+    soundfile_duration = _probe_soundfile(file_path, info)
+
+    if soundfile_duration > 0:
+        # Frame counts from uncompressed/lossless headers are exact
+        info["duration"] = soundfile_duration
+        info["source"] = "soundfile"
+    elif mutagen_duration > 0 and not estimated and _mutagen_duration_plausible(file_path, mutagen_duration, info):
+        info["duration"] = mutagen_duration
+        info["source"] = "mutagen"
+    elif allow_decode:
+        decoded = _probe_decode(file_path, info)
+        if decoded > 0:
+            info["duration"] = decoded
+            info["source"] = "decode"
+    elif mutagen_duration > 0:
+        info["duration"] = mutagen_duration
+        info["source"] = "mutagen"
+
+    return info
+
+
+def probe_audio_async(file_path: str, callback: Callable[[Dict], None],
+                      allow_decode: bool = True) -> threading.Thread:
+    """Probe a file on a background thread and pass the result to ``callback``.
+
+    The callback runs on the worker thread; Tk callers should re-post it
+    with ``widget.after``.
+    """
+    def worker():
+        try:
+            result = probe_audio(file_path, allow_decode=allow_decode)
+        except Exception as e:
+            result = {"duration": 0.0, "source": "none", "error": str(e)}
+        callback(result)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+
+def _probe_mutagen(file_path: str, info: Dict) -> Tuple[float, bool]:
+    """Fill tags and stream info from mutagen.
+
+    Returns its duration and whether that duration is only an estimate:
+    for an MP3 without a Xing/VBRI/LAME header mutagen divides the file
+    size by the first frame's bitrate, which is wrong for VBR files.
+    """
+    try:
+        audio_file = MutagenFile(file_path, easy=True)
+    except Exception as e:
+        print(f"Error reading audio tags: {e}")
+        return 0.0, False
+
+    if audio_file is None:
+        return 0.0, False
+
+    stream = getattr(audio_file, "info", None)
+    info["sample_rate"] = getattr(stream, "sample_rate", 0) or info["sample_rate"]
+    info["channels"] = getattr(stream, "channels", 0) or info["channels"]
+    info["bitrate"] = getattr(stream, "bitrate", 0) or 0
+
+    tags = audio_file.tags or {}
+    for field in ("title", "artist", "genre"):
+        try:
+            values = tags.get(field)
+        except Exception:
+            values = None
+        if values:
+            info[field] = str(values[0])
+
+    estimated = False
+    if isinstance(stream, MPEGInfo):
+        estimated = stream.sketchy or stream.bitrate_mode == BitrateMode.UNKNOWN
+    return float(getattr(stream, "length", 0) or 0), estimated
+
+
+def _probe_soundfile(file_path: str, info: Dict) -> float:
+    """Read frame count and format from libsndfile headers, if supported."""
+    if not SOUNDFILE_AVAILABLE:
+        return 0.0
+
+    try:
+        sf_info = soundfile.info(file_path)
+    except Exception:
+        return 0.0
+
+    info["sample_rate"] = sf_info.samplerate
+    info["channels"] = sf_info.channels
+    if sf_info.samplerate <= 0:
+        return 0.0
+    return sf_info.frames / float(sf_info.samplerate)
+
+
+def _mutagen_duration_plausible(file_path: str, duration: float, info: Dict) -> bool:
+    """Cross-check a header duration against the file size and bitrate.
+
+    Catches headers whose stored length disagrees with the data, such as
+    truncated files. Header-less MP3s are flagged by ``_probe_mutagen``
+    instead, since their length is derived from this same ratio.
+    """
+    bitrate = info.get("bitrate", 0)
+    if not bitrate:
+        return True
+
+    try:
+        file_size = os.path.getsize(file_path)
+    except OSError:
+        return True
+
+    expected_bytes = bitrate / 8.0 * duration
+    if expected_bytes <= 0:
+        return False
+
+    # Generous upper bound: embedded artwork inflates small files
+    ratio = file_size / expected_bytes
+    return 0.5 <= ratio <= 4.0
+
+
+def _probe_decode(file_path: str, info: Dict) -> float:
+    """Last resort: decode the file to measure its duration."""
+    try:
+        from pydub import AudioSegment
+        audio = AudioSegment.from_file(file_path)
+    except Exception as e:
+        print(f"Error decoding audio file: {e}")
+        return 0.0
+
+    info["sample_rate"] = info["sample_rate"] or audio.frame_rate
+    info["channels"] = info["channels"] or audio.channels
+    return len(audio) / 1000.0
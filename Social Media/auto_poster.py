@@ -4,26 +4,20 @@ Copyright (c) 2025 Redemption Road. All rights reserved.
 
 Automated social media posting with AI content generation.
 """
+import os
+import socket
 import threading
 import time
-try:
-    import schedule
-    SCHEDULE_AVAILABLE = True
-except ImportError:
-    SCHEDULE_AVAILABLE = False
-    print("Warning: schedule module not available. Auto-posting will use basic timing.")
-
 from datetime import datetime, timedelta
 from typing import List, Optional
 import json
 import base64
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from models import SocialAccount, AutoPostSettings, GeneratedContent, PostingSchedule, ContentSettings
-from opensource_api_service import OpenSourceAPIService
+from generation_router import create_default_router
+from inference_executor import PRIORITY_BACKGROUND
+from posting_queue import PostingQueue, PENDING
+from timer_scheduler import TimerScheduler
+from browser_pool import BrowserPool, browser_pool
 import logging
 
 # Configure logging
@@ -31,15 +25,35 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def job_due_at(job: PostingSchedule) -> float:
+    """Epoch time a queued job is scheduled for."""
+    return datetime.fromisoformat(job.scheduled_time).timestamp()
+
+
 class AutoPoster:
-    """Automated posting service for social media platforms."""
+    """Automated posting service for social media platforms.
+    
+    Upcoming posts are written to a durable job queue; worker threads
+    claim due jobs, so scheduled posts survive restarts and failed posts
+    are retried. Workers sleep until a timer for the next due job wakes
+    them rather than polling the queue.
+    """
     
-    def __init__(self, account_manager, content_manager):
+    def __init__(self, account_manager, content_manager, job_queue: Optional[PostingQueue] = None,
+                 workers: int = 1, browsers: Optional[BrowserPool] = None):
         self.account_manager = account_manager
         self.content_manager = content_manager
-        self.api_service = OpenSourceAPIService()
+        self.api_service = create_default_router()
+        self.job_queue = job_queue or PostingQueue()
+        self.browsers = browsers or browser_pool
+        self.workers = max(1, workers)
         self.is_running = False
-        self.scheduler_thread = None
+        self.timers = TimerScheduler(name="posting-timers")
+        self.worker_threads: List[threading.Thread] = []
+        # Released once per timer that fires; each release wakes one idle worker
+        self._work_ready = threading.Semaphore(0)
+        # Lease owner prefix; unique per process so other processes can share the queue
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
         
     def start_auto_posting(self):
         """Start the automated posting service."""
@@ -51,19 +65,31 @@ class AutoPoster:
         logger.info("Starting automated posting service...")
         
         # Schedule posts based on account settings
+        self.timers.start()
         self.schedule_auto_posts()
         
-        # Start scheduler thread
-        self.scheduler_thread = threading.Thread(target=self.run_scheduler, daemon=True)
-        self.scheduler_thread.start()
+        # Start posting workers
+        self.worker_threads = []
+        for index in range(self.workers):
+            worker = threading.Thread(
+                target=self.run_worker,
+                args=(f"{self.worker_prefix}:{index}",),
+                name=f"posting-worker-{index}",
+                daemon=True
+            )
+            self.worker_threads.append(worker)
+            worker.start()
         
         logger.info("Automated posting service started")
     
     def stop_auto_posting(self):
         """Stop the automated posting service."""
         self.is_running = False
-        if SCHEDULE_AVAILABLE:
-            schedule.clear()
+        self.timers.stop()
+        self.timers.clear()
+        for _ in self.worker_threads:
+            self._work_ready.release()
+        self.browsers.close_idle()
         logger.info("Automated posting service stopped")
     
     def schedule_auto_posts(self):
@@ -75,77 +101,129 @@ class AutoPoster:
             logger.info("AUTO mode not enabled")
             return
         
-        if not SCHEDULE_AVAILABLE:
-            logger.warning("Schedule module not available - using basic timing")
-            return
-        
+        scheduled = []
         for account in auto_accounts:
-            self.schedule_account_posts(account, settings)
-    
-    def schedule_account_posts(self, account: SocialAccount, settings: AutoPostSettings):
-        """Schedule posts for a specific account."""
-        logger.info(f"Scheduling posts for {account.platform}: @{account.username}")
+            scheduled.extend(self.schedule_account_posts(account, settings))
         
-        if not SCHEDULE_AVAILABLE:
-            logger.warning("Schedule module not available - using basic timing")
-            return
+        # Once the earliest slot passes, its next occurrence needs queueing
+        if scheduled:
+            self.timers.schedule("top-up", min(job_due_at(job) for job in scheduled) + 1, self.top_up_schedule)
         
-        # Schedule posts based on posting_hours
-        for post_time in settings.posting_hours[:settings.posts_per_day]:
-            schedule.every().day.at(post_time).do(
-                self.create_and_post_content, 
-                account, 
-                settings
-            )
-            logger.info(f"Scheduled daily post at {post_time} for {account.platform}")
+        # Jobs left from earlier runs (retries, expired leases) still need a wake-up
+        self.arm_next_due()
     
-    def run_scheduler(self):
-        """Run the scheduling loop."""
-        if not SCHEDULE_AVAILABLE:
-            logger.warning("Schedule module not available - running basic timer")
-            # Basic timer implementation
-            while self.is_running:
-                time.sleep(3600)  # Check every hour
-                # Basic time-based posting logic would go here
-            return
+    def schedule_account_posts(self, account: SocialAccount, settings: AutoPostSettings) -> List[PostingSchedule]:
+        """Queue the next posting slots for a specific account.
         
-        while self.is_running:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        Each slot has an idempotency key, so re-scheduling never duplicates it.
+        """
+        jobs = []
+        for post_time in self.account_manager.get_next_posting_times(account.platform):
+            job = self.job_queue.enqueue(account.platform, post_time)
+            if job.status == PENDING:
+                self.timers.schedule(job.id, job_due_at(job), self.wake_worker)
+            jobs.append(job)
+        return jobs
     
-    def create_and_post_content(self, account: SocialAccount, settings: AutoPostSettings):
-        """Create content and post to platform."""
+    def top_up_schedule(self):
+        """Queue the next posting slots (runs on the timer thread)."""
+        if not self.is_running:
+            return
         try:
-            logger.info(f"Creating content for {account.platform}: @{account.username}")
+            self.schedule_auto_posts()
+        except Exception as e:
+            logger.error(f"Error scheduling posts: {e}")
+    
+    def wake_worker(self):
+        """Wake one idle worker to claim due jobs."""
+        self._work_ready.release()
+    
+    def arm_next_due(self):
+        """Set a timer for the queue's next due job or lease expiry."""
+        due_at = self.job_queue.next_due_time()
+        if due_at is not None:
+            self.timers.schedule("next-due", due_at, self.wake_worker)
+    
+    def run_worker(self, worker_id: str):
+        """Claim and run due posting jobs until the service stops."""
+        while self.is_running:
+            try:
+                job = self.job_queue.claim(worker_id)
+                if job is None:
+                    # Nothing is due; sleep until the timer for the next due job fires
+                    self.arm_next_due()
+            except Exception as e:
+                logger.error(f"Error claiming posting job: {e}")
+                time.sleep(30)
+                continue
             
-            # Check if we can post now (interval limits)
-            if not self.account_manager.can_post_now(account.platform):
-                logger.info(f"Skipping post - too soon since last post for {account.platform}")
-                return
+            if job is None:
+                self._work_ready.acquire()
+                continue
             
-            # Generate content if auto-generation is enabled
+            self.timers.cancel(job.id)
+            self.process_job(job, worker_id)
+    
+    def process_job(self, job: PostingSchedule, worker_id: str):
+        """Create content if needed and post one claimed job."""
+        queue = self.job_queue
+        try:
+            # Content generation and posting can outlast a single lease
+            with queue.keep_lease(job.id, worker_id) as lease:
+                self._run_job(job, worker_id, lease)
+        except Exception as e:
+            logger.error(f"Error in auto posting for {job.platform}: {e}")
+            queue.fail(job.id, worker_id, str(e))
+    
+    def _run_job(self, job: PostingSchedule, worker_id: str, lease):
+        """Posting steps for one job, checking the lease between phases."""
+        queue = self.job_queue
+        account = self.account_manager.get_account_by_platform(job.platform)
+        settings = self.account_manager.auto_post_settings
+        if not account or not account.auto_signin_enabled:
+            queue.cancel(job.id, worker_id, "Account is no longer enabled for auto posting")
+            return
+        
+        logger.info(f"Creating content for {account.platform}: @{account.username}")
+        
+        # Check if we can post now (interval limits)
+        if not self.account_manager.can_post_now(account.platform):
+            logger.info(f"Skipping post - too soon since last post for {account.platform}")
+            queue.cancel(job.id, worker_id, "Skipped: too soon since last post")
+            return
+        
+        # A retried job posts the content chosen on its first attempt
+        content = job.content
+        if content is None:
             if settings.auto_content_generation:
                 content = self.generate_auto_content(account, settings)
-                if not content:
-                    logger.error(f"Failed to generate content for {account.platform}")
-                    return
             else:
                 # Use existing content from history
                 content = self.get_next_content_for_posting(account)
-                if not content:
-                    logger.info(f"No content available for posting to {account.platform}")
-                    return
-            
-            # Post content
-            success = self.post_to_platform(account, content, settings)
-            if success:
-                self.account_manager.update_last_post_time(account.platform)
-                logger.info(f"Successfully posted to {account.platform}: @{account.username}")
-            else:
-                logger.error(f"Failed to post to {account.platform}: @{account.username}")
-                
-        except Exception as e:
-            logger.error(f"Error in auto posting for {account.platform}: {e}")
+            if not lease.renew():
+                logger.warning(f"Lost lease on posting job {job.id}; another worker will retry it")
+                return
+            if not content:
+                logger.error(f"No content available for posting to {account.platform}")
+                queue.fail(job.id, worker_id, "No content available")
+                return
+            if not queue.attach_content(job.id, worker_id, content):
+                logger.warning(f"Lost lease on posting job {job.id}; another worker will retry it")
+                return
+        
+        # Past this point the post may go live; a crash will not repost it
+        if not lease.renew() or not queue.begin_post(job.id, worker_id):
+            logger.warning(f"Lost lease on posting job {job.id}; another worker will retry it")
+            return
+        
+        success = self.post_to_platform(account, content, settings)
+        if success:
+            queue.complete(job.id, worker_id)
+            self.account_manager.update_last_post_time(account.platform)
+            logger.info(f"Successfully posted to {account.platform}: @{account.username}")
+        else:
+            queue.fail(job.id, worker_id, f"Posting to {account.platform} failed")
+            logger.error(f"Failed to post to {account.platform}: @{account.username}")
     
     def generate_auto_content(self, account: SocialAccount, settings: AutoPostSettings) -> Optional[GeneratedContent]:
         """Generate content automatically based on account and settings."""
@@ -169,7 +247,9 @@ class AutoPoster:
             
             # Generate content using AI
             import asyncio
-            content = asyncio.run(self.api_service.generate_content(content_settings))
+            content = asyncio.run(
+                self.api_service.generate_content(content_settings, priority=PRIORITY_BACKGROUND)
+            )
             
             if content:
                 # Add to content manager
@@ -200,30 +280,27 @@ class AutoPoster:
                 logger.error(f"Failed to decrypt credentials for {account.platform}")
                 return False
             
-            # Initialize browser for posting
-            driver = self.setup_browser()
-            
-            # Platform-specific posting
-            if account.platform == "instagram":
-                return self.post_to_instagram(driver, credentials, content, settings)
-            elif account.platform == "twitter":
-                return self.post_to_twitter(driver, credentials, content, settings)
-            elif account.platform == "linkedin":
-                return self.post_to_linkedin(driver, credentials, content, settings)
-            elif account.platform == "facebook":
-                return self.post_to_facebook(driver, credentials, content, settings)
-            else:
+            if account.platform not in ("instagram", "twitter", "linkedin", "facebook"):
                 logger.error(f"Unsupported platform: {account.platform}")
                 return False
+            
+            # Reuse the account's warm browser; its profile keeps the login
+            with self.browsers.session(account.platform) as session:
+                driver = session.driver
+                
+                # Platform-specific posting
+                if account.platform == "instagram":
+                    return self.post_to_instagram(driver, credentials, content, settings)
+                elif account.platform == "twitter":
+                    return self.post_to_twitter(driver, credentials, content, settings)
+                elif account.platform == "linkedin":
+                    return self.post_to_linkedin(driver, credentials, content, settings)
+                else:
+                    return self.post_to_facebook(driver, credentials, content, settings)
                 
         except Exception as e:
             logger.error(f"Error posting to {account.platform}: {e}")
             return False
-        finally:
-            try:
-                driver.quit()
-            except:
-                pass
     
     def decrypt_credentials(self, encrypted_credentials: str) -> Optional[dict]:
         """Decrypt stored credentials."""
@@ -234,34 +311,26 @@ class AutoPoster:
             logger.error(f"Error decrypting credentials: {e}")
             return None
     
-    def setup_browser(self):
-        """Setup browser for automated posting."""
-        options = Options()
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        return webdriver.Chrome(options=options)
-    
     def post_to_instagram(self, driver, credentials: dict, content: GeneratedContent, settings: AutoPostSettings) -> bool:
         """Post to Instagram."""
         try:
+            from selenium.webdriver.common.by import By
+            
             driver.get("https://www.instagram.com/accounts/login/")
             time.sleep(3)
             
-            # Login
-            username_input = driver.find_element(By.NAME, "username")
-            password_input = driver.find_element(By.NAME, "password")
-            
-            username_input.send_keys(credentials["username"])
-            password_input.send_keys(credentials["password"])
-            
-            login_button = driver.find_element(By.XPATH, "//button[@type='submit']")
-            login_button.click()
-            
-            time.sleep(5)
+            # Login, unless the session's profile is still logged in
+            username_inputs = driver.find_elements(By.NAME, "username")
+            if username_inputs:
+                password_input = driver.find_element(By.NAME, "password")
+                
+                username_inputs[0].send_keys(credentials["username"])
+                password_input.send_keys(credentials["password"])
+                
+                login_button = driver.find_element(By.XPATH, "//button[@type='submit']")
+                login_button.click()
+                
+                time.sleep(5)
             
             # Navigate to create post
             driver.get("https://www.instagram.com/")
@@ -328,21 +397,22 @@ class AutoPoster:
             "is_running": self.is_running,
             "auto_accounts": len(self.account_manager.get_auto_signin_accounts()),
             "next_posts": self.get_next_scheduled_posts(),
+            "queue": self.job_queue.get_stats(),
+            "browsers": self.browsers.get_stats(),
             "settings": self.account_manager.auto_post_settings
         }
     
     def get_next_scheduled_posts(self) -> List[dict]:
         """Get information about next scheduled posts."""
-        # This would return scheduled post information
         posts = []
         
-        for account in self.account_manager.get_auto_signin_accounts():
-            next_times = self.account_manager.get_next_posting_times(account.platform)
-            for post_time in next_times:
-                posts.append({
-                    "platform": account.platform,
-                    "username": account.username,
-                    "scheduled_time": post_time
-                })
+        for job in self.job_queue.list_jobs(PENDING, limit=20):
+            account = self.account_manager.get_account_by_platform(job.platform)
+            posts.append({
+                "platform": job.platform,
+                "username": account.username if account else "",
+                "scheduled_time": job.scheduled_time,
+                "attempts": job.attempts
+            })
         
-        return sorted(posts, key=lambda x: x["scheduled_time"])
\ No newline at end of file
+        return sorted(posts, key=lambda x: x["scheduled_time"])
@@ -0,0 +1,304 @@
+"""
+Redemption Marketing - Browser Session Pool
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Warm, reusable browser sessions for posting and account discovery.
+"""
+import os
+import re
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+# Brave keeps the user's saved logins; Chrome is used when it is not installed
+BRAVE_PATHS = [
+    r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe",
+    r"C:\Program Files (x86)\BraveSoftware\Brave-Browser\Application\brave.exe",
+    r"C:\Users\{}\AppData\Local\BraveSoftware\Brave-Browser\Application\brave.exe".format(os.environ.get('USERNAME', ''))
+]
+
+
+def find_brave_binary() -> Optional[str]:
+    """Path of an installed Brave browser, if any."""
+    for path in BRAVE_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class BrowserSession:
+    """One live browser bound to a persistent profile directory."""
+
+    def __init__(self, key: str, driver, profile_dir: str):
+        self.key = key
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.in_use = False
+
+
+class BrowserPool:
+    """Keeps one warm browser per key (an account's platform), up to ``max_sessions`` at once.
+
+    Each key has its own profile directory under ``profile_root``, so
+    cookies and logins survive recycling and restarts. Before a session
+    is handed out it is health-checked; a dead browser, or one older
+    than ``max_age`` seconds or used ``max_uses`` times, is replaced.
+    When the pool is full the least recently used idle browser is closed;
+    if every browser is busy, callers wait. Browsers idle for longer than
+    ``idle_timeout`` seconds are closed on the next checkout.
+
+    Long interactive use, such as waiting on a manual login, should use
+    ``dedicated`` so it does not hold one of the pooled slots.
+    """
+
+    def __init__(self, profile_root: str = "./browser_profiles", max_sessions: int = 2,
+                 max_age: float = 3600, max_uses: int = 50, idle_timeout: float = 900,
+                 binary_location: Optional[str] = None):
+        self.profile_root = profile_root
+        self.max_sessions = max(1, max_sessions)
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.binary_location = binary_location
+        self._sessions: Dict[str, BrowserSession] = {}
+        # Keys whose browser is starting; a profile can only be opened once
+        self._launching: set = set()
+        # Keys whose profile is open in a dedicated browser
+        self._dedicated: set = set()
+        self._condition = threading.Condition()
+        self._stats = {"launches": 0, "reuses": 0, "recycled": 0, "unhealthy": 0, "waits": 0}
+
+    @contextmanager
+    def session(self, key: str, timeout: Optional[float] = None) -> Iterator[BrowserSession]:
+        """Check out the browser for ``key``, launching one if needed.
+
+        An exception inside the block closes the browser, since its page
+        state is unknown.
+        """
+        session = self._checkout(key, timeout)
+        healthy = False
+        try:
+            yield session
+            healthy = True
+        finally:
+            self._checkin(session, healthy)
+
+    @contextmanager
+    def dedicated(self, key: str) -> Iterator[BrowserSession]:
+        """A browser on the key's profile that is outside the pool and its cap.
+
+        Closes the key's pooled browser first, since a profile can only be
+        open once; pooled checkouts of the key wait until this one closes.
+        """
+        with self._condition:
+            while (key in self._dedicated or key in self._launching
+                   or (key in self._sessions and self._sessions[key].in_use)):
+                self._condition.wait()
+            self._dedicated.add(key)
+            pooled = self._sessions.pop(key, None)
+
+        try:
+            if pooled is not None:
+                self._quit(pooled)
+            profile_dir = self._profile_dir(key)
+            session = BrowserSession(key, self._start_driver(profile_dir), profile_dir)
+            session.in_use = True
+            try:
+                yield session
+            finally:
+                self._quit(session)
+        finally:
+            with self._condition:
+                self._dedicated.discard(key)
+                self._condition.notify_all()
+
+    def close_idle(self, max_idle: float = 0):
+        """Close browsers that have been idle for at least ``max_idle`` seconds."""
+        with self._condition:
+            stale = self._take_idle(max_idle)
+        for session in stale:
+            self._quit(session)
+
+    def close_all(self):
+        """Close every idle browser; busy ones close when checked back in."""
+        with self._condition:
+            stale = self._take_idle(0)
+            for session in self._sessions.values():
+                session.uses = self.max_uses
+        for session in stale:
+            self._quit(session)
+
+    def get_stats(self) -> Dict:
+        """Launch, reuse and recycle counters."""
+        with self._condition:
+            return dict(
+                self._stats,
+                open=len(self._sessions),
+                busy=sum(1 for session in self._sessions.values() if session.in_use)
+            )
+
+    def _checkout(self, key: str, timeout: Optional[float]) -> BrowserSession:
+        """Reserve the session for a key, making room within the cap."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        to_close: List[BrowserSession] = []
+        with self._condition:
+            to_close.extend(self._take_idle(self.idle_timeout))
+            while True:
+                session = self._sessions.get(key)
+                if session is not None:
+                    if not session.in_use:
+                        session.in_use = True
+                        break
+                elif key in self._launching or key in self._dedicated:
+                    pass
+                elif len(self._sessions) + len(self._launching) < self.max_sessions:
+                    self._launching.add(key)
+                    break
+                else:
+                    victim = self._least_recent_idle()
+                    if victim is not None:
+                        self._sessions.pop(victim.key, None)
+                        to_close.append(victim)
+                        continue
+
+                self._stats["waits"] += 1
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No browser session available for {key}")
+                self._condition.wait(remaining)
+
+        for stale in to_close:
+            self._quit(stale)
+
+        if session is None:
+            return self._launch_reserved(key)
+        if self._should_recycle(session):
+            return self._replace(session, "recycled")
+        if not self._is_healthy(session):
+            return self._replace(session, "unhealthy")
+
+        with self._condition:
+            self._stats["reuses"] += 1
+        return session
+
+    def _checkin(self, session: BrowserSession, healthy: bool):
+        """Return a session to the pool, closing it if it should not be reused."""
+        session.last_used = time.monotonic()
+        session.uses += 1
+        worn_out = session.uses >= self.max_uses
+        close = not healthy or worn_out
+        with self._condition:
+            session.in_use = False
+            if healthy and worn_out:
+                self._stats["recycled"] += 1
+            if close and self._sessions.get(session.key) is session:
+                self._sessions.pop(session.key, None)
+            self._condition.notify_all()
+        if close:
+            self._quit(session)
+
+    def _replace(self, session: BrowserSession, reason: str) -> BrowserSession:
+        """Close a checked-out session and launch a fresh one in its place."""
+        self._quit(session)
+        with self._condition:
+            self._stats[reason] += 1
+            if self._sessions.get(session.key) is session:
+                self._sessions.pop(session.key, None)
+            self._launching.add(session.key)
+        return self._launch_reserved(session.key)
+
+    def _launch_reserved(self, key: str) -> BrowserSession:
+        """Launch a browser for a key already reserved in ``_launching``."""
+        try:
+            return self._launch(key)
+        finally:
+            with self._condition:
+                self._launching.discard(key)
+                self._condition.notify_all()
+
+    def _launch(self, key: str) -> BrowserSession:
+        """Start a browser on the key's profile and register it as checked out."""
+        profile_dir = self._profile_dir(key)
+        driver = self._start_driver(profile_dir)
+
+        session = BrowserSession(key, driver, profile_dir)
+        session.in_use = True
+        with self._condition:
+            self._sessions[key] = session
+            self._stats["launches"] += 1
+        return session
+
+    def _profile_dir(self, key: str) -> str:
+        """Persistent profile directory for a key, created if missing."""
+        profile_dir = os.path.abspath(os.path.join(self.profile_root, re.sub(r"[^A-Za-z0-9_.-]", "_", key)))
+        os.makedirs(profile_dir, exist_ok=True)
+        return profile_dir
+
+    def _start_driver(self, profile_dir: str):
+        """Launch Brave or Chrome with a persistent profile."""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.add_argument(f"--user-data-dir={profile_dir}")
+        # Container workarounds only; these browsers stay logged in to real accounts
+        if os.environ.get("BROWSER_NO_SANDBOX") == "1":
+            options.add_argument("--no-sandbox")
+            options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+
+        binary = self.binary_location or find_brave_binary()
+        if binary:
+            options.binary_location = binary
+            try:
+                return webdriver.Chrome(options=options)
+            except Exception as e:
+                print(f"Error launching {binary}, using Chrome: {e}")
+                options.binary_location = ""
+        return webdriver.Chrome(options=options)
+
+    def _should_recycle(self, session: BrowserSession) -> bool:
+        """Whether a session is too old or too used to hand out again."""
+        return (time.monotonic() - session.created_at > self.max_age
+                or session.uses >= self.max_uses)
+
+    def _is_healthy(self, session: BrowserSession) -> bool:
+        """Whether the browser still answers and has an open window."""
+        try:
+            return bool(session.driver.window_handles)
+        except Exception:
+            return False
+
+    def _least_recent_idle(self) -> Optional[BrowserSession]:
+        """Idle session used longest ago (lock held)."""
+        idle = [session for session in self._sessions.values() if not session.in_use]
+        return min(idle, key=lambda session: session.last_used) if idle else None
+
+    def _take_idle(self, max_idle: float) -> List[BrowserSession]:
+        """Remove and return sessions idle for at least ``max_idle`` seconds (lock held)."""
+        now = time.monotonic()
+        stale = [session for session in self._sessions.values()
+                 if not session.in_use and now - session.last_used >= max_idle]
+        for session in stale:
+            self._sessions.pop(session.key, None)
+        if stale:
+            self._condition.notify_all()
+        return stale
+
+    def _quit(self, session: BrowserSession):
+        """Close a browser, ignoring one that already died."""
+        try:
+            session.driver.quit()
+        except Exception as e:
+            print(f"Error closing browser for {session.key}: {e}")
+
+
+# Shared by posting and account discovery so a login made in one is reused by the other
+browser_pool = BrowserPool()
@@ -0,0 +1,361 @@
+"""
+Redemption Marketing - Content Analytics Engine
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Local, deterministic analytics over the full content history.
+"""
+import re
+import zlib
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from models import GeneratedContent, AnalyticsData, VIDEO_CONTENT_TYPES, PLATFORMS
+
+# Hashed bag-of-words size for novelty scoring
+FEATURE_DIM = 256
+# Posts each new post is compared against for novelty
+NOVELTY_WINDOW = 500
+# Posts scored together when ingesting a large history
+INGEST_CHUNK = 512
+
+CATEGORICAL_FIELDS = ("platform", "tone", "content_type", "niche")
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_WORD = re.compile(r"\w+")
+_TOKEN_INDEX: Dict[str, int] = {}
+
+
+class _Column:
+    """Append-only float array that grows by doubling."""
+
+    def __init__(self):
+        self._data = np.zeros(1024, dtype=np.float64)
+        self._size = 0
+
+    def extend(self, values: np.ndarray):
+        """Append values."""
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, 2 * len(self._data)), dtype=np.float64)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    @property
+    def values(self) -> np.ndarray:
+        """View of the stored values."""
+        return self._data[:self._size]
+
+
+class ContentAnalyticsEngine:
+    """Aggregates content history into distributions and analytics.
+
+    Posts are ingested once, oldest first, and folded into running
+    counts: hashtag frequencies, platform/tone/type/niche distributions,
+    posting hour and weekday histograms. Each post also gets a novelty
+    score, one minus its highest cosine similarity to the previous
+    ``NOVELTY_WINDOW`` posts over hashed word features. ``sync`` only
+    processes posts added since the last call, so refreshing analytics
+    after a new post is cheap regardless of history size. Results depend
+    only on the history, never on wall-clock time or randomness.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def reset(self):
+        """Forget everything ingested so far."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        """Empty every aggregate (lock held)."""
+        self._count = 0
+        self._oldest: Optional[GeneratedContent] = None
+        self._vocab: Dict[str, Dict[str, int]] = {field: {} for field in CATEGORICAL_FIELDS}
+        self._counts: Dict[str, np.ndarray] = {field: np.zeros(0, dtype=np.int64) for field in CATEGORICAL_FIELDS}
+        self._novelty_by_type = np.zeros(0, dtype=np.float64)
+        self._hour_hist = np.zeros(24, dtype=np.int64)
+        self._weekday_hist = np.zeros(7, dtype=np.int64)
+        self._hashtags: Counter = Counter()
+        self._hashtag_total = 0
+        self._novelty = _Column()
+        self._times = _Column()
+        self._window = np.zeros((0, FEATURE_DIM), dtype=np.float32)
+
+    def sync(self, content_history: List[GeneratedContent]) -> int:
+        """Ingest posts added to a newest-first history; returns how many were new.
+
+        A history that shrank or was replaced is re-ingested from scratch.
+        """
+        with self._lock:
+            if len(content_history) < self._count or (self._count and content_history[-1] is not self._oldest):
+                self._clear()
+
+            new_items = content_history[:len(content_history) - self._count]
+            if not new_items:
+                return 0
+            # History is newest first; ingest in posting order
+            self._ingest(list(reversed(new_items)))
+            self._oldest = content_history[-1]
+            return len(new_items)
+
+    def snapshot(self) -> Dict:
+        """Current aggregates as plain Python values."""
+        with self._lock:
+            novelty = self._novelty.values
+            times = self._times.values
+            valid_times = times[~np.isnan(times)]
+
+            recent_posts = 0
+            if len(valid_times):
+                # Relative to the newest post, so results do not depend on today's date
+                recent_posts = int((valid_times >= valid_times.max() - 30 * 86400).sum())
+
+            type_counts = self._counts["content_type"]
+            type_novelty = np.divide(
+                self._novelty_by_type, type_counts,
+                out=np.zeros(len(type_counts)), where=type_counts > 0
+            )
+
+            return {
+                "total_posts": self._count,
+                "platforms": self._distribution("platform"),
+                "tones": self._distribution("tone"),
+                "content_types": self._distribution("content_type"),
+                "niches": self._distribution("niche"),
+                "hour_histogram": self._hour_hist.tolist(),
+                "weekday_histogram": self._weekday_hist.tolist(),
+                "top_hashtags": self._hashtags.most_common(10),
+                "unique_hashtags": len(self._hashtags),
+                "hashtags_per_post": self._hashtag_total / self._count if self._count else 0.0,
+                "posts_last_30_days": recent_posts,
+                "novelty_mean": float(novelty.mean()) if len(novelty) else 0.0,
+                "novelty_recent": float(novelty[-20:].mean()) if len(novelty) else 0.0,
+                "novelty_by_type": {
+                    name: round(float(type_novelty[code]), 3)
+                    for name, code in self._vocab["content_type"].items()
+                }
+            }
+
+    def to_analytics(self) -> Optional[AnalyticsData]:
+        """Summarize the aggregates as AnalyticsData, or None with no posts."""
+        stats = self.snapshot()
+        total = stats["total_posts"]
+        if not total:
+            return None
+
+        top_platform, platform_count = _top(stats["platforms"])
+        top_tone, tone_count = _top(stats["tones"])
+        top_type, type_count = _top(stats["content_types"])
+        hours = np.array(stats["hour_histogram"])
+        weekdays = np.array(stats["weekday_histogram"])
+        video_posts = sum(count for name, count in stats["content_types"].items() if name in VIDEO_CONTENT_TYPES)
+
+        cadence = min(1.0, stats["posts_last_30_days"] / 12)
+        diversity = min(1.0, 2 * stats["unique_hashtags"] / max(1, stats["hashtags_per_post"] * total))
+        platform_mix = min(1.0, len(stats["platforms"]) / 3)
+        growth_score = int(round(100 * (
+            0.35 * cadence + 0.35 * stats["novelty_recent"] + 0.15 * diversity + 0.15 * platform_mix
+        )))
+
+        content_patterns = (
+            f"Across {total} posts, {_pct(tone_count, total)} use a {top_tone} tone, "
+            f"{_pct(platform_count, total)} target {top_platform} and "
+            f"{_pct(type_count, total)} are {top_type.replace('_', ' ')} content. "
+            f"Average novelty is {stats['novelty_mean']:.2f} (recent: {stats['novelty_recent']:.2f})."
+        )
+
+        by_novelty = sorted(stats["novelty_by_type"].items(), key=lambda item: (-item[1], item[0]))
+        top_performers = "Most distinctive content types: " + ", ".join(
+            f"{name.replace('_', ' ')} ({score:.2f})" for name, score in by_novelty[:3]
+        ) + "."
+
+        if hours.sum():
+            peak_hours = [int(hour) for hour in np.argsort(-hours, kind="stable")[:3] if hours[hour]]
+            peak_day = WEEKDAYS[int(np.argmax(weekdays))]
+            posting_strategy = (
+                f"You post most at {', '.join(f'{hour:02d}:00' for hour in peak_hours)}, "
+                f"most often on {peak_day}s, with {stats['posts_last_30_days']} posts "
+                f"in the 30 days up to your latest post."
+            )
+        else:
+            posting_strategy = "No post timestamps recorded yet."
+
+        if stats["top_hashtags"]:
+            hashtag_insights = (
+                f"Top hashtags: " + ", ".join(f"{tag} ({count})" for tag, count in stats["top_hashtags"][:5]) +
+                f". {stats['unique_hashtags']} unique hashtags, "
+                f"{stats['hashtags_per_post']:.1f} per post on average."
+            )
+        else:
+            hashtag_insights = "No hashtags used yet."
+
+        audience_engagement = (
+            f"Platform mix: " + ", ".join(
+                f"{name} {_pct(count, total)}" for name, count in _ranked(stats["platforms"])
+            ) + ". Tone mix: " + ", ".join(
+                f"{name} {_pct(count, total)}" for name, count in _ranked(stats["tones"])
+            ) + "."
+        )
+
+        recommendations = []
+        if cadence < 0.5:
+            recommendations.append(
+                f"Post more consistently: {stats['posts_last_30_days']} posts in the last 30 days; aim for 3-4 per week"
+            )
+        if stats["novelty_recent"] < 0.4:
+            recommendations.append("Recent posts repeat earlier wording; vary hooks and angles")
+        if tone_count / total > 0.6:
+            recommendations.append(f"Experiment beyond the {top_tone} tone ({_pct(tone_count, total)} of posts)")
+        unused = [platform for platform in PLATFORMS if platform not in stats["platforms"]]
+        if len(stats["platforms"]) < 3 and unused:
+            recommendations.append(f"Cross-post to {', '.join(unused[:2])} to reach new audiences")
+        if stats["hashtags_per_post"] < 3:
+            recommendations.append("Use 5-10 relevant hashtags per post for discoverability")
+        elif stats["hashtags_per_post"] > 15:
+            recommendations.append("Trim hashtags to the 10-15 most relevant per post")
+        if video_posts / total < 0.2:
+            recommendations.append("Include more video content")
+        if not recommendations:
+            recommendations.append("Keep your current posting mix and cadence")
+
+        return AnalyticsData(
+            growth_score=max(1, min(100, growth_score)),
+            content_patterns=content_patterns,
+            top_performers=top_performers,
+            posting_strategy=posting_strategy,
+            hashtag_insights=hashtag_insights,
+            audience_engagement=audience_engagement,
+            recommendations=recommendations
+        )
+
+    def _ingest(self, items: List[GeneratedContent]):
+        """Fold posts, oldest first, into the running aggregates (lock held)."""
+        for start in range(0, len(items), INGEST_CHUNK):
+            chunk = items[start:start + INGEST_CHUNK]
+
+            codes = {
+                field: np.array([self._code(field, getattr(item, field) or "unknown") for item in chunk])
+                for field in CATEGORICAL_FIELDS
+            }
+            for field in CATEGORICAL_FIELDS:
+                size = len(self._vocab[field])
+                counts = np.zeros(size, dtype=np.int64)
+                counts[:len(self._counts[field])] = self._counts[field]
+                self._counts[field] = counts + np.bincount(codes[field], minlength=size)
+
+            times = np.array([_epoch(item.timestamp) for item in chunk])
+            valid = times[~np.isnan(times)]
+            if len(valid):
+                moments = valid.astype("datetime64[s]")
+                hours = (moments - moments.astype("datetime64[D]")).astype(np.int64) // 3600
+                # 1970-01-01 was a Thursday
+                weekdays = (moments.astype("datetime64[D]").astype(np.int64) + 3) % 7
+                self._hour_hist += np.bincount(hours, minlength=24)
+                self._weekday_hist += np.bincount(weekdays, minlength=7)
+            self._times.extend(times)
+
+            for item in chunk:
+                tags = [tag.lower() for tag in (item.hashtags or []) if tag]
+                self._hashtags.update(tags)
+                self._hashtag_total += len(tags)
+
+            novelty = self._score_novelty(_feature_matrix(chunk))
+            self._novelty.extend(novelty)
+            type_size = len(self._vocab["content_type"])
+            novelty_by_type = np.zeros(type_size)
+            novelty_by_type[:len(self._novelty_by_type)] = self._novelty_by_type
+            self._novelty_by_type = novelty_by_type + np.bincount(
+                codes["content_type"], weights=novelty, minlength=type_size
+            )
+
+            self._count += len(chunk)
+
+    def _score_novelty(self, features: np.ndarray) -> np.ndarray:
+        """Novelty of each row against the preceding window, then slide the window."""
+        previous = len(self._window)
+        stacked = np.vstack([self._window, features])
+        similarity = features @ stacked.T
+
+        # Row j may only compare with the NOVELTY_WINDOW posts before it
+        rows = previous + np.arange(len(features))[:, None]
+        columns = np.arange(len(stacked))[None, :]
+        similarity[(columns >= rows) | (columns < rows - NOVELTY_WINDOW)] = 0.0
+
+        self._window = stacked[-NOVELTY_WINDOW:]
+        return np.clip(1.0 - similarity.max(axis=1, initial=0.0), 0.0, 1.0).astype(np.float64)
+
+    def _code(self, field: str, value: str) -> int:
+        """Integer code for a categorical value, assigned on first sight."""
+        vocab = self._vocab[field]
+        value = value.lower()
+        if value not in vocab:
+            vocab[value] = len(vocab)
+        return vocab[value]
+
+    def _distribution(self, field: str) -> Dict[str, int]:
+        """Counts per value of a categorical field (lock held)."""
+        counts = self._counts[field]
+        return {name: int(counts[code]) for name, code in self._vocab[field].items() if counts[code]}
+
+
+def _feature_matrix(items: List[GeneratedContent]) -> np.ndarray:
+    """Unit-length hashed word counts of each post's hook, caption and hashtags."""
+    rows, columns = [], []
+    for row, item in enumerate(items):
+        text = " ".join([item.hook or "", item.caption or "", " ".join(item.hashtags or [])]).lower()
+        indices = [_token_index(word) for word in _WORD.findall(text)]
+        rows.extend([row] * len(indices))
+        columns.extend(indices)
+
+    cells = np.array(rows, dtype=np.intp) * FEATURE_DIM + np.array(columns, dtype=np.intp)
+    matrix = np.bincount(cells, minlength=len(items) * FEATURE_DIM).astype(np.float32)
+    matrix = matrix.reshape(len(items), FEATURE_DIM)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+
+def _token_index(word: str) -> int:
+    """Feature column of a word, memoized."""
+    index = _TOKEN_INDEX.get(word)
+    if index is None:
+        # crc32 rather than hash(), which is salted per process
+        index = zlib.crc32(word.encode("utf-8")) % FEATURE_DIM
+        if len(_TOKEN_INDEX) < 100000:
+            _TOKEN_INDEX[word] = index
+    return index
+
+
+def _epoch(timestamp: str) -> float:
+    """Wall-clock seconds since 1970 for an ISO timestamp, or NaN if unparseable."""
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return float("nan")
+    # Bucket by the hour as written, ignoring any UTC offset
+    return (moment.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds()
+
+
+def _ranked(distribution: Dict[str, int]) -> List[tuple]:
+    """Values by descending count, ties by name."""
+    return sorted(distribution.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _top(distribution: Dict[str, int]) -> tuple:
+    """Most common value and its count."""
+    ranked = _ranked(distribution)
+    return ranked[0] if ranked else ("unknown", 0)
+
+
+def _pct(count: int, total: int) -> str:
+    """Percentage string."""
+    return f"{round(100 * count / total)}%" if total else "0%"
+
+
+# Shared so repeated analyses only process newly added posts
+analytics_engine = ContentAnalyticsEngine()
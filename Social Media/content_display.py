@@ -5,7 +5,7 @@ Copyright (c) 2025 Redemption Road. All rights reserved.
 Content display widget for showing generated social media content.
 """
 import customtkinter as ctk
-from typing import Optional
+from typing import Optional, Dict
 from models import GeneratedContent
 from utils import copy_to_clipboard, format_hashtags, create_color_scheme
 
@@ -18,6 +18,7 @@ class ContentDisplay(ctk.CTkFrame):
         
         self.colors = create_color_scheme()
         self.content: Optional[GeneratedContent] = None
+        self._partial_widgets: Optional[Dict] = None  # Widgets updated while streaming
         
         self.setup_ui()
     
@@ -45,6 +46,7 @@ class ContentDisplay(ctk.CTkFrame):
     def show_empty_state(self):
         """Show empty state when no content is generated."""
         # Clear existing content
+        self._partial_widgets = None
         for widget in self.content_frame.winfo_children():
             widget.destroy()
         
@@ -70,11 +72,103 @@ class ContentDisplay(ctk.CTkFrame):
             text_color=self.colors['text_secondary']
         ).pack()
     
+    def update_partial(self, fields: Dict):
+        """Show hook, caption and hashtags while content is still being generated."""
+        if self._partial_widgets is None:
+            self._build_partial_view()
+        
+        widgets = self._partial_widgets
+        widgets["hook"].configure(text=fields.get("hook", "") or "...")
+        
+        caption = fields.get("caption", "")
+        if caption != widgets["caption_text"]:
+            widgets["caption_text"] = caption
+            widgets["caption"].configure(state="normal")
+            widgets["caption"].delete("0.0", "end")
+            widgets["caption"].insert("0.0", caption)
+            widgets["caption"].configure(state="disabled")
+        
+        hashtags = fields.get("hashtags", [])
+        if isinstance(hashtags, list):
+            widgets["hashtags"].configure(text=format_hashtags(hashtags))
+    
+    def _build_partial_view(self):
+        """Create the lightweight layout updated by update_partial."""
+        for widget in self.content_frame.winfo_children():
+            widget.destroy()
+        
+        ctk.CTkLabel(
+            self.content_frame,
+            text="✍️ Writing...",
+            font=ctk.CTkFont(size=10, weight="bold"),
+            text_color=self.colors['text_secondary']
+        ).pack(anchor="w", padx=10, pady=(5, 0))
+        
+        hook_frame = ctk.CTkFrame(self.content_frame, fg_color=self.colors['warning'])
+        hook_frame.pack(fill="x", padx=5, pady=5)
+        ctk.CTkLabel(
+            hook_frame,
+            text="ENGAGEMENT HOOK",
+            font=ctk.CTkFont(size=10, weight="bold"),
+            text_color=self.colors['bg_primary']
+        ).pack(anchor="w", padx=10, pady=(10, 5))
+        hook_label = ctk.CTkLabel(
+            hook_frame,
+            text="...",
+            font=ctk.CTkFont(weight="bold"),
+            text_color=self.colors['text_accent'],
+            wraplength=400,
+            justify="left"
+        )
+        hook_label.pack(anchor="w", padx=10, pady=(0, 10))
+        
+        caption_frame = ctk.CTkFrame(self.content_frame, fg_color=self.colors['bg_primary'])
+        caption_frame.pack(fill="x", padx=5, pady=5)
+        ctk.CTkLabel(
+            caption_frame,
+            text="FULL CAPTION",
+            font=ctk.CTkFont(size=10, weight="bold"),
+            text_color=self.colors['text_secondary']
+        ).pack(anchor="w", padx=10, pady=(10, 5))
+        caption_box = ctk.CTkTextbox(
+            caption_frame,
+            height=120,
+            fg_color=self.colors['bg_secondary'],
+            text_color=self.colors['text_accent']
+        )
+        caption_box.pack(fill="x", padx=10, pady=(0, 10))
+        caption_box.configure(state="disabled")
+        
+        hashtag_frame = ctk.CTkFrame(self.content_frame, fg_color=self.colors['warning'])
+        hashtag_frame.pack(fill="x", padx=5, pady=5)
+        ctk.CTkLabel(
+            hashtag_frame,
+            text="# HASHTAGS",
+            font=ctk.CTkFont(size=10, weight="bold"),
+            text_color="#ea580c"  # Orange
+        ).pack(anchor="w", padx=10, pady=(10, 5))
+        hashtag_label = ctk.CTkLabel(
+            hashtag_frame,
+            text="",
+            text_color=self.colors['text_accent'],
+            wraplength=400,
+            justify="left"
+        )
+        hashtag_label.pack(anchor="w", padx=10, pady=(0, 10))
+        
+        self._partial_widgets = {
+            "hook": hook_label,
+            "caption": caption_box,
+            "caption_text": "",
+            "hashtags": hashtag_label
+        }
+    
     def update_content(self, content: GeneratedContent):
         """Update display with new content."""
         self.content = content
         
         # Clear existing content
+        self._partial_widgets = None
         for widget in self.content_frame.winfo_children():
             widget.destroy()
         
@@ -20,6 +20,7 @@ class ContentSettingsForm(ctk.CTkFrame):
         self.on_generate = on_generate
         self.colors = create_color_scheme()
         self.settings = ContentSettings()
+        self._audio_probe_token = 0
         
         self.setup_ui()
     
@@ -341,33 +342,44 @@ class ContentSettingsForm(ctk.CTkFrame):
     def _clear_audio_file(self):
         """Clear selected audio file."""
         self.settings.audio_file_path = ""
+        self._audio_probe_token += 1  # Drop any probe still in flight
         self.audio_info_label.configure(text="No audio file selected")
         self.auto_duration_checkbox.deselect()
         self.settings.auto_duration = False
     
     def _update_audio_info(self, file_path: str):
         """Update audio file information display."""
+        from audio_probe import probe_audio_async
+        import os
+        
+        filename = os.path.basename(file_path)
+        self._audio_probe_token += 1
+        token = self._audio_probe_token
+        self.audio_info_label.configure(text=f"📁 {filename}\n⏱️ Duration: reading...")
+        
+        # Probe headers off the UI thread and post the result back
+        probe_audio_async(
+            file_path,
+            lambda info: self.after(0, self._on_audio_probed, token, filename, info)
+        )
+    
+    def _on_audio_probed(self, token: int, filename: str, info: dict):
+        """Show probed audio info (ignores results for a superseded file)."""
+        if token != self._audio_probe_token:
+            return
+        
         try:
-            from audio_analyzer import AudioAnalyzer
-            analyzer = AudioAnalyzer()
-            
-            # Quick analysis for display
-            import os
-            filename = os.path.basename(file_path)
-            
-            # Try to get duration
-            try:
-                from pydub import AudioSegment
-                audio = AudioSegment.from_file(file_path)
-                duration = len(audio) / 1000.0  # Convert to seconds
+            duration = info.get("duration", 0)
+            if duration > 0:
                 minutes = int(duration // 60)
                 seconds = int(duration % 60)
                 duration_text = f"{minutes}:{seconds:02d}"
-            except:
+            else:
                 duration_text = "Unknown"
-                duration = 0
             
             info_text = f"📁 {filename}\n⏱️ Duration: {duration_text}"
+            if info.get("sample_rate"):
+                info_text += f"\n🎚️ {info['sample_rate']} Hz, {info.get('channels', 0)} ch"
             self.audio_info_label.configure(text=info_text)
             
             # Auto-update duration if checkbox is checked
@@ -6,19 +6,34 @@ CPU optimization and performance utilities for video generation.
 """
 import psutil
 import multiprocessing
-import threading
 import os
-from typing import Optional
-import torch
+from typing import Callable, Dict, Optional
+from system_monitor import SystemMonitor, system_monitor
+
+
+def _torch():
+    """Import torch on first use; it takes seconds to load."""
+    import torch
+    return torch
 
 
 class CPUOptimizer:
-    """Optimizes CPU usage for video generation and AI processing."""
+    """Optimizes CPU usage for video generation and AI processing.
+    
+    Load readings come from the shared system monitor's cached samples,
+    so none of these methods probe or block.
+    """
     
-    def __init__(self):
+    def __init__(self, monitor: Optional[SystemMonitor] = None):
+        self.monitor = monitor or system_monitor
         self.cpu_count = multiprocessing.cpu_count()
         self.optimal_threads = self._calculate_optimal_threads()
-        self.process_priority = self._get_optimal_priority()
+        self._gpu_info: Optional[Dict] = None
+    
+    @property
+    def process_priority(self) -> str:
+        """Optimal process priority for the current system load."""
+        return self._get_optimal_priority()
         
     def _calculate_optimal_threads(self) -> int:
         """Calculate optimal number of threads for video processing."""
@@ -28,8 +43,10 @@ class CPUOptimizer:
     
     def _get_optimal_priority(self) -> str:
         """Get optimal process priority based on system load."""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory_percent = psutil.virtual_memory().percent
+        cpu_percent = self.monitor.cpu_percent()
+        memory_percent = self.monitor.memory_percent()
+        if cpu_percent is None or memory_percent is None:
+            return "normal"
         
         if cpu_percent < 30 and memory_percent < 70:
             return "high"
@@ -38,15 +55,23 @@ class CPUOptimizer:
         else:
             return "below_normal"
     
+    def is_idle(self, cpu_threshold: float = 30, memory_threshold: float = 80) -> bool:
+        """Check whether there is spare capacity for background work."""
+        cpu_percent = self.monitor.cpu_percent()
+        memory_percent = self.monitor.memory_percent()
+        if cpu_percent is None or memory_percent is None:
+            return False  # No reading yet; assume busy
+        return cpu_percent < cpu_threshold and memory_percent < memory_threshold
+    
     def optimize_process_priority(self):
         """Set optimal process priority for video generation."""
         try:
-            import psutil
             current_process = psutil.Process()
+            priority = self.process_priority
             
-            if self.process_priority == "high":
+            if priority == "high":
                 current_process.nice(psutil.HIGH_PRIORITY_CLASS if os.name == 'nt' else -10)
-            elif self.process_priority == "below_normal":
+            elif priority == "below_normal":
                 current_process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if os.name == 'nt' else 10)
             
         except Exception as e:
@@ -54,6 +79,7 @@ class CPUOptimizer:
     
     def configure_torch_settings(self):
         """Configure PyTorch for optimal performance."""
+        torch = _torch()
         if torch.cuda.is_available():
             # Use GPU if available
             torch.backends.cudnn.benchmark = True
@@ -65,34 +91,48 @@ class CPUOptimizer:
     
     def get_system_info(self) -> dict:
         """Get system performance information."""
+        load = self.monitor.smoothed()
+        latest = self.monitor.latest()
         return {
             "cpu_count": self.cpu_count,
             "optimal_threads": self.optimal_threads,
-            "cpu_percent": psutil.cpu_percent(),
-            "memory_percent": psutil.virtual_memory().percent,
-            "available_memory_gb": round(psutil.virtual_memory().available / (1024**3), 2),
-            "gpu_available": torch.cuda.is_available(),
-            "gpu_count": torch.cuda.device_count() if torch.cuda.is_available() else 0
+            "cpu_percent": round(load.get("cpu_percent", 0.0), 1),
+            "memory_percent": round(load.get("memory_percent", 0.0), 1),
+            "available_memory_gb": round(latest.available_memory_bytes / (1024**3), 2) if latest else 0.0,
+            **self._get_gpu_info()
         }
     
-    def monitor_performance(self, callback=None):
-        """Monitor system performance during video generation."""
-        def monitor():
-            while True:
-                stats = {
-                    "cpu": psutil.cpu_percent(interval=5),
-                    "memory": psutil.virtual_memory().percent,
-                    "disk_io": psutil.disk_io_counters()._asdict() if psutil.disk_io_counters() else {}
-                }
-                
-                if callback:
-                    callback(stats)
-                
-                threading.Event().wait(5)  # Wait 5 seconds
+    def _get_gpu_info(self) -> Dict:
+        """GPU availability, detected once."""
+        if self._gpu_info is None:
+            torch = _torch()
+            available = torch.cuda.is_available()
+            self._gpu_info = {
+                "gpu_available": available,
+                "gpu_count": torch.cuda.device_count() if available else 0
+            }
+        return self._gpu_info
+    
+    def monitor_performance(self, callback=None) -> Callable[[], None]:
+        """Monitor system performance during video generation.
         
-        monitor_thread = threading.Thread(target=monitor, daemon=True)
-        monitor_thread.start()
-        return monitor_thread
+        ``callback`` receives smoothed readings after every sample. Returns
+        a function that stops the callbacks.
+        """
+        def on_sample(load: Dict):
+            if callback:
+                callback({
+                    "cpu": load["cpu_percent"],
+                    "memory": load["memory_percent"],
+                    "disk_io": {
+                        "read_bytes_per_sec": load["disk_read_bps"],
+                        "write_bytes_per_sec": load["disk_write_bps"]
+                    }
+                })
+        
+        self.monitor.add_callback(on_sample)
+        self.monitor.start()
+        return lambda: self.monitor.remove_callback(on_sample)
 
 
 class VideoRenderOptimizer:
@@ -100,7 +140,14 @@ class VideoRenderOptimizer:
     
     def __init__(self, cpu_optimizer: CPUOptimizer):
         self.cpu_optimizer = cpu_optimizer
-        self.render_settings = self._get_optimal_render_settings()
+        self._render_settings: Optional[dict] = None
+    
+    @property
+    def render_settings(self) -> dict:
+        """Render settings, chosen on first use."""
+        if self._render_settings is None:
+            self._render_settings = self._get_optimal_render_settings()
+        return self._render_settings
     
     def _get_optimal_render_settings(self) -> dict:
         """Get optimal rendering settings based on system capabilities."""
@@ -0,0 +1,174 @@
+"""
+Redemption Marketing - Generation Cache
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Memoization of generated content keyed by normalized content settings.
+"""
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Optional, Dict, Any
+from models import ContentSettings
+
+
+# Settings that do not change the generated text
+_IGNORED_FIELDS = {"audio_file_path", "auto_duration"}
+
+
+def _normalize(value: Any) -> Any:
+    """Case- and whitespace-insensitive form of a settings value."""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def settings_fingerprint(settings: ContentSettings, namespace: str = "",
+                         extra: Optional[Dict] = None) -> str:
+    """Stable hash of the settings that affect generated content.
+
+    Keywords are compared as a set, so order and separators do not matter.
+    ``namespace`` separates backends; ``extra`` adds request options.
+    """
+    fields = {
+        key: _normalize(value)
+        for key, value in asdict(settings).items()
+        if key not in _IGNORED_FIELDS
+    }
+    fields["keywords"] = sorted({
+        word for word in fields["keywords"].replace(",", " ").split() if word
+    })
+
+    payload = json.dumps(
+        {"namespace": namespace, "settings": fields, "extra": extra or {}},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """LRU cache of generated content with expiry and an optional disk tier.
+
+    Values are JSON-serializable dicts of generated fields. Entries expire
+    after ``ttl_seconds``; the in-memory tier holds at most ``max_entries``.
+    With ``cache_dir`` set, entries are also written to disk so repeated
+    runs across restarts are served without regenerating.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 6 * 3600,
+                 cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a copy of a cached value, or None on a miss or expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        if entry is not None and entry[0] <= now:
+            self.invalidate(key)
+            entry = None
+
+        with self._lock:
+            if entry is not None:
+                self._store(key, entry)
+                self._stats["disk_hits"] += 1
+                return copy.deepcopy(entry[1])
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Dict):
+        """Cache a generated value."""
+        entry = (time.time() + self.ttl_seconds, copy.deepcopy(value))
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def invalidate(self, key: str):
+        """Drop one entry from both tiers."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.cache_dir:
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def get_stats(self) -> Dict:
+        """Get hit, miss and eviction counts."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+    def _store(self, key: str, entry: tuple):
+        """Insert into the memory tier and evict past the size limit (lock held)."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        """Load an entry from the disk tier."""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["expires_at"], data["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, entry: tuple):
+        """Persist an entry to the disk tier atomically."""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._entry_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": entry[0], "value": entry[1]}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing generation cache entry: {e}")
+
+    def _entry_path(self, key: str) -> str:
+        """Get the disk path of an entry."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+
+# Shared by every service instance in the process
+generation_cache = GenerationCache(cache_dir="./generation_cache")
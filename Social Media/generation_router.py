@@ -0,0 +1,403 @@
+"""
+Redemption Marketing - Generation Backend Router
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Common interface for content generation backends and a router that
+picks between them by observed latency, error rate and availability.
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+from models import GeneratedContent, AnalyticsData, ContentSettings
+from inference_executor import PRIORITY_INTERACTIVE
+
+
+@runtime_checkable
+class GenerationBackend(Protocol):
+    """What the UI and auto poster need from a generation service.
+
+    ``OpenSourceAPIService``, ``APIService`` and ``MockAPIService`` all
+    satisfy it. Backends may also provide ``stream_content``.
+    """
+
+    async def generate_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                               request_key: Optional[str] = None,
+                               force_fresh: bool = False) -> Optional[GeneratedContent]:
+        ...
+
+    async def analyze_content(self, content_history: list, priority: int = PRIORITY_INTERACTIVE,
+                              request_key: Optional[str] = None) -> Optional[AnalyticsData]:
+        ...
+
+
+class LazyBackend:
+    """Builds a backend on first use so its imports stay off the startup path.
+
+    A failed build is retried after ``retry_after`` seconds; until then
+    calls fail fast so the router moves on to the next backend.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], GenerationBackend], retry_after: float = 60.0):
+        self.name = name
+        self.factory = factory
+        self.retry_after = retry_after
+        self._backend: Optional[GenerationBackend] = None
+        self._error: Optional[Exception] = None
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> GenerationBackend:
+        """Return the backend, building it if needed."""
+        with self._lock:
+            if self._backend is None:
+                if self._error is not None and time.monotonic() - self._failed_at < self.retry_after:
+                    raise self._error
+                start = time.perf_counter()
+                try:
+                    self._backend = self.factory()
+                    self._error = None
+                except Exception as e:
+                    self._error, self._failed_at = e, time.monotonic()
+                    raise
+                print(f"Loaded {self.name} backend in {time.perf_counter() - start:.1f}s")
+            return self._backend
+
+    def warm_up(self):
+        """Build the backend now, e.g. from a background thread after startup."""
+        try:
+            self.get()
+        except Exception as e:
+            print(f"{self.name} backend unavailable: {e}")
+
+    async def generate_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                               request_key: Optional[str] = None,
+                               force_fresh: bool = False) -> Optional[GeneratedContent]:
+        """Generate content on the underlying backend."""
+        backend = await self._load()
+        return await backend.generate_content(
+            settings, priority=priority, request_key=request_key, force_fresh=force_fresh
+        )
+
+    async def analyze_content(self, content_history: list, priority: int = PRIORITY_INTERACTIVE,
+                              request_key: Optional[str] = None) -> Optional[AnalyticsData]:
+        """Analyze content on the underlying backend."""
+        backend = await self._load()
+        return await backend.analyze_content(content_history, priority=priority, request_key=request_key)
+
+    async def stream_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                             request_key: Optional[str] = None,
+                             force_fresh: bool = False) -> AsyncIterator[Dict]:
+        """Stream from the underlying backend, or yield one final event if it cannot stream."""
+        backend = await self._load()
+        if hasattr(backend, "stream_content"):
+            async for event in backend.stream_content(
+                settings, priority=priority, request_key=request_key, force_fresh=force_fresh
+            ):
+                yield event
+        else:
+            content = await backend.generate_content(
+                settings, priority=priority, request_key=request_key, force_fresh=force_fresh
+            )
+            yield {"fields": {}, "done": True, "content": content}
+
+    async def _load(self) -> GenerationBackend:
+        """Build the backend off the event loop."""
+        if self._backend is not None:
+            return self._backend
+        return await asyncio.get_running_loop().run_in_executor(None, self.get)
+
+
+class _BackendStats:
+    """Rolling latency and outcome window for one backend."""
+
+    def __init__(self, window: int):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.unavailable_until = 0.0
+        self.requests = 0
+        self.wins = 0
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile over the window, or None without samples."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        """Share of failed calls in the window."""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class BackendRouter:
+    """Routes each request to the backend expected to answer fastest.
+
+    Backends are ranked by p95 latency inflated by their error rate;
+    backends without enough samples keep their configured order and use
+    ``hedge_after`` as their estimate. A backend that fails
+    ``max_failures`` times in a row is skipped for ``cooldown`` seconds.
+
+    If the chosen backend fails, the next one is tried immediately. If it
+    has not answered after its hedge deadline (its p95, at least
+    ``hedge_after`` seconds), the next backend is started alongside it and
+    the first usable result wins. Late losers are left to finish in their
+    own executors but their results are discarded.
+    """
+
+    def __init__(self, backends: List[Tuple[str, GenerationBackend]], hedge_after: float = 8.0,
+                 timeout: float = 120.0, max_failures: int = 3, cooldown: float = 60.0,
+                 window: int = 50, min_samples: int = 5):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends: Dict[str, GenerationBackend] = dict(backends)
+        self.order = [name for name, _ in backends]
+        self.hedge_after = hedge_after
+        self.timeout = timeout
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self._stats = {name: _BackendStats(window) for name in self.order}
+        self._lock = threading.Lock()
+        self._counters = {"hedged": 0, "fallbacks": 0, "exhausted": 0}
+
+    async def generate_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                               request_key: Optional[str] = None,
+                               force_fresh: bool = False) -> Optional[GeneratedContent]:
+        """Generate content on the best available backend."""
+        return await self._route(
+            lambda backend, key: backend.generate_content(
+                settings, priority=priority, request_key=key, force_fresh=force_fresh
+            ),
+            request_key
+        )
+
+    async def analyze_content(self, content_history: list, priority: int = PRIORITY_INTERACTIVE,
+                              request_key: Optional[str] = None) -> Optional[AnalyticsData]:
+        """Analyze content history on the best available backend."""
+        if not content_history:
+            return None
+        return await self._route(
+            lambda backend, key: backend.analyze_content(content_history, priority=priority, request_key=key),
+            request_key
+        )
+
+    async def stream_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                             request_key: Optional[str] = None,
+                             force_fresh: bool = False) -> AsyncIterator[Dict]:
+        """Stream from the best backend that can stream.
+
+        Partial fields cannot be merged across backends, so streams are not
+        hedged. If the stream ends without content, the remaining backends
+        are tried through ``generate_content`` routing.
+        """
+        ranked = [name for name in self.ranked_backends()
+                  if hasattr(self.backends[name], "stream_content")]
+        if not ranked:
+            content = await self.generate_content(settings, priority, request_key, force_fresh)
+            yield {"fields": {}, "done": True, "content": content}
+            return
+
+        name = ranked[0]
+        start = time.monotonic()
+        final = None
+        try:
+            async for event in self.backends[name].stream_content(
+                settings, priority=priority, request_key=self._backend_key(request_key, name),
+                force_fresh=force_fresh
+            ):
+                if event["done"]:
+                    final = event
+                    break
+                yield event
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error streaming from {name} backend: {e}")
+
+        succeeded = final is not None and final.get("content") is not None
+        self._record(name, time.monotonic() - start, succeeded)
+        if succeeded:
+            yield final
+            return
+
+        with self._lock:
+            self._counters["fallbacks"] += 1
+        content = await self._route(
+            lambda backend, key: backend.generate_content(
+                settings, priority=priority, request_key=key, force_fresh=force_fresh
+            ),
+            request_key,
+            exclude={name}
+        )
+        yield {"fields": final["fields"] if final else {}, "done": True, "content": content}
+
+    def warm_up(self):
+        """Build lazily constructed backends ahead of the first request."""
+        for backend in self.backends.values():
+            if hasattr(backend, "warm_up"):
+                backend.warm_up()
+
+    def ranked_backends(self) -> List[str]:
+        """Available backends, best first; unavailable ones go last."""
+        now = time.monotonic()
+        with self._lock:
+            def rank(name: str):
+                stats = self._stats[name]
+                unavailable = stats.unavailable_until > now
+                if len(stats.latencies) < self.min_samples:
+                    estimate = self.hedge_after
+                else:
+                    estimate = stats.percentile(95) * (1 + 4 * stats.error_rate)
+                return (unavailable, estimate)
+
+            # sorted() is stable, so ties keep the configured order
+            return sorted(self.order, key=rank)
+
+    def get_stats(self) -> Dict:
+        """Get per-backend latency, error and availability metrics."""
+        now = time.monotonic()
+        with self._lock:
+            backends = {}
+            for name in self.order:
+                stats = self._stats[name]
+                backends[name] = {
+                    "requests": stats.requests,
+                    "wins": stats.wins,
+                    "latency_p50": stats.percentile(50),
+                    "latency_p95": stats.percentile(95),
+                    "error_rate": stats.error_rate,
+                    "available": stats.unavailable_until <= now
+                }
+            return dict(self._counters, backends=backends)
+
+    async def _route(self, call, request_key: Optional[str], exclude: Optional[set] = None) -> Any:
+        """Run ``call`` on ranked backends with fallback and hedging."""
+        candidates = [name for name in self.ranked_backends() if name not in (exclude or set())]
+        tasks: Dict[asyncio.Task, Tuple[str, float]] = {}
+
+        def launch(name: str):
+            task = asyncio.ensure_future(call(self.backends[name], self._backend_key(request_key, name)))
+            tasks[task] = (name, time.monotonic())
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            while candidates or tasks:
+                if not tasks:
+                    launch(candidates.pop(0))
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait_for = remaining
+                if candidates:
+                    # Hedge once the newest attempt passes its expected latency
+                    newest_name, newest_start = max(tasks.values(), key=lambda item: item[1])
+                    hedge_at = newest_start + self._hedge_delay(newest_name)
+                    wait_for = max(0.0, min(remaining, hedge_at - time.monotonic()))
+
+                done, _ = await asyncio.wait(tasks, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if candidates and time.monotonic() < deadline:
+                        with self._lock:
+                            self._counters["hedged"] += 1
+                        launch(candidates.pop(0))
+                    continue
+
+                for task in done:
+                    name, started = tasks.pop(task)
+                    result = None
+                    try:
+                        result = task.result()
+                    except asyncio.CancelledError:
+                        # Superseded by a newer request with the same key
+                        raise
+                    except Exception as e:
+                        print(f"Error from {name} backend: {e}")
+
+                    self._record(name, time.monotonic() - started, result is not None)
+                    if result is not None:
+                        with self._lock:
+                            self._stats[name].wins += 1
+                            # A hedge loser took at least this long; keep it as a latency sample
+                            for loser, loser_started in tasks.values():
+                                self._stats[loser].latencies.append(time.monotonic() - loser_started)
+                        return result
+                    if candidates:
+                        with self._lock:
+                            self._counters["fallbacks"] += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        with self._lock:
+            self._counters["exhausted"] += 1
+        return None
+
+    def _hedge_delay(self, name: str) -> float:
+        """Seconds to wait on a backend before starting the next one."""
+        with self._lock:
+            stats = self._stats[name]
+            if len(stats.latencies) < self.min_samples:
+                return self.hedge_after
+            return max(self.hedge_after, stats.percentile(95))
+
+    def _record(self, name: str, latency: float, succeeded: bool):
+        """Record one call's outcome and update availability."""
+        with self._lock:
+            stats = self._stats[name]
+            stats.requests += 1
+            stats.outcomes.append(succeeded)
+            if succeeded:
+                stats.latencies.append(latency)
+                stats.consecutive_failures = 0
+            else:
+                stats.consecutive_failures += 1
+                if stats.consecutive_failures >= self.max_failures:
+                    stats.unavailable_until = time.monotonic() + self.cooldown
+                    stats.consecutive_failures = 0
+
+    def _backend_key(self, request_key: Optional[str], name: str) -> Optional[str]:
+        """Per-backend supersede key so a hedge never cancels its own primary."""
+        return f"{request_key}:{name}" if request_key else None
+
+
+def replicate_configured() -> bool:
+    """Whether a Replicate API token is set (in the environment or .env)."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    return bool(os.getenv("Replicate"))
+
+
+def create_default_router() -> BackendRouter:
+    """Local models first, with Replicate as fallback and hedge when configured.
+
+    Backends are built on first use (or by ``warm_up``), so creating the
+    router does not import torch, transformers or librosa. With Replicate
+    available, the local backend reports a missing or failed model as a
+    failure so the router falls back; otherwise it serves templates.
+    """
+    use_replicate = replicate_configured()
+
+    def local():
+        from opensource_api_service import OpenSourceAPIService
+        return OpenSourceAPIService(template_fallback=not use_replicate)
+
+    def replicate():
+        from api_service import APIService
+        return APIService()
+
+    backends = [("local", LazyBackend("local", local))]
+    if use_replicate:
+        backends.append(("replicate", LazyBackend("replicate", replicate)))
+    return BackendRouter(backends)
@@ -0,0 +1,237 @@
+"""
+Redemption Marketing - Inference Executor
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Bounded, prioritized worker pool for AI inference requests.
+"""
+import heapq
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+
+# Lower values run first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class _Request:
+    """One queued call and its bookkeeping."""
+
+    def __init__(self, fn: Callable, args: tuple, priority: int, key: Optional[str]):
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.key = key
+        self.future: Future = Future()
+        self.submitted = time.monotonic()
+
+
+class InferenceExecutor:
+    """Runs inference calls on a fixed number of worker threads.
+
+    Requests are served in priority order (interactive before background
+    auto-posting), first-come within a priority. Submitting a request with
+    the same ``key`` as one still queued cancels the older request, so
+    repeated clicks only run the latest. A request that is already running
+    is left to finish. Workers start on first use.
+    """
+
+    def __init__(self, max_workers: int = 1, name: str = "inference"):
+        self.max_workers = max(1, max_workers)
+        self.name = name
+        self._queue: List = []
+        self._queued_by_key: Dict[str, _Request] = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._running = 0
+        self._shutdown = False
+        self._metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "superseded": 0,
+            "max_queue_depth": 0,
+            "total_wait": 0.0,
+            "total_run": 0.0
+        }
+
+    def submit(self, fn: Callable, *args, priority: int = PRIORITY_INTERACTIVE,
+               key: Optional[str] = None) -> Future:
+        """Queue a call and return a future for its result."""
+        request = _Request(fn, args, priority, key)
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError(f"{self.name} executor is shut down")
+
+            if key is not None:
+                previous = self._queued_by_key.pop(key, None)
+                if previous is not None and previous.future.cancel():
+                    self._metrics["superseded"] += 1
+                self._queued_by_key[key] = request
+
+            heapq.heappush(self._queue, (priority, next(self._counter), request))
+            self._metrics["submitted"] += 1
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], len(self._queue))
+            self._start_workers()
+            self._condition.notify()
+
+        return request.future
+
+    async def run(self, fn: Callable, *args, priority: int = PRIORITY_INTERACTIVE,
+                  key: Optional[str] = None) -> Any:
+        """Await a queued call from async code.
+
+        Raises ``asyncio.CancelledError`` if the request is superseded.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, priority=priority, key=key))
+
+    async def stream(self, fn: Callable, *args, priority: int = PRIORITY_INTERACTIVE,
+                     key: Optional[str] = None) -> AsyncIterator:
+        """Run a generator function on the pool and yield its items as they arrive.
+
+        The worker stops at the next item once the consumer stops iterating.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        end = object()
+
+        def post(item, error=None) -> bool:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+                return True
+            except RuntimeError:
+                return False  # Consumer's event loop is closed
+
+        def produce():
+            try:
+                for item in fn(*args):
+                    if stop.is_set() or not post(item):
+                        return
+            except BaseException as e:
+                post(end, e)
+                return
+            post(end)
+
+        future = self.submit(produce, priority=priority, key=key)
+        future.add_done_callback(lambda done: done.cancelled() and post(end, asyncio.CancelledError()))
+
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is end:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    def cancel(self, key: str) -> bool:
+        """Cancel the queued request with ``key``, if it has not started."""
+        with self._condition:
+            request = self._queued_by_key.pop(key, None)
+            if request is not None and request.future.cancel():
+                self._metrics["cancelled"] += 1
+                return True
+        return False
+
+    def get_metrics(self) -> Dict:
+        """Get queue depth, throughput and wait-time metrics."""
+        with self._condition:
+            pending = [entry[2] for entry in self._queue if not entry[2].future.cancelled()]
+            finished = self._metrics["completed"] + self._metrics["failed"]
+            by_priority: Dict[int, int] = {}
+            for request in pending:
+                by_priority[request.priority] = by_priority.get(request.priority, 0) + 1
+
+            return {
+                "queue_depth": len(pending),
+                "queue_depth_by_priority": by_priority,
+                "running": self._running,
+                "workers": self.max_workers,
+                "submitted": self._metrics["submitted"],
+                "completed": self._metrics["completed"],
+                "failed": self._metrics["failed"],
+                "cancelled": self._metrics["cancelled"],
+                "superseded": self._metrics["superseded"],
+                "max_queue_depth": self._metrics["max_queue_depth"],
+                "avg_wait_seconds": self._metrics["total_wait"] / finished if finished else 0.0,
+                "avg_run_seconds": self._metrics["total_run"] / finished if finished else 0.0
+            }
+
+    def shutdown(self, cancel_pending: bool = True):
+        """Stop the workers, optionally cancelling requests still queued."""
+        with self._condition:
+            self._shutdown = True
+            if cancel_pending:
+                for _, _, request in self._queue:
+                    if request.future.cancel():
+                        self._metrics["cancelled"] += 1
+                self._queue.clear()
+                self._queued_by_key.clear()
+            self._condition.notify_all()
+
+    def _start_workers(self):
+        """Start worker threads up to the pool size (caller holds the lock)."""
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"{self.name}-{len(self._workers)}",
+                daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_request(self) -> Optional[_Request]:
+        """Block until a runnable request is available, or None on shutdown."""
+        with self._condition:
+            while True:
+                while self._queue:
+                    _, _, request = heapq.heappop(self._queue)
+                    if request.key is not None and self._queued_by_key.get(request.key) is request:
+                        del self._queued_by_key[request.key]
+                    # Skips requests that were cancelled while queued
+                    if request.future.set_running_or_notify_cancel():
+                        self._running += 1
+                        return request
+                if self._shutdown:
+                    return None
+                self._condition.wait()
+
+    def _worker_loop(self):
+        """Run queued requests until shutdown."""
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+
+            start = time.monotonic()
+            try:
+                result = request.fn(*request.args)
+            except BaseException as e:
+                request.future.set_exception(e)
+                outcome = "failed"
+            else:
+                request.future.set_result(result)
+                outcome = "completed"
+
+            with self._condition:
+                self._running -= 1
+                self._metrics[outcome] += 1
+                self._metrics["total_wait"] += start - request.submitted
+                self._metrics["total_run"] += time.monotonic() - start
+
+
+# Local model inference shares the torch thread pool, so one job at a time
+inference_executor = InferenceExecutor(max_workers=1, name="inference")
+
+# Remote API calls are network-bound and can overlap
+remote_executor = InferenceExecutor(max_workers=4, name="remote-inference")
@@ -5,9 +5,13 @@ Copyright (c) 2025 Redemption Road. All rights reserved.
 This software is licensed under strict commercial terms.
 See LICENSE file for full terms and conditions.
 """
+# Imported first so startup phase timings cover every import below
+from startup_profile import startup_timer
 import customtkinter as ctk
+import os
 import asyncio
 import threading
+import time
 from typing import Optional
 
 from models import ContentManager, GeneratedContent, AnalyticsData
@@ -17,9 +21,15 @@ from analytics_display import AnalyticsDisplay
 from history_display import HistoryDisplay
 from video_library import VideoLibraryTab
 from social_accounts import SocialAccountTab
-from opensource_api_service import OpenSourceAPIService
+from generation_router import create_default_router
+from content_analytics import analytics_engine
+from speculative_generator import SpeculativeGenerator
 from utils import create_color_scheme, StatusManager
 from cpu_optimizer import CPUOptimizer
+from system_monitor import system_monitor
+from browser_pool import browser_pool
+
+startup_timer.mark("imports")
 
 
 class RedemptionMarketing:
@@ -29,8 +39,18 @@ class RedemptionMarketing:
         # Initialize managers
         self.content_manager = ContentManager()
         self.status_manager = StatusManager()
-        self.api_service = OpenSourceAPIService()
         self.cpu_optimizer = CPUOptimizer()
+        system_monitor.start()
+        self.api_service = create_default_router()
+        
+        # Opt-in: pre-generate likely next requests while the machine is idle
+        if os.getenv("SPECULATIVE_GENERATION", "").lower() in ("1", "true", "yes"):
+            # Speculate on the local backend only so guesses never hedge to paid Replicate
+            self.api_service = SpeculativeGenerator(
+                self.api_service,
+                self.cpu_optimizer.is_idle,
+                speculation_backend=self.api_service.backends["local"]
+            )
         self.colors = create_color_scheme()
         
         # Setup UI
@@ -39,6 +59,23 @@ class RedemptionMarketing:
         
         # Status callbacks
         self.status_manager.add_callback(self.on_status_change)
+        startup_timer.mark("window built")
+        
+        # Load AI backends in the background once the window is on screen
+        self.root.after(200, self._start_warm_up)
+    
+    def _start_warm_up(self):
+        """Build the AI backends on a background thread."""
+        startup_timer.mark("window shown")
+        
+        def warm_up():
+            self.api_service.warm_up()
+            startup_timer.mark("backends warmed up")
+            startup_timer.print_report()
+        
+        thread = threading.Thread(target=warm_up, name="warm-up")
+        thread.daemon = True
+        thread.start()
     
     def setup_window(self):
         """Setup the main window."""
@@ -112,8 +149,8 @@ class RedemptionMarketing:
         perf_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
         perf_frame.pack(side="right")
         
-        cpu_info = self.cpu_optimizer.get_system_info()
-        perf_text = f"🖥️ {cpu_info['cpu_count']} cores | 🎯 {cpu_info['optimal_threads']} threads"
+        # Core counts only; get_system_info() would import torch during startup
+        perf_text = f"🖥️ {self.cpu_optimizer.cpu_count} cores | 🎯 {self.cpu_optimizer.optimal_threads} threads"
         
         ctk.CTkLabel(
             perf_frame,
@@ -311,11 +348,27 @@ class RedemptionMarketing:
     async def _generate_content_async(self, settings):
         """Async content generation."""
         try:
-            content = await self.api_service.generate_content(settings)
+            # A newer click supersedes this request while it is still queued
+            if hasattr(self.api_service, "stream_content"):
+                content = None
+                last_update = 0.0
+                async for event in self.api_service.stream_content(settings, request_key="ui-generate"):
+                    if event["done"]:
+                        content = event["content"]
+                        break
+                    # Throttle partial renders to keep the Tk event loop responsive
+                    now = time.monotonic()
+                    if now - last_update >= 0.1:
+                        last_update = now
+                        self.root.after(0, self.content_display.update_partial, event["fields"])
+            else:
+                content = await self.api_service.generate_content(settings, request_key="ui-generate")
             
             # Update UI in main thread
             self.root.after(0, self._on_content_generated, content)
             
+        except asyncio.CancelledError:
+            pass  # The newer request will update the UI
         except Exception as e:
             print(f"Error generating content: {e}")
             self.root.after(0, self._on_generation_error, str(e))
@@ -328,6 +381,10 @@ class RedemptionMarketing:
             self.content_manager.add_content(content)
             self.content_display.update_content(content)
             self.update_history_tab_count()
+            
+            # Fold the new post into the local aggregates so the next analysis
+            # is incremental; the analytics shown stay the backend's until then
+            analytics_engine.sync(self.content_manager.content_history)
         else:
             print("Failed to generate content")
     
@@ -356,12 +413,15 @@ class RedemptionMarketing:
         """Async content analysis."""
         try:
             analytics = await self.api_service.analyze_content(
-                self.content_manager.content_history
+                self.content_manager.content_history,
+                request_key="ui-analyze"
             )
             
             # Update UI in main thread
             self.root.after(0, self._on_analytics_generated, analytics)
             
+        except asyncio.CancelledError:
+            pass  # The newer request will update the UI
         except Exception as e:
             print(f"Error analyzing content: {e}")
             self.root.after(0, self._on_analysis_error, str(e))
@@ -402,7 +462,11 @@ class RedemptionMarketing:
     
     def run(self):
         """Start the application."""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            system_monitor.stop()
+            browser_pool.close_all()
 
 
 def main():
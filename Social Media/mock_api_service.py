@@ -14,7 +14,9 @@ class MockAPIService:
     def __init__(self):
         self.demo_mode = True
     
-    async def generate_content(self, settings: ContentSettings) -> Optional[GeneratedContent]:
+    async def generate_content(self, settings: ContentSettings, priority: int = 0,
+                               request_key: Optional[str] = None,
+                               force_fresh: bool = False) -> Optional[GeneratedContent]:
         """Generate mock content for demo purposes."""
         # Simulate API delay
         await asyncio.sleep(2)
@@ -42,7 +44,8 @@ class MockAPIService:
         
         return content
     
-    async def analyze_content(self, content_history: list) -> Optional[AnalyticsData]:
+    async def analyze_content(self, content_history: list, priority: int = 0,
+                              request_key: Optional[str] = None) -> Optional[AnalyticsData]:
         """Generate mock analytics for demo purposes."""
         if not content_history:
             return None
@@ -0,0 +1,146 @@
+"""
+Redemption Marketing - Shared Model Registry
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Process-wide registry that loads each AI model once, on first use.
+"""
+import gc
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+
+class _ModelEntry:
+    """Loader, loaded model and usage state for one registered model."""
+
+    def __init__(self, loader: Callable[[], Any]):
+        self.loader = loader
+        self.model: Optional[Any] = None
+        self.refs = 0
+        self.last_used = 0.0
+        self.failed_at: Optional[float] = None
+        self.load_lock = threading.Lock()
+        self.unload_timer: Optional[threading.Timer] = None
+
+
+class ModelRegistry:
+    """Shares loaded models between every service instance in the process.
+
+    Models are registered with a loader and loaded lazily the first time
+    they are acquired. Acquisitions are reference counted; once a model has
+    been unused for ``idle_timeout`` seconds it is unloaded and will be
+    reloaded on next use. A failed load is not retried for
+    ``retry_after`` seconds so callers fall back quickly.
+    """
+
+    def __init__(self, idle_timeout: float = 600, retry_after: float = 60):
+        self.idle_timeout = idle_timeout
+        self.retry_after = retry_after
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register a model loader; the first registration of a name wins."""
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _ModelEntry(loader)
+
+    @contextmanager
+    def use(self, name: str):
+        """Hold a model for the duration of a ``with`` block (None if unavailable)."""
+        model = self.acquire(name)
+        try:
+            yield model
+        finally:
+            self.release(name)
+
+    def acquire(self, name: str) -> Optional[Any]:
+        """Get a model, loading it if needed, and take a reference to it."""
+        with self._lock:
+            entry = self._entries[name]
+            entry.refs += 1
+            if entry.unload_timer:
+                entry.unload_timer.cancel()
+                entry.unload_timer = None
+
+        # Load outside the registry lock so other models stay available
+        with entry.load_lock:
+            if entry.model is None and not self._recently_failed(entry):
+                start = time.perf_counter()
+                try:
+                    entry.model = entry.loader()
+                    entry.failed_at = None
+                    print(f"Loaded model {name} in {time.perf_counter() - start:.1f}s")
+                except Exception as e:
+                    print(f"Error loading model {name}: {e}")
+                    entry.failed_at = time.monotonic()
+            return entry.model
+
+    def release(self, name: str):
+        """Drop a reference; unused models are unloaded after the idle timeout."""
+        with self._lock:
+            entry = self._entries[name]
+            entry.refs = max(0, entry.refs - 1)
+            entry.last_used = time.monotonic()
+            if entry.refs == 0 and entry.model is not None and self.idle_timeout is not None:
+                entry.unload_timer = threading.Timer(self.idle_timeout, self._unload_if_idle, args=(name,))
+                entry.unload_timer.daemon = True
+                entry.unload_timer.start()
+
+    def unload(self, name: str) -> bool:
+        """Unload a model now unless it is in use."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.refs > 0 or entry.model is None:
+                return False
+            entry.model = None
+            if entry.unload_timer:
+                entry.unload_timer.cancel()
+                entry.unload_timer = None
+
+        self._free_memory()
+        print(f"Unloaded model {name}")
+        return True
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether a model is currently in memory."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry is not None and entry.model is not None
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Get load state and reference counts for every registered model."""
+        with self._lock:
+            return {
+                name: {
+                    "loaded": entry.model is not None,
+                    "refs": entry.refs,
+                    "idle_seconds": time.monotonic() - entry.last_used if entry.last_used else None
+                }
+                for name, entry in self._entries.items()
+            }
+
+    def _unload_if_idle(self, name: str):
+        """Timer callback: unload if nothing used the model since the timer started."""
+        with self._lock:
+            entry = self._entries[name]
+            if entry.refs > 0 or time.monotonic() - entry.last_used < self.idle_timeout:
+                return
+        self.unload(name)
+
+    def _recently_failed(self, entry: _ModelEntry) -> bool:
+        """Whether the last load failed within the retry window."""
+        return entry.failed_at is not None and time.monotonic() - entry.failed_at < self.retry_after
+
+    def _free_memory(self):
+        """Return freed model memory to the system and GPU."""
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+# Global registry shared by every service in the process
+model_registry = ModelRegistry()
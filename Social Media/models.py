@@ -190,6 +190,8 @@ class PostingSchedule:
     content: Optional[GeneratedContent] = None
     error_message: Optional[str] = None
     created_date: str = ""
+    attempts: int = 0  # Delivery attempts made by the posting queue
+    idempotency_key: str = ""  # Identifies the scheduled slot across restarts
     
     def __post_init__(self):
         if not self.created_date:
@@ -6,99 +6,236 @@ Open-source AI service using Hugging Face Transformers.
 """
 import json
 import asyncio
-from typing import Optional, List
+import threading
+from typing import Optional, List, AsyncIterator, Dict, Iterator
 import requests
-from transformers import pipeline, GPT2LMHeadModel, GPT2Tokenizer
 import torch
 from models import GeneratedContent, AnalyticsData, ContentSettings, VIDEO_CONTENT_TYPES
 from utils import safe_json_parse
 from audio_analyzer import AudioAnalyzer
+from model_registry import model_registry
+from inference_executor import inference_executor, PRIORITY_INTERACTIVE
+from generation_cache import GenerationCache, generation_cache, settings_fingerprint
+from text_backends import TEXT_MODEL, DEFAULT_BACKEND, load_text_generator
+from content_analytics import analytics_engine
 import os
 
 
+# Set on content data produced by templates because the model was unavailable
+FALLBACK_FLAG = "template_fallback"
+
+
 class OpenSourceAPIService:
-    """Handles content generation using open-source models."""
+    """Handles content generation using open-source models.
+    
+    With ``template_fallback`` off, generation returns None instead of
+    template content when the model is unavailable, so a router can fall
+    back to another backend.
+    """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[GenerationCache] = None, backend: Optional[str] = None,
+                 template_fallback: bool = True):
+        self.template_fallback = template_fallback
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.audio_analyzer = AudioAnalyzer()
+        self.generation_cache = cache if cache is not None else generation_cache
         print(f"Using device: {self.device}")
         
-        # Initialize text generation pipeline
-        try:
-            self.text_generator = pipeline(
-                "text-generation",
-                model="microsoft/DialoGPT-medium",
-                tokenizer="microsoft/DialoGPT-medium",
-                device=0 if self.device == "cuda" else -1
-            )
-            print("Loaded DialoGPT model successfully")
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            self.text_generator = None
+        # Text model is shared process-wide and loaded on first generation;
+        # the backend (fp32, int8, onnx) comes from the TEXT_BACKEND env var by default
+        self.text_backend = backend or os.getenv("TEXT_BACKEND", DEFAULT_BACKEND)
+        self.text_model = f"{TEXT_MODEL}:{self.text_backend}"
+        model_registry.register(
+            self.text_model, lambda: load_text_generator(self.text_backend, self.device)
+        )
+        self.batch_size = 8 if self.device == "cuda" else 4
     
-    async def generate_content(self, settings: ContentSettings) -> Optional[GeneratedContent]:
-        """Generate content using open-source models."""
+    async def generate_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                               request_key: Optional[str] = None,
+                               force_fresh: bool = False) -> Optional[GeneratedContent]:
+        """Generate content using open-source models.
+        
+        Results are memoized by settings fingerprint; ``force_fresh``
+        regenerates and replaces the cached result. A newer request with the
+        same ``request_key`` supersedes this one while it is queued, raising
+        ``asyncio.CancelledError``.
+        """
         try:
-            # Run in thread to avoid blocking UI
-            loop = asyncio.get_event_loop()
-            content_data = await loop.run_in_executor(
-                None, 
-                self._generate_content_sync, 
-                settings
-            )
+            cache_key = self._cache_key(settings)
+            content_data = None if force_fresh else self._cache_get(cache_key)
             
-            if not content_data:
-                return None
+            if content_data is None:
+                # Run on the bounded inference pool to avoid blocking UI
+                content_data = await inference_executor.run(
+                    self._generate_content_sync,
+                    settings,
+                    priority=priority,
+                    key=request_key
+                )
+                self._cache_put(cache_key, content_data)
             
-            # Create GeneratedContent object
-            content = GeneratedContent(
-                hook=content_data.get("hook", ""),
-                caption=content_data.get("caption", ""),
-                cta=content_data.get("cta", ""),
-                hashtags=content_data.get("hashtags", []),
-                best_time=content_data.get("best_time", ""),
-                strategy_notes=content_data.get("strategy_notes", ""),
-                variations=content_data.get("variations", []),
-                video_script=content_data.get("video_script"),
-                video_scenes=content_data.get("video_scenes"),
-                music_suggestions=content_data.get("music_suggestions"),
-                visual_elements=content_data.get("visual_elements"),
-                scene_timeline=content_data.get("scene_timeline"),
-                audio_analysis=content_data.get("audio_analysis"),
-                total_scenes=content_data.get("total_scenes", 0),
-                audio_duration=content_data.get("audio_duration", 0.0),
-                platform=settings.platform,
-                niche=settings.niche,
-                tone=settings.tone,
-                content_type=settings.content_type
-            )
+            if not content_data or (content_data.get(FALLBACK_FLAG) and not self.template_fallback):
+                return None
             
+            content = self._build_content(content_data, settings)
+            await self._attach_audio_analysis(content, settings)
             return content
             
         except Exception as e:
             print(f"Error generating content: {e}")
-            return self._generate_fallback_content(settings)
+            return self._generate_fallback_content(settings) if self.template_fallback else None
+    
+    async def generate_content_batch(self, settings_list: List[ContentSettings],
+                                     num_variations: int = 0,
+                                     priority: int = PRIORITY_INTERACTIVE,
+                                     force_fresh: bool = False) -> List[Optional[GeneratedContent]]:
+        """Generate content for several settings, batching model calls.
+        
+        Text prompts run through the model together in padded batches;
+        ``num_variations`` extra samples per prompt become the variations.
+        Cached settings are served without generation. Results are returned
+        in the order of ``settings_list``.
+        """
+        cache_keys = [self._cache_key(settings, num_variations) for settings in settings_list]
+        content_list = [None if force_fresh else self._cache_get(key) for key in cache_keys]
+        missing = [i for i, content_data in enumerate(content_list) if content_data is None]
+        
+        try:
+            if missing:
+                generated = await inference_executor.run(
+                    self._generate_content_batch_sync,
+                    [settings_list[i] for i in missing],
+                    num_variations,
+                    priority=priority
+                )
+                for i, content_data in zip(missing, generated):
+                    content_list[i] = content_data
+                    self._cache_put(cache_keys[i], content_data)
+        except Exception as e:
+            print(f"Error generating content batch: {e}")
+            return [self._generate_fallback_content(settings) for settings in settings_list]
+        
+        results = []
+        for settings, content_data in zip(settings_list, content_list):
+            if not content_data:
+                results.append(None)
+                continue
+            content = self._build_content(content_data, settings)
+            await self._attach_audio_analysis(content, settings)
+            results.append(content)
+        return results
+    
+    async def stream_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                             request_key: Optional[str] = None,
+                             force_fresh: bool = False) -> AsyncIterator[Dict]:
+        """Stream content fields as the model writes them.
+        
+        Yields ``{"fields": ..., "done": False}`` as the hook and caption
+        grow, then ``{"fields": ..., "done": True, "content": ...}``. Cached
+        results and template-based video content arrive as the final event.
+        """
+        cache_key = self._cache_key(settings)
+        content_data = None if force_fresh else self._cache_get(cache_key)
+        
+        if content_data is None and settings.content_type in VIDEO_CONTENT_TYPES:
+            content = await self.generate_content(settings, priority, request_key, force_fresh)
+            yield {"fields": {}, "done": True, "content": content}
+            return
+        
+        try:
+            if content_data is None:
+                text = ""
+                async for token in inference_executor.stream(
+                    self._stream_text_tokens, settings, priority=priority, key=request_key
+                ):
+                    text += token
+                    yield {"fields": self._structure_generated_content(text, settings), "done": False}
+                
+                if text:
+                    content_data = self._structure_generated_content(text, settings)
+                    self._cache_put(cache_key, content_data)
+                elif self.template_fallback:
+                    # Model unavailable: fall back to templates
+                    content_data = self._template_fallback(settings)
+                else:
+                    yield {"fields": {}, "done": True, "content": None}
+                    return
+            
+            content = self._build_content(content_data, settings)
+            await self._attach_audio_analysis(content, settings)
+            yield {"fields": content_data, "done": True, "content": content}
+            
+        except Exception as e:
+            print(f"Error streaming content: {e}")
+            content = self._generate_fallback_content(settings) if self.template_fallback else None
+            yield {"fields": {}, "done": True, "content": content}
     
-    async def analyze_content(self, content_history: list) -> Optional[AnalyticsData]:
+    def _build_content(self, content_data: dict, settings: ContentSettings) -> GeneratedContent:
+        """Create a GeneratedContent object from generated fields."""
+        return GeneratedContent(
+            hook=content_data.get("hook", ""),
+            caption=content_data.get("caption", ""),
+            cta=content_data.get("cta", ""),
+            hashtags=content_data.get("hashtags", []),
+            best_time=content_data.get("best_time", ""),
+            strategy_notes=content_data.get("strategy_notes", ""),
+            variations=content_data.get("variations", []),
+            video_script=content_data.get("video_script"),
+            video_scenes=content_data.get("video_scenes"),
+            music_suggestions=content_data.get("music_suggestions"),
+            visual_elements=content_data.get("visual_elements"),
+            scene_timeline=content_data.get("scene_timeline"),
+            audio_analysis=content_data.get("audio_analysis"),
+            total_scenes=content_data.get("total_scenes", 0),
+            audio_duration=content_data.get("audio_duration", 0.0),
+            platform=settings.platform,
+            niche=settings.niche,
+            tone=settings.tone,
+            content_type=settings.content_type
+        )
+    
+    def _cache_key(self, settings: ContentSettings, num_variations: int = 0) -> str:
+        """Fingerprint of the settings that determine generated content."""
+        return settings_fingerprint(settings, f"opensource:{self.text_model}", {"variations": num_variations})
+    
+    def _cache_get(self, cache_key: str) -> Optional[dict]:
+        """Cached content data for a key, if caching is enabled."""
+        return self.generation_cache.get(cache_key) if self.generation_cache else None
+    
+    def _cache_put(self, cache_key: str, content_data: Optional[dict]):
+        """Remember generated content data, if caching is enabled.
+        
+        Template fallbacks are not cached, so the model's output replaces
+        them once it is available again.
+        """
+        if self.generation_cache and content_data and not content_data.get(FALLBACK_FLAG):
+            self.generation_cache.put(cache_key, content_data)
+    
+    async def _attach_audio_analysis(self, content: GeneratedContent, settings: ContentSettings):
+        """Preview analysis now; the full pass updates content.audio_analysis when done."""
+        if settings.audio_file_path and settings.content_type in VIDEO_CONTENT_TYPES:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(
+                None,
+                self.audio_analyzer.analyze_progressive,
+                settings.audio_file_path,
+                content
+            )
+    
+    async def analyze_content(self, content_history: list, priority: int = PRIORITY_INTERACTIVE,
+                              request_key: Optional[str] = None) -> Optional[AnalyticsData]:
         """Analyze content history for insights."""
         if not content_history:
             return None
         
         try:
-            # Run in thread to avoid blocking UI
+            # Local aggregation, not model inference; skip the inference queue
             loop = asyncio.get_event_loop()
-            analytics_data = await loop.run_in_executor(
-                None, 
-                self._analyze_content_sync, 
-                content_history
-            )
-            
-            return analytics_data
+            return await loop.run_in_executor(None, self._analyze_content_sync, content_history)
             
         except Exception as e:
             print(f"Error analyzing content: {e}")
-            return self._generate_fallback_analytics(content_history)
+            return None
     
     def _generate_content_sync(self, settings: ContentSettings) -> dict:
         """Generate content synchronously."""
@@ -107,33 +244,107 @@ class OpenSourceAPIService:
         else:
             return self._generate_text_content(settings)
     
+    def _generate_content_batch_sync(self, settings_list: List[ContentSettings],
+                                     num_variations: int = 0) -> List[dict]:
+        """Generate content for several settings; text settings share model batches."""
+        results: List[Optional[dict]] = [None] * len(settings_list)
+        text_indices = []
+        
+        for i, settings in enumerate(settings_list):
+            if settings.content_type in VIDEO_CONTENT_TYPES:
+                results[i] = self._generate_video_content(settings)
+            else:
+                text_indices.append(i)
+        
+        if text_indices:
+            text_results = self._generate_text_batch(
+                [settings_list[i] for i in text_indices], num_variations
+            )
+            for i, content_data in zip(text_indices, text_results):
+                results[i] = content_data
+        
+        return results
+    
     def _generate_text_content(self, settings: ContentSettings) -> dict:
         """Generate text-based content."""
-        # Create prompt for text generation
-        prompt = f"Create engaging {settings.platform} content about {settings.niche} for {settings.target_audience} with a {settings.tone} tone:"
+        return self._generate_text_batch([settings])[0]
+    
+    def _generate_text_batch(self, settings_list: List[ContentSettings],
+                             num_variations: int = 0) -> List[dict]:
+        """Generate text content for several settings in padded model batches."""
+        prompts = [self._text_prompt(settings) for settings in settings_list]
+        sequences = 1 + max(0, num_variations)
+        
+        # Group prompts of similar length so batches carry little padding
+        order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
         
         try:
-            if self.text_generator:
-                # Generate with the model
-                response = self.text_generator(
-                    prompt,
+            with model_registry.use(self.text_model) as text_generator:
+                if not text_generator:
+                    # Fallback to template-based generation
+                    return [self._template_fallback(settings) for settings in settings_list]
+                
+                responses = text_generator(
+                    [prompts[i] for i in order],
                     max_length=200,
-                    num_return_sequences=1,
+                    num_return_sequences=sequences,
                     temperature=0.7,
                     do_sample=True,
-                    pad_token_id=50256
+                    pad_token_id=50256,
+                    batch_size=min(self.batch_size, len(prompts))
                 )
-                generated_text = response[0]['generated_text']
-            else:
-                # Fallback to template-based generation
-                return self._generate_template_content(settings)
-            
         except Exception as e:
             print(f"Model generation error: {e}")
-            return self._generate_template_content(settings)
+            return [self._template_fallback(settings) for settings in settings_list]
         
-        # Parse and structure the generated content
-        return self._structure_generated_content(generated_text, settings)
+        results: List[Optional[dict]] = [None] * len(prompts)
+        for i, response in zip(order, responses):
+            texts = [item['generated_text'] for item in response]
+            variations = None
+            if num_variations > 0:
+                variations = [self._extract_variation(text, prompts[i]) for text in texts[1:]]
+            # Parse and structure the generated content
+            results[i] = self._structure_generated_content(texts[0], settings_list[i], variations)
+        return results
+    
+    def _stream_text_tokens(self, settings: ContentSettings) -> Iterator[str]:
+        """Yield generated text pieces from the local model as they decode."""
+        from transformers import TextIteratorStreamer
+        
+        with model_registry.use(self.text_model) as text_generator:
+            if not text_generator:
+                return
+            
+            # Keep the prompt in the stream so the text matches the non-streaming output
+            # A timeout surfaces a crashed generation thread instead of blocking forever
+            streamer = TextIteratorStreamer(text_generator.tokenizer, skip_special_tokens=True, timeout=60)
+            worker = threading.Thread(
+                target=text_generator,
+                args=(self._text_prompt(settings),),
+                kwargs={
+                    "max_length": 200,
+                    "temperature": 0.7,
+                    "do_sample": True,
+                    "pad_token_id": 50256,
+                    "streamer": streamer
+                },
+                daemon=True
+            )
+            worker.start()
+            for text in streamer:
+                yield text
+            worker.join()
+    
+    def _text_prompt(self, settings: ContentSettings) -> str:
+        """Create the prompt for text generation."""
+        return f"Create engaging {settings.platform} content about {settings.niche} for {settings.target_audience} with a {settings.tone} tone:"
+    
+    def _extract_variation(self, text: str, prompt: str) -> str:
+        """First generated line of a sample, without the prompt."""
+        if text.startswith(prompt):
+            text = text[len(prompt):]
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        return lines[0][:200] if lines else text.strip()[:200]
     
     def _generate_video_content(self, settings: ContentSettings) -> dict:
         """Generate video content with scripts and scenes."""
@@ -284,7 +495,14 @@ Visual Theme: Connect {settings.niche} with {settings.music_genre} aesthetics
             ]
         }
     
-    def _structure_generated_content(self, text: str, settings: ContentSettings) -> dict:
+    def _template_fallback(self, settings: ContentSettings) -> dict:
+        """Template content standing in for model output, flagged so it is not cached."""
+        content_data = self._generate_template_content(settings)
+        content_data[FALLBACK_FLAG] = True
+        return content_data
+    
+    def _structure_generated_content(self, text: str, settings: ContentSettings,
+                                     variations: Optional[List[str]] = None) -> dict:
         """Structure the generated text into content components."""
         lines = text.split('\n')
         
@@ -300,7 +518,7 @@ Visual Theme: Connect {settings.niche} with {settings.music_genre} aesthetics
             "hashtags": self._generate_hashtags(settings),
             "best_time": self._get_optimal_time(settings.platform),
             "strategy_notes": f"AI-generated content for {settings.platform} focusing on {settings.niche}",
-            "variations": [
+            "variations": variations or [
                 "Shorter version with just the key message",
                 "Extended version with more details and examples",
                 "Question-focused version to increase engagement"
@@ -345,9 +563,10 @@ Visual Theme: Connect {settings.niche} with {settings.music_genre} aesthetics
         }
         return times.get(platform, "9:00 AM - 11:00 AM or 7:00 PM - 9:00 PM")
     
-    def _analyze_content_sync(self, content_history: list) -> AnalyticsData:
-        """Analyze content synchronously."""
-        return self._generate_fallback_analytics(content_history)
+    def _analyze_content_sync(self, content_history: list) -> Optional[AnalyticsData]:
+        """Analyze content synchronously; only posts added since the last call are processed."""
+        analytics_engine.sync(content_history)
+        return analytics_engine.to_analytics()
     
     def _generate_fallback_content(self, settings: ContentSettings) -> GeneratedContent:
         """Generate fallback content when models fail."""
@@ -365,24 +584,4 @@ Visual Theme: Connect {settings.niche} with {settings.music_genre} aesthetics
             niche=settings.niche,
             tone=settings.tone,
             content_type=settings.content_type
-        )
-    
-    def _generate_fallback_analytics(self, content_history: list) -> AnalyticsData:
-        """Generate fallback analytics."""
-        import random
-        
-        return AnalyticsData(
-            growth_score=random.randint(70, 90),
-            content_patterns="Your content shows consistent engagement patterns with educational posts performing best.",
-            top_performers="Posts with actionable tips and personal stories generate highest engagement.",
-            posting_strategy="Optimal posting windows align with your audience's active hours.",
-            hashtag_insights="Mix of trending and niche hashtags improves discoverability.",
-            audience_engagement="Your audience responds well to authentic, value-driven content.",
-            recommendations=[
-                "Increase video content for better engagement",
-                "Post consistently during peak hours",
-                "Include more call-to-action prompts",
-                "Use storytelling to build connections",
-                "Engage with comments within first hour"
-            ]
         )
\ No newline at end of file
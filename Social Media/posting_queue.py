@@ -0,0 +1,347 @@
+"""
+Redemption Marketing - Posting Job Queue
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Durable, crash-safe queue of scheduled posts backed by SQLite.
+"""
+import json
+import time
+import uuid
+import random
+import sqlite3
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from models import GeneratedContent, PostingSchedule
+
+
+# Job statuses. "running" jobs hold a lease; the rest match PostingSchedule.
+PENDING = "pending"
+RUNNING = "running"
+POSTED = "posted"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posting_jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    platform TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    content_json TEXT,
+    scheduled_time TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    post_started_at REAL,
+    error_message TEXT,
+    created_date TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posting_jobs_due ON posting_jobs (status, next_attempt_at);
+"""
+
+
+class PostingQueue:
+    """Scheduled posts stored in SQLite (WAL mode) with leased, retried delivery.
+
+    A job moves ``pending -> running -> posted``. Workers claim due jobs
+    atomically inside a write transaction, so several workers (threads
+    or processes) never run the same job. A claim is a lease for
+    ``lease_seconds``; the holder extends it with ``heartbeat`` and must
+    still hold it to record an outcome. Failures go back to ``pending``
+    with jittered exponential backoff until ``max_attempts``, then
+    ``failed``.
+
+    If a worker dies, its lease expires and the job is recovered on the
+    next claim. A job that had not yet started posting is retried. A
+    job that had called ``begin_post`` may already be live on the
+    platform, so it is marked ``failed`` for review instead of being
+    posted twice. Enqueuing the same ``idempotency_key`` twice returns
+    the existing job.
+    """
+
+    def __init__(self, db_path: str = "./posting_queue.db", lease_seconds: float = 300,
+                 max_attempts: int = 5, backoff_base: float = 60, backoff_max: float = 3600):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def enqueue(self, platform: str, scheduled_time: str, content: Optional[GeneratedContent] = None,
+                idempotency_key: Optional[str] = None) -> PostingSchedule:
+        """Add a post due at ``scheduled_time`` (ISO format), or return the existing one with the same key."""
+        key = idempotency_key or f"{platform}:{scheduled_time}"
+        now = time.time()
+        due_at = datetime.fromisoformat(scheduled_time).timestamp()
+
+        with self._transaction() as db:
+            db.execute(
+                """INSERT OR IGNORE INTO posting_jobs
+                   (id, idempotency_key, platform, content_id, content_json, scheduled_time,
+                    status, next_attempt_at, created_date, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (str(uuid.uuid4()), key, platform, str(uuid.uuid4()), _dump_content(content),
+                 scheduled_time, PENDING, due_at, datetime.now().isoformat(), now)
+            )
+            row = db.execute("SELECT * FROM posting_jobs WHERE idempotency_key = ?", (key,)).fetchone()
+        return _to_schedule(row)
+
+    def claim(self, worker_id: str) -> Optional[PostingSchedule]:
+        """Atomically lease the next due job, or return None if nothing is due."""
+        now = time.time()
+        with self._transaction() as db:
+            self._recover_expired(db, now)
+            row = db.execute(
+                """SELECT * FROM posting_jobs WHERE status = ? AND next_attempt_at <= ?
+                   ORDER BY next_attempt_at LIMIT 1""",
+                (PENDING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                """UPDATE posting_jobs SET status = ?, lease_owner = ?, lease_expires_at = ?,
+                   attempts = attempts + 1, updated_at = ? WHERE id = ?""",
+                (RUNNING, worker_id, now + self.lease_seconds, now, row["id"])
+            )
+            row = db.execute("SELECT * FROM posting_jobs WHERE id = ?", (row["id"],)).fetchone()
+        return _to_schedule(row)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend a held lease; False if the lease was lost."""
+        now = time.time()
+        return self._update_leased(
+            job_id, worker_id, "lease_expires_at = ?, updated_at = ?", (now + self.lease_seconds, now)
+        )
+
+    def keep_lease(self, job_id: str, worker_id: str) -> "LeaseKeeper":
+        """Renew a held lease in the background while a job runs; use as a context manager."""
+        return LeaseKeeper(self, job_id, worker_id, interval=self.lease_seconds / 3)
+
+    def attach_content(self, job_id: str, worker_id: str, content: GeneratedContent) -> bool:
+        """Store the content chosen for a job so retries post the same content."""
+        return self._update_leased(
+            job_id, worker_id, "content_json = ?, updated_at = ?", (_dump_content(content), time.time())
+        )
+
+    def begin_post(self, job_id: str, worker_id: str) -> bool:
+        """Record that the irreversible posting step is starting.
+
+        Call immediately before publishing. False means the lease was
+        lost and the worker must not post.
+        """
+        now = time.time()
+        return self._update_leased(job_id, worker_id, "post_started_at = ?, updated_at = ?", (now, now))
+
+    def complete(self, job_id: str, worker_id: str) -> bool:
+        """Mark a leased job as posted."""
+        return self._finish(job_id, worker_id, POSTED, None, None)
+
+    def cancel(self, job_id: str, worker_id: str, reason: str) -> bool:
+        """Mark a leased job as cancelled without posting."""
+        return self._finish(job_id, worker_id, CANCELLED, reason, None)
+
+    def fail(self, job_id: str, worker_id: str, error: str, retryable: bool = True) -> bool:
+        """Record a failed attempt; retried with backoff while attempts remain."""
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM posting_jobs WHERE id = ? AND status = ? AND lease_owner = ?",
+                (job_id, RUNNING, worker_id)
+            ).fetchone()
+            if row is None:
+                return False
+            if retryable and row["attempts"] < self.max_attempts:
+                status, next_attempt_at = PENDING, time.time() + self._backoff(row["attempts"])
+            else:
+                status, next_attempt_at = FAILED, None
+            return self._finish(job_id, worker_id, status, error, next_attempt_at, db)
+
+    def next_due_time(self) -> Optional[float]:
+        """Epoch time of the earliest pending job or lease expiry, if any."""
+        row = self._connection().execute(
+            """SELECT MIN(t) FROM (
+                   SELECT MIN(next_attempt_at) AS t FROM posting_jobs WHERE status = ?
+                   UNION ALL
+                   SELECT MIN(lease_expires_at) AS t FROM posting_jobs WHERE status = ?
+               )""",
+            (PENDING, RUNNING)
+        ).fetchone()
+        return row[0]
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[PostingSchedule]:
+        """Jobs in due order, optionally filtered by status."""
+        if status:
+            rows = self._connection().execute(
+                "SELECT * FROM posting_jobs WHERE status = ? ORDER BY next_attempt_at LIMIT ?", (status, limit)
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT * FROM posting_jobs ORDER BY next_attempt_at LIMIT ?", (limit,)
+            ).fetchall()
+        return [_to_schedule(row) for row in rows]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Job counts by status."""
+        rows = self._connection().execute(
+            "SELECT status, COUNT(*) FROM posting_jobs GROUP BY status"
+        ).fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _recover_expired(self, db: sqlite3.Connection, now: float):
+        """Release jobs whose worker stopped renewing its lease."""
+        db.execute(
+            """UPDATE posting_jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL,
+               next_attempt_at = ?, error_message = 'Lease expired; retrying', updated_at = ?
+               WHERE status = ? AND lease_expires_at < ? AND post_started_at IS NULL AND attempts < ?""",
+            (PENDING, now, now, RUNNING, now, self.max_attempts)
+        )
+        db.execute(
+            """UPDATE posting_jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL,
+               error_message = 'Lease expired; no attempts left', updated_at = ?
+               WHERE status = ? AND lease_expires_at < ? AND post_started_at IS NULL""",
+            (FAILED, now, RUNNING, now)
+        )
+        db.execute(
+            """UPDATE posting_jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL,
+               error_message = 'Interrupted while posting; not retried to avoid a duplicate post',
+               updated_at = ?
+               WHERE status = ? AND lease_expires_at < ? AND post_started_at IS NOT NULL""",
+            (FAILED, now, RUNNING, now)
+        )
+
+    def _finish(self, job_id: str, worker_id: str, status: str, error: Optional[str],
+                next_attempt_at: Optional[float], db: Optional[sqlite3.Connection] = None) -> bool:
+        """Release a held lease with a new status."""
+        now = time.time()
+        sql = """UPDATE posting_jobs SET status = ?, error_message = ?, lease_owner = NULL,
+                 lease_expires_at = NULL, post_started_at = NULL,
+                 next_attempt_at = COALESCE(?, next_attempt_at), updated_at = ?
+                 WHERE id = ? AND status = ? AND lease_owner = ?"""
+        params = (status, error, next_attempt_at, now, job_id, RUNNING, worker_id)
+        if db is not None:
+            return db.execute(sql, params).rowcount == 1
+        with self._transaction() as db:
+            return db.execute(sql, params).rowcount == 1
+
+    def _update_leased(self, job_id: str, worker_id: str, assignments: str, params: tuple) -> bool:
+        """Update a job only while ``worker_id`` holds an unexpired lease on it."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                f"UPDATE posting_jobs SET {assignments} "
+                "WHERE id = ? AND status = ? AND lease_owner = ? AND lease_expires_at >= ?",
+                params + (job_id, RUNNING, worker_id, time.time())
+            )
+            return cursor.rowcount == 1
+
+    def _backoff(self, attempts: int) -> float:
+        """Jittered exponential delay before the next attempt."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection in autocommit mode with WAL journaling."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self):
+        """Write transaction that takes the database lock up front."""
+        return _ImmediateTransaction(self._connection())
+
+
+class LeaseKeeper:
+    """Heartbeats a job's lease every ``interval`` seconds until stopped.
+
+    ``lost`` turns True once a renewal fails; the worker should then stop
+    working on the job, since another worker may claim it.
+    """
+
+    def __init__(self, queue: PostingQueue, job_id: str, worker_id: str, interval: float):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def renew(self) -> bool:
+        """Extend the lease now; False if it has been lost."""
+        if not self.lost and not self.queue.heartbeat(self.job_id, self.worker_id):
+            self.lost = True
+        return not self.lost
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread = threading.Thread(target=self._run, name=f"lease-{self.job_id[:8]}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        """Renewal loop."""
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.renew():
+                    return
+            except Exception as e:
+                print(f"Error renewing lease on posting job {self.job_id}: {e}")
+        self.queue.close()
+
+
+class _ImmediateTransaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``, rolled back on error."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _dump_content(content: Optional[GeneratedContent]) -> Optional[str]:
+    """Serialize content for storage."""
+    return json.dumps(asdict(content), ensure_ascii=False) if content is not None else None
+
+
+def _to_schedule(row: sqlite3.Row) -> PostingSchedule:
+    """Build a PostingSchedule from a job row."""
+    content = GeneratedContent(**json.loads(row["content_json"])) if row["content_json"] else None
+    return PostingSchedule(
+        id=row["id"],
+        content_id=row["content_id"],
+        platform=row["platform"],
+        scheduled_time=row["scheduled_time"],
+        status=row["status"],
+        content=content,
+        error_message=row["error_message"],
+        created_date=row["created_date"],
+        attempts=row["attempts"],
+        idempotency_key=row["idempotency_key"]
+    )
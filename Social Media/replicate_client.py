@@ -0,0 +1,236 @@
+"""
+Redemption Marketing - Replicate HTTP Client
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Pooled, retrying client for the Replicate predictions API.
+"""
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterator, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+
+DEFAULT_BASE_URL = "https://api.replicate.com/v1"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TERMINAL_STATUSES = {"succeeded", "failed", "canceled"}
+
+
+class ReplicateError(Exception):
+    """A prediction failed or the API returned an error."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ReplicateClient:
+    """Replicate predictions over a persistent, pooled HTTP session.
+
+    Requests time out after ``timeout`` (connect, read) seconds. 429 and
+    5xx responses, connection errors and timeouts are retried with
+    exponential backoff and full jitter, honouring ``Retry-After``.
+    Creating a prediction is not idempotent, so that POST is retried
+    only on 429 or when the connection was never made.
+    Concurrent ``run`` calls with the same model and input share one
+    upstream prediction. ``base_url`` can point at a local stub server.
+    """
+
+    def __init__(self, api_token: str, base_url: str = DEFAULT_BASE_URL,
+                 timeout: Tuple[float, float] = (5.0, 65.0), max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 pool_size: int = 8, poll_interval: float = 1.0, run_timeout: float = 300.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.run_timeout = run_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_token}",
+            "Content-Type": "application/json"
+        })
+
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "coalesced": 0, "predictions": 0}
+
+    def run(self, model: str, model_input: Dict) -> str:
+        """Run a prediction to completion and return its output as text."""
+        key = hashlib.sha256(json.dumps([model, model_input], sort_keys=True).encode()).hexdigest()
+
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                leader = Future()
+                self._inflight[key] = leader
+            else:
+                self._stats["coalesced"] += 1
+
+        if shared is not None:
+            return shared.result()
+
+        try:
+            result = self._run_prediction(model, model_input)
+            leader.set_result(result)
+            return result
+        except BaseException as e:
+            leader.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stream(self, model: str, model_input: Dict) -> Iterator[str]:
+        """Start a streaming prediction and yield output tokens as they arrive."""
+        prediction = self._create_prediction(model, model_input, stream=True)
+        stream_url = prediction.get("urls", {}).get("stream")
+        if not stream_url:
+            # Model does not support streaming; wait for the whole output
+            yield self._output_text(self._wait(prediction))
+            return
+
+        response = self._request("GET", stream_url, stream=True, headers={"Accept": "text/event-stream"})
+        with response:
+            event, data = "", []
+            for line in response.iter_lines(decode_unicode=True):
+                if line is None:
+                    continue
+                if line == "":
+                    # Blank line ends an event
+                    if event == "output":
+                        yield "\n".join(data)
+                    elif event == "error":
+                        raise ReplicateError("\n".join(data))
+                    elif event == "done":
+                        return
+                    event, data = "", []
+                elif line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    value = line[5:]
+                    data.append(value[1:] if value.startswith(" ") else value)
+
+    def get_stats(self) -> Dict:
+        """Get request, retry and coalescing counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+    def _run_prediction(self, model: str, model_input: Dict) -> str:
+        """Create a prediction and wait for its output."""
+        return self._output_text(self._wait(self._create_prediction(model, model_input)))
+
+    def _create_prediction(self, model: str, model_input: Dict, stream: bool = False) -> Dict:
+        """POST a new prediction for ``owner/name`` or ``owner/name:version``."""
+        body = {"input": model_input}
+        if stream:
+            body["stream"] = True
+
+        if ":" in model:
+            body["version"] = model.split(":", 1)[1]
+            url = f"{self.base_url}/predictions"
+        else:
+            url = f"{self.base_url}/models/{model}/predictions"
+
+        with self._lock:
+            self._stats["predictions"] += 1
+        # Ask the API to hold the response until the prediction finishes (up to 60s)
+        headers = {} if stream else {"Prefer": "wait=60"}
+        return self._request("POST", url, idempotent=False, json=body, headers=headers).json()
+
+    def _wait(self, prediction: Dict) -> Dict:
+        """Poll a prediction until it reaches a terminal status."""
+        deadline = time.monotonic() + self.run_timeout
+        while prediction.get("status") not in TERMINAL_STATUSES:
+            if time.monotonic() > deadline:
+                cancel_url = prediction.get("urls", {}).get("cancel")
+                if cancel_url:
+                    try:
+                        self._request("POST", cancel_url)
+                    except ReplicateError:
+                        pass
+                raise ReplicateError(f"Prediction {prediction.get('id')} timed out")
+            time.sleep(self.poll_interval)
+            prediction = self._request("GET", prediction["urls"]["get"]).json()
+
+        if prediction["status"] != "succeeded":
+            raise ReplicateError(f"Prediction {prediction['status']}: {prediction.get('error')}")
+        return prediction
+
+    def _output_text(self, prediction: Dict) -> str:
+        """Join token-list output into a single string."""
+        output = prediction.get("output")
+        if isinstance(output, list):
+            return "".join(str(item) for item in output)
+        return "" if output is None else str(output)
+
+    def _request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> requests.Response:
+        """Send a request, retrying transient failures with jittered backoff.
+
+        Non-idempotent requests are retried only when the server cannot
+        have acted on them: a 429, or a failure to connect.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                self._stats["requests"] += 1
+            retry_after = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = ReplicateError(f"{method} {url} failed: {e}")
+                if not idempotent and not _never_sent(e):
+                    raise error
+            else:
+                if response.status_code < 400:
+                    return response
+                error = ReplicateError(
+                    f"{method} {url} returned {response.status_code}: {response.text[:200]}",
+                    response.status_code
+                )
+                if response.status_code not in RETRY_STATUSES or (not idempotent and response.status_code != 429):
+                    raise error
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+
+            if attempt == self.max_retries:
+                raise error
+            with self._lock:
+                self._stats["retries"] += 1
+            time.sleep(self._backoff(attempt, retry_after))
+
+        raise ReplicateError(f"{method} {url} failed")
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Full-jitter exponential delay, at least the server's Retry-After (capped)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        try:
+            return max(delay, min(float(retry_after), self.backoff_max)) if retry_after else delay
+        except ValueError:
+            return delay
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    """Whether a request failed before reaching the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+        reason = getattr(error.args[0], "reason", error.args[0])
+        return isinstance(reason, NewConnectionError)
+    return False
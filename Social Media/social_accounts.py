@@ -9,14 +9,8 @@ from typing import Dict, List, Optional, Callable
 import threading
 import time
 import os
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from models import SocialAccount, AutoPostSettings, SocialAccountManager, PostingSchedule
 from utils import create_color_scheme
-from auto_poster import AutoPoster
 import base64
 import json
 
@@ -222,47 +216,10 @@ Your privacy and security are our top priority. We only detect if you're logged
     def discover_accounts(self):
         """Discover social media accounts using browser automation."""
         try:
-            self.update_status("Initializing Brave browser...")
+            # Browsers use the pool's profiles so posting reuses these logins
+            from browser_pool import browser_pool
             
-            # Setup Brave browser options
-            brave_options = Options()
-            
-            # Try to find Brave browser executable
-            brave_paths = [
-                r"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe",
-                r"C:\Program Files (x86)\BraveSoftware\Brave-Browser\Application\brave.exe",
-                r"C:\Users\{}\AppData\Local\BraveSoftware\Brave-Browser\Application\brave.exe".format(os.environ.get('USERNAME', ''))
-            ]
-            
-            brave_path = None
-            for path in brave_paths:
-                if os.path.exists(path):
-                    brave_path = path
-                    break
-            
-            if brave_path:
-                brave_options.binary_location = brave_path
-                self.update_status("Found Brave browser, launching...")
-            else:
-                self.update_status("Brave not found, using default Chrome...")
-            
-            # Enable password manager and login detection
-            brave_options.add_argument("--disable-blink-features=AutomationControlled")
-            brave_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            brave_options.add_experimental_option('useAutomationExtension', False)
-            brave_options.add_argument("--disable-web-security")
-            brave_options.add_argument("--allow-running-insecure-content")
-            
-            # Keep browser open for user interaction
-            brave_options.add_experimental_option("detach", True)
-            
-            try:
-                driver = webdriver.Chrome(options=brave_options)
-            except Exception as e:
-                self.update_status("Error launching Brave, using Chrome...")
-                chrome_options = Options()
-                chrome_options.add_experimental_option("detach", True)
-                driver = webdriver.Chrome(options=chrome_options)
+            self.update_status("Opening browser sessions...")
             
             platforms = {
                 "Instagram": "https://www.instagram.com/accounts/login/",
@@ -275,38 +232,41 @@ Your privacy and security are our top priority. We only detect if you're logged
                 self.update_status(f"Opening {platform} login page...")
                 
                 try:
-                    driver.get(login_url)
-                    
-                    # Give user time to login manually
-                    self.update_status(f"Please login to {platform} manually. Use your password manager if needed.")
-                    self.show_login_dialog(platform, driver)
-                    
-                    # Check if login was successful
-                    if self.check_logged_in(driver, platform):
-                        username = self.extract_username(driver, platform)
-                        if username:
-                            account = SocialAccount(
-                                platform=platform.lower(),
-                                username=username,
-                                display_name=username,
-                                is_connected=True,
-                                last_post_date="",
-                                follower_count=0
-                            )
-                            self.account_manager.add_account(account)
-                            self.after(0, self.refresh_accounts)
-                            self.update_status(f"✅ Successfully connected {platform} account: @{username}")
+                    # Manual login has no time limit, so keep it out of the pooled slots
+                    with browser_pool.dedicated(platform.lower()) as session:
+                        driver = session.driver
+                        driver.get(login_url)
+                        
+                        # Give user time to login manually
+                        self.update_status(f"Please login to {platform} manually. Use your password manager if needed.")
+                        self.show_login_dialog(platform, driver)
+                        
+                        # Check if login was successful
+                        if self.check_logged_in(driver, platform):
+                            username = self.extract_username(driver, platform)
+                            if username:
+                                account = SocialAccount(
+                                    platform=platform.lower(),
+                                    username=username,
+                                    display_name=username,
+                                    is_connected=True,
+                                    last_post_date="",
+                                    follower_count=0
+                                )
+                                self.account_manager.add_account(account)
+                                self.after(0, self.refresh_accounts)
+                                self.update_status(f"✅ Successfully connected {platform} account: @{username}")
+                            else:
+                                self.update_status(f"❌ Could not extract username from {platform}")
                         else:
-                            self.update_status(f"❌ Could not extract username from {platform}")
-                    else:
-                        self.update_status(f"❌ Login not detected for {platform}")
+                            self.update_status(f"❌ Login not detected for {platform}")
                     
                 except Exception as e:
                     print(f"Error checking {platform}: {e}")
                     self.update_status(f"❌ Error connecting to {platform}: {str(e)}")
                     continue
             
-            self.update_status("Account discovery completed. You can close the browser when done.")
+            self.update_status("Account discovery completed. Logins are kept for automated posting.")
             
         except Exception as e:
             print(f"Discovery error: {e}")
@@ -421,6 +381,8 @@ Your privacy and security are our top priority. We only detect if you're logged
     def check_logged_in(self, driver, platform: str) -> bool:
         """Check if user is logged into platform."""
         try:
+            from selenium.webdriver.common.by import By
+            
             if platform == "Instagram":
                 # Look for Instagram-specific elements that indicate login
                 return len(driver.find_elements(By.CSS_SELECTOR, "[data-testid='user-avatar']")) > 0
@@ -437,6 +399,8 @@ Your privacy and security are our top priority. We only detect if you're logged
     def extract_username(self, driver, platform: str) -> Optional[str]:
         """Extract username from logged-in platform."""
         try:
+            from selenium.webdriver.common.by import By
+            
             if platform == "Instagram":
                 # Navigate to profile and extract username
                 driver.get("https://www.instagram.com/accounts/edit/")
@@ -583,6 +547,8 @@ Your privacy and security are our top priority. We only detect if you're logged
         """Toggle automatic posting on/off."""
         try:
             if not self.auto_poster:
+                from auto_poster import AutoPoster
+                
                 # Initialize auto poster with required managers
                 # Create a mock content manager for now
                 class MockContentManager:
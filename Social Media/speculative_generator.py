@@ -0,0 +1,282 @@
+"""
+Redemption Marketing - Speculative Generation
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Pre-generates the content a user is likely to ask for next while the
+machine is idle.
+"""
+import copy
+import time
+import asyncio
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from models import GeneratedContent, AnalyticsData, ContentSettings, PLATFORMS
+from generation_cache import settings_fingerprint
+from inference_executor import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+
+class SpeculativeGenerator:
+    """Wraps a generation backend and speculates on the next request.
+
+    After each generation it predicts the most likely next settings from
+    how this user has moved between requests so far: regenerating with the
+    same settings (which gets a fresh variant) or switching only the
+    platform. When ``is_idle`` reports spare capacity, up to ``lookahead``
+    candidates are generated at background priority and parked. A request
+    matching a parked entry returns it at once; one matching a speculation
+    still in flight waits for it rather than starting over. Parked entries
+    are used once and expire after ``ttl_seconds``; unused ones count as
+    wasted compute.
+
+    Speculations run on ``speculation_backend`` (default: ``backend``).
+    Pass a local backend so guesses never fall back or hedge to a paid
+    remote service.
+    """
+
+    def __init__(self, backend, is_idle: Callable[[], bool], lookahead: int = 2,
+                 max_entries: int = 4, ttl_seconds: float = 600, idle_poll: float = 2.0,
+                 max_idle_wait: float = 120.0, speculation_backend=None):
+        self.backend = backend
+        self.speculation_backend = speculation_backend or backend
+        self.is_idle = is_idle
+        self.lookahead = lookahead
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.idle_poll = idle_poll
+        self.max_idle_wait = max_idle_wait
+
+        self._parked: "OrderedDict[str, Tuple[GeneratedContent, float, float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._pending: List[Tuple[ContentSettings, bool]] = []
+        self._previous: Optional[ContentSettings] = None
+        self._transitions: Counter = Counter()
+        self._epoch = 0
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "inflight_hits": 0,
+            "misses": 0,
+            "speculated": 0,
+            "wasted": 0,
+            "seconds_spent": 0.0,
+            "seconds_wasted": 0.0
+        }
+
+    async def generate_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                               request_key: Optional[str] = None,
+                               force_fresh: bool = False) -> Optional[GeneratedContent]:
+        """Serve a parked speculation if one matches, otherwise generate."""
+        content = await self._take(settings, force_fresh)
+        if content is None:
+            content = await self.backend.generate_content(
+                settings, priority=priority, request_key=request_key, force_fresh=force_fresh
+            )
+        if content is not None and priority == PRIORITY_INTERACTIVE:
+            self._speculate_after(settings)
+        return content
+
+    async def stream_content(self, settings: ContentSettings, priority: int = PRIORITY_INTERACTIVE,
+                             request_key: Optional[str] = None,
+                             force_fresh: bool = False) -> AsyncIterator[Dict]:
+        """Stream from the backend, or finish at once on a speculation hit."""
+        # Callers stop iterating at the final event, so speculation is queued before it is yielded
+        content = await self._take(settings, force_fresh)
+        final = {"fields": {}, "done": True, "content": content}
+        if content is None and hasattr(self.backend, "stream_content"):
+            async for event in self.backend.stream_content(
+                settings, priority=priority, request_key=request_key, force_fresh=force_fresh
+            ):
+                if event["done"]:
+                    final = event
+                    break
+                yield event
+        elif content is None:
+            final["content"] = await self.backend.generate_content(
+                settings, priority=priority, request_key=request_key, force_fresh=force_fresh
+            )
+
+        if final["content"] is not None and priority == PRIORITY_INTERACTIVE:
+            self._speculate_after(settings)
+        yield final
+
+    async def analyze_content(self, content_history: list, priority: int = PRIORITY_INTERACTIVE,
+                              request_key: Optional[str] = None) -> Optional[AnalyticsData]:
+        """Analytics are not speculated; pass through."""
+        return await self.backend.analyze_content(content_history, priority=priority, request_key=request_key)
+
+    def warm_up(self):
+        """Warm up the wrapped backend."""
+        if hasattr(self.backend, "warm_up"):
+            self.backend.warm_up()
+
+    def get_stats(self) -> Dict:
+        """Get hit rate and wasted-compute counters."""
+        with self._condition:
+            self._expire()
+            served = self._stats["hits"] + self._stats["inflight_hits"]
+            return dict(
+                self._stats,
+                hit_rate=served / self._stats["requests"] if self._stats["requests"] else 0.0,
+                parked=len(self._parked),
+                inflight=len(self._inflight)
+            )
+
+    def clear(self):
+        """Drop parked and pending speculations."""
+        with self._condition:
+            self._pending.clear()
+            for key in list(self._parked):
+                self._discard(key)
+
+    async def _take(self, settings: ContentSettings, force_fresh: bool = False) -> Optional[GeneratedContent]:
+        """Pop the parked result for these settings, waiting on one in flight."""
+        # Speculations never use audio, and Force Fresh asks for a new variant
+        if force_fresh or settings.audio_file_path:
+            with self._condition:
+                self._stats["requests"] += 1
+                self._stats["misses"] += 1
+            return None
+
+        key = self._key(settings)
+        with self._condition:
+            self._stats["requests"] += 1
+            self._expire()
+            entry = self._parked.pop(key, None)
+            if entry is not None:
+                self._stats["hits"] += 1
+                return entry[0]
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                self._stats["misses"] += 1
+                return None
+
+        await asyncio.wrap_future(inflight)
+        with self._condition:
+            # The speculation parks its result before resolving the future
+            entry = self._parked.pop(key, None)
+            if entry is not None:
+                self._stats["inflight_hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+        return None
+
+    def _speculate_after(self, settings: ContentSettings):
+        """Learn from this request and queue the likeliest next requests."""
+        settings = copy.deepcopy(settings)
+        with self._condition:
+            previous, self._previous = self._previous, settings
+            # Audio-driven videos depend on files and are too heavy to guess at
+            if settings.audio_file_path:
+                return
+
+            if previous is not None:
+                if self._key(previous) == self._key(settings):
+                    self._transitions["same"] += 1
+                elif self._key(self._with_platform(previous, settings.platform)) == self._key(settings):
+                    self._transitions[("platform", previous.platform, settings.platform)] += 1
+
+            self._pending = self._predict(settings)[:self.lookahead]
+            self._epoch += 1
+            self._start_worker()
+            self._condition.notify()
+
+    def _predict(self, settings: ContentSettings) -> List[Tuple[ContentSettings, bool]]:
+        """Candidate next settings, likeliest first, with whether to force a fresh variant."""
+        # Small priors keep the order sensible before anything is learned
+        scored = [(2 + self._transitions["same"], 0, settings, True)]
+        for rank, platform in enumerate(PLATFORMS):
+            if platform != settings.platform:
+                count = self._transitions[("platform", settings.platform, platform)]
+                scored.append((1 + count, -rank - 1, self._with_platform(settings, platform), False))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [(candidate, fresh) for _, _, candidate, fresh in scored]
+
+    def _start_worker(self):
+        """Start the speculation thread on first use (caller holds the lock)."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._worker_loop, name="speculative-generation", daemon=True)
+            self._worker.start()
+
+    def _worker_loop(self):
+        """Generate pending candidates one at a time, only while idle."""
+        loop = asyncio.new_event_loop()
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                settings, fresh = self._pending.pop(0)
+                epoch = self._epoch
+                key = self._key(settings)
+                if key in self._parked or key in self._inflight:
+                    continue
+
+            if not self._wait_for_idle(epoch):
+                continue
+
+            with self._condition:
+                future: Future = Future()
+                self._inflight[key] = future
+
+            start = time.monotonic()
+            content = None
+            try:
+                content = loop.run_until_complete(self.speculation_backend.generate_content(
+                    settings, priority=PRIORITY_BACKGROUND, request_key="speculative", force_fresh=fresh
+                ))
+            except BaseException as e:
+                print(f"Error in speculative generation: {e}")
+            elapsed = time.monotonic() - start
+
+            with self._condition:
+                self._stats["speculated"] += 1
+                self._stats["seconds_spent"] += elapsed
+                if content is not None:
+                    self._parked[key] = (content, time.monotonic(), elapsed)
+                    while len(self._parked) > self.max_entries:
+                        self._discard(next(iter(self._parked)))
+                del self._inflight[key]
+            future.set_result(content)
+
+    def _wait_for_idle(self, epoch: int) -> bool:
+        """Wait until the machine is idle; False if it stays busy or a newer request arrives."""
+        deadline = time.monotonic() + self.max_idle_wait
+        while True:
+            try:
+                if self.is_idle():
+                    return True
+            except Exception as e:
+                print(f"Error reading system load: {e}")
+                return False
+            with self._condition:
+                if time.monotonic() >= deadline:
+                    return False
+                self._condition.wait(timeout=self.idle_poll)
+                if self._epoch != epoch:
+                    return False
+
+    def _expire(self):
+        """Drop parked entries past their TTL (lock held)."""
+        now = time.monotonic()
+        for key in [key for key, entry in self._parked.items() if now - entry[1] > self.ttl_seconds]:
+            self._discard(key)
+
+    def _discard(self, key: str):
+        """Drop an unused parked entry and count it as waste (lock held)."""
+        entry = self._parked.pop(key, None)
+        if entry is not None:
+            self._stats["wasted"] += 1
+            self._stats["seconds_wasted"] += entry[2]
+
+    def _with_platform(self, settings: ContentSettings, platform: str) -> ContentSettings:
+        """Copy of settings with a different platform."""
+        candidate = copy.deepcopy(settings)
+        candidate.platform = platform
+        return candidate
+
+    def _key(self, settings: ContentSettings) -> str:
+        """Parking key for a set of settings."""
+        return settings_fingerprint(settings, "speculative")
@@ -0,0 +1,117 @@
+"""
+Redemption Marketing - Startup Profiler
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Startup phase timings and an import-time breakdown of the startup path.
+
+Usage:
+    python startup_profile.py --module main --top 20
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+# python -X importtime lines: "import time: <self us> | <cumulative us> | <indented module>"
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+class StartupTimer:
+    """Records how long each startup phase took.
+
+    Set ``STARTUP_PROFILE=1`` to print the phases once startup finishes.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+        self._start = time.perf_counter()
+        self._marks: List[Tuple[str, float]] = []
+
+    def mark(self, label: str):
+        """Record that a phase has finished."""
+        self._marks.append((label, time.perf_counter() - self._start))
+
+    def report(self) -> str:
+        """Phase timings as text, with time since the previous phase."""
+        lines = ["Startup phases:"]
+        previous = 0.0
+        for label, elapsed in self._marks:
+            lines.append(f"  {label:<28} {elapsed:7.2f}s  (+{elapsed - previous:.2f}s)")
+            previous = elapsed
+        return "\n".join(lines)
+
+    def print_report(self):
+        """Print the phase timings if profiling is enabled."""
+        if self.enabled:
+            print(self.report())
+
+
+def profile_imports(module: str = "main") -> List[Dict]:
+    """Import a module in a fresh interpreter and return per-module import times.
+
+    Each record has the module name, its own and cumulative import time
+    in seconds and its nesting depth.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        # Still report what was imported before the failure
+        print(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append({
+                "module": name,
+                "self_seconds": int(self_us) / 1e6,
+                "cumulative_seconds": int(cumulative_us) / 1e6,
+                "depth": len(indent) // 2
+            })
+    return records
+
+
+def summarize_imports(records: List[Dict], top: int = 20) -> str:
+    """Import-time breakdown by top-level package and by module."""
+    by_package: Dict[str, float] = defaultdict(float)
+    for record in records:
+        by_package[record["module"].split(".")[0]] += record["self_seconds"]
+    total = sum(by_package.values())
+
+    lines = [f"Total import time: {total:.2f}s across {len(records)} modules", "", "By package (self time):"]
+    for package, seconds in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        share = 100 * seconds / total if total else 0.0
+        lines.append(f"  {package:<32} {seconds:7.3f}s  {share:5.1f}%")
+
+    lines += ["", "Slowest modules (cumulative, including their imports):"]
+    for record in sorted(records, key=lambda item: -item["cumulative_seconds"])[:top]:
+        lines.append(f"  {'  ' * min(record['depth'], 6)}{record['module']:<40} {record['cumulative_seconds']:7.3f}s")
+    return "\n".join(lines)
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Show the import-time breakdown of the startup path.")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    args = parser.parse_args()
+
+    print(summarize_imports(profile_imports(args.module), args.top))
+
+
+# Created at import so phases are measured from the start of main.py's imports
+startup_timer = StartupTimer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Redemption Marketing - System Load Monitor
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Background sampler of CPU, memory and disk IO load.
+"""
+import time
+import threading
+from collections import deque, namedtuple
+from typing import Callable, Dict, List, Optional
+import psutil
+
+
+LoadSample = namedtuple(
+    "LoadSample",
+    ["time", "cpu_percent", "memory_percent", "available_memory_bytes", "disk_read_bps", "disk_write_bps"]
+)
+
+
+class SystemMonitor:
+    """Samples system load on one background thread.
+
+    Every ``interval`` seconds the sampler appends a sample to a ring
+    buffer of the last ``window`` samples and folds it into exponential
+    moving averages (weight ``alpha`` for the newest sample). Readers
+    get the latest and smoothed values without probing or blocking.
+    CPU usage is measured between ticks, so no sample sleeps.
+
+    Without the sampler running, reads take one non-blocking sample at
+    most every ``interval`` seconds.
+    """
+
+    def __init__(self, interval: float = 1.0, window: int = 120, alpha: float = 0.3):
+        self.interval = interval
+        self.alpha = alpha
+        self._samples: deque = deque(maxlen=window)
+        self._latest: Optional[LoadSample] = None
+        self._smoothed: Dict[str, float] = {}
+        self._callbacks: List[Callable[[Dict], None]] = []
+        self._last_disk = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Prime psutil's CPU counter so the first real sample covers a full interval
+        psutil.cpu_percent(interval=None)
+        self._primed_at = time.monotonic()
+
+    def start(self):
+        """Start the sampler thread; does nothing if it is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="system-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the sampler thread and wait for it to exit."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout if timeout is not None else self.interval * 2)
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the sampler thread is alive."""
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    def latest(self) -> Optional[LoadSample]:
+        """Most recent sample."""
+        self._refresh_if_stale()
+        return self._latest
+
+    def smoothed(self) -> Dict[str, float]:
+        """Exponentially smoothed load values (empty before the first sample)."""
+        self._refresh_if_stale()
+        return self._smoothed
+
+    def cpu_percent(self) -> Optional[float]:
+        """Smoothed CPU usage, or None before the first sample."""
+        return self.smoothed().get("cpu_percent")
+
+    def memory_percent(self) -> Optional[float]:
+        """Smoothed memory usage, or None before the first sample."""
+        return self.smoothed().get("memory_percent")
+
+    def samples(self) -> List[LoadSample]:
+        """Samples in the ring buffer, oldest first."""
+        with self._lock:
+            return list(self._samples)
+
+    def add_callback(self, callback: Callable[[Dict], None]):
+        """Call ``callback`` with the smoothed values after every sample."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[Dict], None]):
+        """Stop calling a callback."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def _run(self):
+        """Sampler loop."""
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"Error sampling system load: {e}")
+                continue
+
+            with self._lock:
+                callbacks = list(self._callbacks)
+            smoothed = self._smoothed
+            for callback in callbacks:
+                try:
+                    callback(smoothed)
+                except Exception as e:
+                    print(f"Error in system monitor callback: {e}")
+
+    def _refresh_if_stale(self):
+        """Sample on read when the sampler is not keeping values fresh."""
+        if self.is_running:
+            return
+        latest = self._latest
+        reference = latest.time if latest else self._primed_at
+        if time.monotonic() - reference >= self.interval:
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"Error sampling system load: {e}")
+
+    def _sample(self):
+        """Take one sample and update the averages."""
+        now = time.monotonic()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_io_counters()
+
+        read_bps = write_bps = 0.0
+        with self._lock:
+            if disk is not None and self._last_disk is not None:
+                previous_time, previous = self._last_disk
+                elapsed = max(now - previous_time, 1e-6)
+                read_bps = max(0, disk.read_bytes - previous.read_bytes) / elapsed
+                write_bps = max(0, disk.write_bytes - previous.write_bytes) / elapsed
+            self._last_disk = (now, disk) if disk is not None else None
+
+            sample = LoadSample(
+                time=now,
+                cpu_percent=psutil.cpu_percent(interval=None),
+                memory_percent=memory.percent,
+                available_memory_bytes=memory.available,
+                disk_read_bps=read_bps,
+                disk_write_bps=write_bps
+            )
+            self._samples.append(sample)
+
+            previous_smoothed = self._smoothed
+            smoothed = {}
+            for field in LoadSample._fields[1:]:
+                value = getattr(sample, field)
+                old = previous_smoothed.get(field)
+                smoothed[field] = value if old is None else old + self.alpha * (value - old)
+
+            # Swap whole objects so lock-free readers never see a half update
+            self._latest = sample
+            self._smoothed = smoothed
+
+
+# Shared by every consumer in the process; main starts and stops the sampler
+system_monitor = SystemMonitor()
@@ -0,0 +1,197 @@
+"""
+Redemption Marketing - Replicate Client Tests
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Exercises ReplicateClient against a local stub server. Run from the
+"Social Media" folder with: python -m unittest discover -s tests
+"""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replicate_client import ReplicateClient, ReplicateError
+
+
+MODEL = "owner/model"
+CREATE_PATH = f"/models/{MODEL}/predictions"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers each request with the next scripted response for its method and path."""
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        server = self.server
+        with server.lock:
+            server.calls.append((self.command, self.path, body))
+            script = server.routes.get((self.command, self.path), [])
+            reply = script.pop(0) if len(script) > 1 else (script[0] if script else (404, {}, None))
+        status, headers, payload = reply[0], dict(reply[1]), reply[2]
+
+        delay = headers.pop("X-Delay", 0)
+        if delay:
+            time.sleep(delay)
+
+        if isinstance(payload, str):
+            data = payload.encode()
+            content_type = "text/event-stream"
+        else:
+            data = json.dumps(payload).encode()
+            content_type = "application/json"
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass  # The client gave up (read timeout)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplicateClientTest(unittest.TestCase):
+    """Retry, idempotency, coalescing and streaming behaviour."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.routes = {}
+        self.server.calls = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = self._client(self.base_url)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _client(self, base_url: str, **kwargs) -> ReplicateClient:
+        options = dict(timeout=(1.0, 2.0), max_retries=3, backoff_base=0.01,
+                       backoff_max=0.05, poll_interval=0.01, run_timeout=5.0)
+        options.update(kwargs)
+        return ReplicateClient("test-token", base_url=base_url, **options)
+
+    def _script(self, method: str, path: str, *replies):
+        self.server.routes[(method, path)] = [
+            (status, dict(headers), payload) for status, headers, payload in replies
+        ]
+
+    def _count(self, method: str, path: str) -> int:
+        return sum(1 for call in self.server.calls if call[0] == method and call[1] == path)
+
+    def _succeeded(self, output) -> dict:
+        return {"id": "p1", "status": "succeeded", "output": output, "urls": {}}
+
+    def test_poll_retries_5xx_and_429(self):
+        processing = {"id": "p1", "status": "processing",
+                      "urls": {"get": f"{self.base_url}/predictions/p1"}}
+        self._script("POST", CREATE_PATH, (201, {}, processing))
+        self._script("GET", "/predictions/p1",
+                     (503, {}, {"detail": "busy"}),
+                     (429, {"Retry-After": "0"}, {"detail": "slow down"}),
+                     (200, {}, self._succeeded(["Hel", "lo"])))
+
+        self.assertEqual(self.client.run(MODEL, {"prompt": "hi"}), "Hello")
+        self.assertEqual(self._count("GET", "/predictions/p1"), 3)
+        self.assertEqual(self.client.get_stats()["retries"], 2)
+
+    def test_create_retried_on_429(self):
+        self._script("POST", CREATE_PATH,
+                     (429, {"Retry-After": "0"}, {"detail": "slow down"}),
+                     (201, {}, self._succeeded("ok")))
+
+        self.assertEqual(self.client.run(MODEL, {"prompt": "hi"}), "ok")
+        self.assertEqual(self._count("POST", CREATE_PATH), 2)
+
+    def test_create_not_retried_on_5xx(self):
+        self._script("POST", CREATE_PATH,
+                     (500, {}, {"detail": "error"}),
+                     (201, {}, self._succeeded("duplicate")))
+
+        with self.assertRaises(ReplicateError) as raised:
+            self.client.run(MODEL, {"prompt": "hi"})
+        self.assertEqual(raised.exception.status, 500)
+        self.assertEqual(self._count("POST", CREATE_PATH), 1)
+
+    def test_create_not_retried_on_read_timeout(self):
+        client = self._client(self.base_url, timeout=(1.0, 0.2))
+        self.addCleanup(client.close)
+        self._script("POST", CREATE_PATH, (201, {"X-Delay": 0.5}, self._succeeded("late")))
+
+        with self.assertRaises(ReplicateError):
+            client.run(MODEL, {"prompt": "hi"})
+        self.assertEqual(self._count("POST", CREATE_PATH), 1)
+
+    def test_create_retried_when_connection_refused(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            closed_port = probe.getsockname()[1]
+        client = self._client(f"http://127.0.0.1:{closed_port}")
+        self.addCleanup(client.close)
+
+        with self.assertRaises(ReplicateError):
+            client.run(MODEL, {"prompt": "hi"})
+        self.assertEqual(client.get_stats()["requests"], client.max_retries + 1)
+
+    def test_concurrent_identical_runs_share_one_prediction(self):
+        self._script("POST", CREATE_PATH, (201, {"X-Delay": 0.3}, self._succeeded("shared")))
+        results = []
+
+        def run():
+            results.append(self.client.run(MODEL, {"prompt": "same"}))
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, ["shared"] * 4)
+        self.assertEqual(self._count("POST", CREATE_PATH), 1)
+        self.assertEqual(self.client.get_stats()["coalesced"], 3)
+
+    def test_stream_yields_output_events(self):
+        started = {"id": "p1", "status": "starting",
+                   "urls": {"stream": f"{self.base_url}/stream/p1"}}
+        events = ("event: output\ndata: Hel\n\n"
+                  "event: output\ndata: lo\n\n"
+                  "event: done\ndata: {}\n\n")
+        self._script("POST", CREATE_PATH, (201, {}, started))
+        self._script("GET", "/stream/p1", (503, {}, {"detail": "busy"}), (200, {}, events))
+
+        self.assertEqual(list(self.client.stream(MODEL, {"prompt": "hi"})), ["Hel", "lo"])
+        create_body = json.loads(self.server.calls[0][2])
+        self.assertTrue(create_body["stream"])
+
+    def test_stream_error_event_raises(self):
+        started = {"id": "p1", "status": "starting",
+                   "urls": {"stream": f"{self.base_url}/stream/p1"}}
+        self._script("POST", CREATE_PATH, (201, {}, started))
+        self._script("GET", "/stream/p1", (200, {}, "event: error\ndata: model crashed\n\n"))
+
+        with self.assertRaises(ReplicateError):
+            list(self.client.stream(MODEL, {"prompt": "hi"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
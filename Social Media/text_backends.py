@@ -0,0 +1,240 @@
+"""
+Redemption Marketing - Local Text Model Backends
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Interchangeable inference backends for the local text model, plus a
+comparison harness.
+
+Usage:
+    python text_backends.py --backends fp32,int8,onnx --out backend_comparison.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+import numpy as np
+import torch
+
+
+TEXT_MODEL = "microsoft/DialoGPT-medium"
+DEFAULT_BACKEND = "fp32"
+ONNX_CACHE_DIR = "./model_cache/onnx"
+
+COMPARISON_PROMPTS = [
+    "Create engaging instagram content about fitness for busy parents with a inspirational tone:",
+    "Create engaging twitter content about music for aspiring artists with a casual tone:",
+    "Create engaging linkedin content about marketing for small business owners with a professional tone:",
+    "Create engaging tiktok content about cooking for college students with a humorous tone:",
+    "Create engaging facebook content about faith for young adults with a inspirational tone:",
+    "Create engaging instagram content about travel for retirees with a educational tone:",
+    "Create engaging twitter content about technology for developers with a professional tone:",
+    "Create engaging tiktok content about fashion for teenagers with a casual tone:"
+]
+
+
+def load_text_generator(backend: str = DEFAULT_BACKEND, device: str = "cpu"):
+    """Build a text-generation pipeline for the given backend.
+
+    ``int8`` and ``onnx`` are CPU backends; on CUDA the fp32 model is used.
+    """
+    loaders: Dict[str, Callable] = {
+        "fp32": _load_fp32,
+        "int8": _load_int8,
+        "onnx": _load_onnx
+    }
+    if backend not in loaders:
+        raise ValueError(f"Unknown text backend: {backend}")
+    if device == "cuda" and backend != "fp32":
+        print(f"Text backend {backend} is CPU-only; using fp32 on CUDA")
+        backend = "fp32"
+
+    generator = loaders[backend](device)
+    # GPT-2 tokenizers have no pad token; left padding keeps batched prompts aligned
+    generator.tokenizer.pad_token = generator.tokenizer.eos_token
+    generator.tokenizer.padding_side = "left"
+    return generator
+
+
+def _load_fp32(device: str):
+    """Full-precision transformers pipeline."""
+    from transformers import pipeline
+    return pipeline(
+        "text-generation",
+        model=TEXT_MODEL,
+        tokenizer=TEXT_MODEL,
+        device=0 if device == "cuda" else -1
+    )
+
+
+def _load_int8(device: str):
+    """Dynamic int8 quantization of the linear layers with torch."""
+    from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
+    model = AutoModelForCausalLM.from_pretrained(TEXT_MODEL)
+    model.eval()
+
+    # GPT-2 blocks use Conv1D, which quantize_dynamic skips; swap in nn.Linear first
+    _conv1d_to_linear(model)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(TEXT_MODEL),
+        device=-1
+    )
+
+
+def _load_onnx(device: str):
+    """ONNX Runtime model, exported once and cached on disk."""
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM
+    except ImportError:
+        print("optimum[onnxruntime] not installed; falling back to fp32 text backend")
+        return _load_fp32(device)
+
+    from transformers import pipeline, AutoTokenizer
+    export_dir = os.path.join(ONNX_CACHE_DIR, TEXT_MODEL.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        model = ORTModelForCausalLM.from_pretrained(export_dir)
+    else:
+        model = ORTModelForCausalLM.from_pretrained(TEXT_MODEL, export=True)
+        model.save_pretrained(export_dir)
+
+    return pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(TEXT_MODEL)
+    )
+
+
+def _conv1d_to_linear(module: torch.nn.Module):
+    """Replace transformers Conv1D layers with equivalent nn.Linear layers in place."""
+    from transformers.pytorch_utils import Conv1D
+
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features)
+            # Conv1D stores weights as (in, out); Linear expects (out, in)
+            linear.weight.data = child.weight.data.t().contiguous()
+            linear.bias.data = child.bias.data
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in megabytes."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def _benchmark_backend(backend: str, prompts: List[str], max_new_tokens: int, warmup: int) -> Dict:
+    """Load one backend in a fresh process and time greedy generation on the prompts."""
+    import psutil
+    process = psutil.Process()
+    base_rss = process.memory_info().rss
+
+    load_start = time.perf_counter()
+    generator = load_text_generator(backend, "cpu")
+    load_time = time.perf_counter() - load_start
+    model_rss = process.memory_info().rss - base_rss
+
+    options = {
+        "max_new_tokens": max_new_tokens,
+        "do_sample": False,
+        "return_full_text": False,
+        "pad_token_id": generator.tokenizer.eos_token_id
+    }
+    for prompt in prompts[:warmup]:
+        generator(prompt, **options)
+
+    latencies = []
+    tokens = 0
+    outputs = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        text = generator(prompt, **options)[0]["generated_text"]
+        latencies.append(time.perf_counter() - start)
+        tokens += len(generator.tokenizer(text)["input_ids"])
+        outputs.append(text)
+
+    latencies = np.array(latencies)
+    return {
+        "load_seconds": round(load_time, 2),
+        "model_rss_mb": round(model_rss / (1024 * 1024), 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "tokens_per_second": round(tokens / latencies.sum(), 2) if latencies.sum() > 0 else 0.0,
+        "latency_p50": round(float(np.percentile(latencies, 50)), 3),
+        "latency_p90": round(float(np.percentile(latencies, 90)), 3),
+        "latency_p99": round(float(np.percentile(latencies, 99)), 3),
+        "generated_tokens": tokens,
+        "outputs": outputs
+    }
+
+
+def compare_backends(backends: List[str], prompts: List[str] = None,
+                     max_new_tokens: int = 64, warmup: int = 1) -> Dict[str, Dict]:
+    """Benchmark each backend on the same prompts, each in its own process."""
+    prompts = prompts or COMPARISON_PROMPTS
+    results = {}
+
+    for backend in backends:
+        print(f"Benchmarking {backend} backend...")
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results[backend] = executor.submit(
+                    _benchmark_backend, backend, prompts, max_new_tokens, warmup
+                ).result()
+        except Exception as e:
+            results[backend] = {"error": f"{type(e).__name__}: {e}"}
+
+    # Greedy outputs should match fp32; report how many differ
+    reference = results.get("fp32", {}).get("outputs")
+    if reference:
+        for result in results.values():
+            if "outputs" in result:
+                result["outputs_matching_fp32"] = sum(
+                    a == b for a, b in zip(reference, result["outputs"])
+                )
+    return results
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Compare local text model inference backends.")
+    parser.add_argument("--backends", default="fp32,int8,onnx", help="Comma-separated backends to compare")
+    parser.add_argument("--max-new-tokens", type=int, default=64, help="Tokens generated per prompt")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed warm-up prompts per backend")
+    parser.add_argument("--out", default=None, help="Optional JSON results file")
+    args = parser.parse_args()
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    results = compare_backends(backends, max_new_tokens=args.max_new_tokens, warmup=args.warmup)
+
+    print(f"{'backend':<8} {'tok/s':>8} {'p50':>7} {'p90':>7} {'p99':>7} {'model MB':>9} {'peak MB':>8}")
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<8} ERROR {result['error']}")
+            continue
+        print(
+            f"{backend:<8} {result['tokens_per_second']:>8.1f} {result['latency_p50']:>7.3f} "
+            f"{result['latency_p90']:>7.3f} {result['latency_p99']:>7.3f} "
+            f"{result['model_rss_mb']:>9.0f} {result['peak_rss_mb']:>8.0f}"
+        )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Redemption Marketing - Timer Scheduler
+Copyright (c) 2025 Redemption Road. All rights reserved.
+
+Runs callbacks at given times on one thread that sleeps until the next one is due.
+"""
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+class TimerScheduler:
+    """Keyed one-shot timers kept in a min-heap.
+
+    ``schedule`` and ``cancel`` are O(log n) and O(1). The timer thread
+    waits on a condition variable until the earliest timer is due and is
+    woken early when a sooner timer is added or the earliest is
+    cancelled, so it never polls. Times are epoch seconds; waits are
+    capped at ``max_wait`` so a wall-clock change is noticed.
+
+    Callbacks run on the timer thread and should hand off slow work.
+    """
+
+    def __init__(self, name: str = "timer-scheduler", max_wait: float = 3600.0):
+        self.name = name
+        self.max_wait = max_wait
+        # Entries are [when, sequence, key, callback]; a cancelled entry has callback None
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._sequence = itertools.count()
+        self._cancelled = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the timer thread; does nothing if it is already running."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the timer thread; pending timers are kept."""
+        with self._condition:
+            self._running = False
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def schedule(self, key: str, when: float, callback: Callable[[], None]):
+        """Run ``callback`` at epoch time ``when``, replacing any timer with the same key."""
+        entry = [when, next(self._sequence), key, callback]
+        with self._condition:
+            self._remove(key)
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._condition.notify()
+
+    def cancel(self, key: str) -> bool:
+        """Cancel a pending timer; False if there was none."""
+        with self._condition:
+            return self._remove(key)
+
+    def clear(self):
+        """Cancel every pending timer."""
+        with self._condition:
+            self._heap.clear()
+            self._entries.clear()
+            self._cancelled = 0
+            self._condition.notify()
+
+    def next_time(self) -> Optional[float]:
+        """Epoch time of the earliest pending timer."""
+        with self._condition:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _run(self):
+        """Timer loop."""
+        while True:
+            with self._condition:
+                due = []
+                while not due:
+                    if not self._running:
+                        return
+                    self._drop_cancelled()
+                    now = time.time()
+                    if self._heap and self._heap[0][0] <= now:
+                        while self._heap and self._heap[0][0] <= now:
+                            entry = heapq.heappop(self._heap)
+                            if entry[3] is not None:
+                                del self._entries[entry[2]]
+                                due.append(entry)
+                            else:
+                                self._cancelled -= 1
+                        continue
+                    wait = self.max_wait if not self._heap else min(self._heap[0][0] - now, self.max_wait)
+                    self._condition.wait(wait)
+
+            for _, _, key, callback in due:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error in timer {key}: {e}")
+
+    def _remove(self, key: str) -> bool:
+        """Lazily delete a timer (lock held)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        was_next = self._heap[0] is entry
+        entry[3] = None
+        self._cancelled += 1
+        # Rebuild once most of the heap is dead so cancelled timers don't pile up
+        if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+            self._heap = [item for item in self._heap if item[3] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        if was_next:
+            self._condition.notify()
+        return True
+
+    def _drop_cancelled(self):
+        """Pop cancelled timers off the top of the heap (lock held)."""
+        while self._heap and self._heap[0][3] is None:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
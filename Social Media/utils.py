@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Optional, Dict, List
 import json
 import os
+import re
 
 
 def copy_to_clipboard(text: str) -> bool:
@@ -175,6 +176,170 @@ class StatusManager:
                 print(f"Callback error: {e}")
 
 
+class IncrementalJSONParser:
+    """Parses a streamed JSON object and exposes its fields as they arrive.
+    
+    Feed chunks of model output as they are generated. Top-level string
+    values are available while still being written, arrays of strings
+    grow item by item, and other values appear once complete. Text before
+    the opening brace (e.g. a ```json fence) is ignored, and each chunk is
+    only scanned once.
+    """
+    
+    _PARTIAL_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\(u[0-9a-fA-F]{0,3})?$')
+    
+    def __init__(self):
+        self.fields: Dict = {}
+        self.complete = False
+        self._state = "seek_object"
+        self._key = ""
+        self._raw = ""  # Undecoded text of the string or scalar being read
+        self._escaped = False
+        self._in_array = False
+        self._depth = 0
+        self._raw_in_string = False
+    
+    def feed(self, chunk: str) -> List[str]:
+        """Consume a chunk and return the keys whose values changed."""
+        changed = []
+        for char in chunk:
+            if self.complete:
+                break
+            key = self._consume(char)
+            if key and key not in changed:
+                changed.append(key)
+        
+        # Expose the partially written string as it stands after this chunk
+        if self._state == "string" and self._raw:
+            self._set_value(self._decode(self._raw, partial=True), partial=True)
+            if self._key not in changed:
+                changed.append(self._key)
+        return changed
+    
+    def snapshot(self) -> Dict:
+        """Copy of the fields parsed so far, safe to hand to another thread."""
+        return {key: list(value) if isinstance(value, list) else value for key, value in self.fields.items()}
+    
+    def _consume(self, char: str) -> Optional[str]:
+        """Advance the state machine by one character."""
+        state = self._state
+        
+        if state == "seek_object":
+            if char == "{":
+                self._state = "seek_key"
+        elif state == "seek_key":
+            if char == '"':
+                self._state, self._raw = "key", ""
+            elif char == "}":
+                self.complete = True
+        elif state == "key":
+            if self._end_of_string(char):
+                self._key = self._decode(self._raw)
+                self._state = "seek_colon"
+            else:
+                self._raw += char
+        elif state == "seek_colon":
+            if char == ":":
+                self._state = "seek_value"
+        elif state in ("seek_value", "seek_item"):
+            return self._start_value(char)
+        elif state == "string":
+            if self._end_of_string(char):
+                return self._finish_value(self._decode(self._raw))
+            self._raw += char
+        elif state == "scalar":
+            return self._consume_scalar(char)
+        return None
+    
+    def _start_value(self, char: str) -> Optional[str]:
+        """Begin reading a value or array item."""
+        if char.isspace() or (char == "," and self._in_array):
+            return None
+        if char == '"':
+            self._state, self._raw, self._escaped = "string", "", False
+            if self._in_array:
+                self.fields[self._key].append("")
+        elif char == "[" and not self._in_array:
+            self._in_array = True
+            self.fields[self._key] = []
+            self._state = "seek_item"
+            return self._key
+        elif char == "]" and self._in_array:
+            self._in_array = False
+            self._state = "seek_key"
+        else:
+            self._state, self._raw = "scalar", char
+            self._depth = 1 if char in "[{" else 0
+            self._raw_in_string = char == '"'
+        return None
+    
+    def _consume_scalar(self, char: str) -> Optional[str]:
+        """Read a number, literal or nested value until its closing delimiter."""
+        if self._raw_in_string:
+            self._raw += char
+            if self._end_of_string(char):
+                self._raw_in_string = False
+            return None
+        
+        if self._depth == 0 and char in ",}]":
+            try:
+                value = json.loads(self._raw)
+            except ValueError:
+                value = self._raw.strip()
+            key = self._finish_value(value)
+            if char == "}" and not self._in_array:
+                self.complete = True
+            elif char == "]" and self._in_array:
+                self._in_array = False
+                self._state = "seek_key"
+            return key
+        
+        self._raw += char
+        if char == '"':
+            self._raw_in_string, self._escaped = True, False
+        elif char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            self._depth -= 1
+        return None
+    
+    def _end_of_string(self, char: str) -> bool:
+        """Track escapes and report an unescaped closing quote."""
+        if self._escaped:
+            self._escaped = False
+            return False
+        if char == "\\":
+            self._escaped = True
+            return False
+        return char == '"'
+    
+    def _finish_value(self, value) -> str:
+        """Store a completed value or array item."""
+        self._set_value(value, partial=False)
+        self._state = "seek_item" if self._in_array else "seek_key"
+        return self._key
+    
+    def _set_value(self, value, partial: bool):
+        """Write a value, replacing the last array item when inside an array."""
+        if self._in_array:
+            items = self.fields[self._key]
+            if items and (partial or self._state == "string"):
+                items[-1] = value
+            else:
+                items.append(value)
+        else:
+            self.fields[self._key] = value
+    
+    def _decode(self, raw: str, partial: bool = False) -> str:
+        """Decode JSON string escapes, dropping an incomplete trailing escape."""
+        if partial:
+            raw = self._PARTIAL_ESCAPE.sub(lambda m: m.group(1) or "", raw)
+        try:
+            return json.loads(f'"{raw}"', strict=False)
+        except ValueError:
+            return raw
+
+
 class VideoCodec:
     """Video codec utilities."""
     